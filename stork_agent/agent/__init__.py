@@ -6,6 +6,8 @@ from stork_agent.agent.tools import (
     get_stock_realtime,
     get_stock_history,
     screen_stocks,
+    screen_codes,
+    get_stock_briefs,
     compare_stocks,
     get_financials,
     calculate_indicator,
@@ -13,6 +15,7 @@ from stork_agent.agent.tools import (
 from stork_agent.agent.schemas import (
     StockQuote,
     StockHistory,
+    ColumnarHistory,
     ScreeningFilter,
     StockComparison,
     FinancialData,
@@ -24,12 +27,15 @@ __all__ = [
     "get_stock_realtime",
     "get_stock_history",
     "screen_stocks",
+    "screen_codes",
+    "get_stock_briefs",
     "compare_stocks",
     "get_financials",
     "calculate_indicator",
     # Schemas
     "StockQuote",
     "StockHistory",
+    "ColumnarHistory",
     "ScreeningFilter",
     "StockComparison",
     "FinancialData",
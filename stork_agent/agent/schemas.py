@@ -4,8 +4,8 @@ Agent 数据结构定义
 使用 Pydantic 进行数据验证和序列化，确保所有返回给 AI 的数据都是结构化的
 """
 
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Any, Optional, List
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
@@ -69,8 +69,31 @@ class StockHistory(BaseModel):
     count: int = Field(..., description="数据条数")
 
 
+class HistoryColumns(BaseModel):
+    """按列存储的历史K线数据"""
+    date: List[str] = Field(..., description="日期列表")
+    open: List[float] = Field(..., description="开盘价列表")
+    high: List[float] = Field(..., description="最高价列表")
+    low: List[float] = Field(..., description="最低价列表")
+    close: List[float] = Field(..., description="收盘价列表")
+    volume: List[float] = Field(..., description="成交量列表")
+    amount: List[float] = Field(..., description="成交额列表")
+    change_pct: List[float] = Field(..., description="涨跌幅(%)列表")
+
+
+class ColumnarHistory(BaseModel):
+    """按列存储的股票历史K线数据结构"""
+    code: str = Field(..., description="股票代码")
+    name: str = Field(..., description="股票名称")
+    period: str = Field(..., description="周期: daily/weekly/monthly")
+    columns: HistoryColumns = Field(..., description="K线数据列")
+    count: int = Field(..., description="数据条数")
+
+
 class ScreeningFilter(BaseModel):
-    """选股筛选条件"""
+    """选股筛选条件（不可变，可在多次筛选间复用）"""
+    model_config = ConfigDict(frozen=True)
+
     pe_min: Optional[float] = Field(None, description="最小市盈率")
     pe_max: Optional[float] = Field(None, description="最大市盈率")
     pb_min: Optional[float] = Field(None, description="最小市净率")
@@ -79,7 +102,7 @@ class ScreeningFilter(BaseModel):
     market_cap_max: Optional[float] = Field(None, description="最大市值（亿元）")
     change_min: Optional[float] = Field(None, description="最小涨跌幅(%)")
     change_max: Optional[float] = Field(None, description="最大涨跌幅(%)")
-    industry: Optional[str] = Field(None, description="行业筛选")
+    industry: Optional[str] = Field(None, description="行业筛选（按名称子串匹配，多个行业用逗号分隔）")
     turnover_min: Optional[float] = Field(None, description="最小换手率(%)")
     turnover_max: Optional[float] = Field(None, description="最大换手率(%)")
     limit: int = Field(50, description="返回结果数量限制")
@@ -178,11 +201,12 @@ class ApiResponse(BaseModel):
     """通用 API 响应格式"""
     success: bool = Field(..., description="是否成功")
     message: str = Field(..., description="响应消息")
-    data: Optional[dict] = Field(None, description="响应数据")
+    # 数据字典按引用保存，避免 Pydantic 对大体量负载（如K线列表）逐项复制
+    data: Any = Field(None, description="响应数据")
     error: Optional[str] = Field(None, description="错误信息")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "success": True,
                 "message": "操作成功",
@@ -190,3 +214,4 @@ class ApiResponse(BaseModel):
                 "error": None
             }
         }
+    )
@@ -5,15 +5,25 @@ Agent 可调用工具模块
 这是与 AI 系统的主要接口层
 """
 
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
 from stork_agent.data.query import (
     get_realtime_quote,
     get_history_kline,
     get_financial_data,
+    get_index_realtime,
+    get_stock_list,
+    get_stock_search_index,
     batch_get_realtime,
     normalize_stock_code,
 )
-from stork_agent.data.screener import screen_stocks as screen_stocks_data
+from stork_agent.data.screener import (
+    screen_stocks as screen_stocks_data,
+    screen_codes as screen_codes_data,
+    get_stock_briefs as get_stock_briefs_data,
+)
 from stork_agent.data.comparator import compare_stocks as compare_stocks_data
 from stork_agent.analysis.indicators import (
     calculate_ma,
@@ -33,6 +43,31 @@ from stork_agent.agent.schemas import (
 )
 
 
+# 错误信息的最大长度，避免超长异常文本进入响应
+MAX_ERROR_LENGTH = 512
+
+
+def _failure(message: str, error: Exception) -> ApiResponse:
+    """
+    构造失败响应
+
+    字段均为已知的合法值，直接构造以跳过校验
+
+    Args:
+        message: 响应消息
+        error: 捕获的异常
+
+    Returns:
+        success=False 的 ApiResponse
+    """
+    return ApiResponse.model_construct(
+        success=False,
+        message=message,
+        data=None,
+        error=str(error)[:MAX_ERROR_LENGTH]
+    )
+
+
 def get_stock_realtime(code: str) -> ApiResponse:
     """
     获取股票实时行情
@@ -56,11 +91,7 @@ def get_stock_realtime(code: str) -> ApiResponse:
             data=data
         )
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message=f"获取实时行情失败",
-            error=str(e)
-        )
+        return _failure("获取实时行情失败", e)
 
 
 def get_stock_history(
@@ -94,11 +125,7 @@ def get_stock_history(
             data=data
         )
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message=f"获取历史数据失败",
-            error=str(e)
-        )
+        return _failure("获取历史数据失败", e)
 
 
 def get_stock_realtime_batch(codes: List[str]) -> ApiResponse:
@@ -117,7 +144,6 @@ def get_stock_realtime_batch(codes: List[str]) -> ApiResponse:
         2
     """
     try:
-        from stork_agent.data.query import batch_get_realtime
         data = batch_get_realtime(codes)
         return ApiResponse(
             success=True,
@@ -125,17 +151,42 @@ def get_stock_realtime_batch(codes: List[str]) -> ApiResponse:
             data={"stocks": data}
         )
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="批量获取行情失败",
-            error=str(e)
-        )
+        return _failure("批量获取行情失败", e)
+
+
+@lru_cache(maxsize=256)
+def _cached_screening_filter(items: frozenset) -> ScreeningFilter:
+    """按条件内容缓存已校验的 ScreeningFilter，相同条件只校验一次"""
+    return ScreeningFilter(**dict(items))
+
+
+def _to_screening_filter(filters: Dict) -> ScreeningFilter:
+    """
+    将筛选条件字典转换为 ScreeningFilter
+
+    Args:
+        filters: 筛选条件字典
+
+    Returns:
+        ScreeningFilter 对象，条件值不可哈希时直接构造
+    """
+    try:
+        key = frozenset(filters.items())
+    except TypeError:
+        return ScreeningFilter(**filters)
+    return _cached_screening_filter(key)
 
 
-def screen_stocks(filters: Union[Dict, ScreeningFilter]) -> ApiResponse:
+def screen_stocks(
+    filters: Union[Dict, ScreeningFilter],
+    cursor: Optional[str] = None
+) -> ApiResponse:
     """
     按条件筛选股票
 
+    结果按股票代码升序排列，limit 取代码最小的若干只，
+    后续页通过 next_cursor 继续获取
+
     Args:
         filters: 筛选条件字典或 ScreeningFilter 对象
             - pe_min: 最小市盈率
@@ -146,10 +197,11 @@ def screen_stocks(filters: Union[Dict, ScreeningFilter]) -> ApiResponse:
             - market_cap_max: 最大市值（亿元）
             - change_min: 最小涨跌幅(%)
             - change_max: 最大涨跌幅(%)
-            - industry: 行业筛选
+            - industry: 行业筛选（按名称子串匹配，多个行业用逗号分隔）
             - turnover_min: 最小换手率(%)
             - turnover_max: 最大换手率(%)
-            - limit: 返回结果数量限制
+            - limit: 返回结果数量限制（按代码升序取前 limit 只）
+        cursor: 分页游标，取上一次结果中的 next_cursor
 
     Returns:
         ApiResponse 格式的筛选结果
@@ -163,22 +215,75 @@ def screen_stocks(filters: Union[Dict, ScreeningFilter]) -> ApiResponse:
     try:
         # 如果是字典，转换为 ScreeningFilter
         if isinstance(filters, dict):
-            filter_obj = ScreeningFilter(**filters)
+            filter_obj = _to_screening_filter(filters)
         else:
             filter_obj = filters
 
-        data = screen_stocks_data(filter_obj)
+        data = screen_stocks_data(filter_obj, cursor)
         return ApiResponse(
             success=True,
             message=f"筛选成功，共找到 {data['total']} 只股票",
             data=data
         )
     except Exception as e:
+        return _failure("筛选股票失败", e)
+
+
+def screen_codes(filters: Union[Dict, ScreeningFilter]) -> ApiResponse:
+    """
+    取满足筛选条件的全部股票代码（按代码排序）
+
+    Args:
+        filters: 筛选条件字典或 ScreeningFilter 对象，limit 不影响结果
+
+    Returns:
+        ApiResponse 格式的结果，data["codes"] 为代码列表，data["total"] 为数量
+
+    Example:
+        >>> result = screen_codes({"pe_max": 20})
+        >>> print(result.data["codes"][:2])
+        ['000001', '000002']
+    """
+    try:
+        if isinstance(filters, dict):
+            filter_obj = _to_screening_filter(filters)
+        else:
+            filter_obj = filters
+
+        codes = screen_codes_data(filter_obj)
         return ApiResponse(
-            success=False,
-            message="筛选股票失败",
-            error=str(e)
+            success=True,
+            message=f"筛选成功，共找到 {len(codes)} 只股票",
+            data={"codes": codes, "total": len(codes)}
         )
+    except Exception as e:
+        return _failure("筛选股票失败", e)
+
+
+def get_stock_briefs(codes: List[str]) -> ApiResponse:
+    """
+    按代码取股票简要信息
+
+    Args:
+        codes: 股票代码列表
+
+    Returns:
+        ApiResponse 格式的结果，data["stocks"] 按传入顺序排列，行情中不存在的代码跳过
+
+    Example:
+        >>> result = get_stock_briefs(["600519", "000858"])
+        >>> print(result.data["stocks"][0]["name"])
+        '贵州茅台'
+    """
+    try:
+        stocks = get_stock_briefs_data(codes)
+        return ApiResponse(
+            success=True,
+            message=f"成功获取 {len(stocks)} 只股票信息",
+            data={"stocks": stocks, "total": len(stocks)}
+        )
+    except Exception as e:
+        return _failure("获取股票信息失败", e)
 
 
 def compare_stocks(codes: List[str], days: int = 30) -> ApiResponse:
@@ -205,11 +310,7 @@ def compare_stocks(codes: List[str], days: int = 30) -> ApiResponse:
             data=data
         )
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="对比股票失败",
-            error=str(e)
-        )
+        return _failure("对比股票失败", e)
 
 
 def get_financials(code: str) -> ApiResponse:
@@ -235,17 +336,109 @@ def get_financials(code: str) -> ApiResponse:
             data=data
         )
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="获取财务数据失败",
-            error=str(e)
-        )
+        return _failure("获取财务数据失败", e)
+
+
+def _to_records(
+    dates: List,
+    columns: Dict[str, List[Optional[float]]],
+    dropna: bool = False,
+    tail: Optional[int] = None
+) -> List[Dict]:
+    """
+    将按日期对齐的指标序列组装为记录列表
+
+    Args:
+        dates: 日期列表
+        columns: 指标字段名到数值列表的映射
+        dropna: 是否丢弃含空值的行
+        tail: 只保留最近的 N 条（正整数），None 表示全部保留
+
+    Returns:
+        [{"date": ..., 字段名: 值, ...}, ...]，空值为 None
+    """
+    names = list(columns)
+    dates = list(dates)
+    values = np.array([columns[name] for name in names], dtype=float).reshape(len(names), len(dates))
+
+    if tail is not None:
+        dates = dates[-tail:]
+        values = values[:, -tail:]
+
+    # 一次性计算空值掩码，不逐条判断
+    valid = ~np.isnan(values)
+    if dropna:
+        keep = valid.all(axis=0)
+        dates = [d for d, k in zip(dates, keep) if k]
+        values = values[:, keep]
+        valid = valid[:, keep]
+
+    fields = [
+        [v if ok else None for v, ok in zip(row.tolist(), mask.tolist())]
+        for row, mask in zip(values, valid)
+    ]
+    keys = ("date", *names)
+    return [dict(zip(keys, row)) for row in zip(dates, *fields)]
+
+
+@lru_cache(maxsize=1024)
+def _compute_indicator(
+    indicator: str,
+    period: int,
+    dates: Tuple,
+    closes: Tuple[float, ...],
+    tail: Optional[int],
+    params: Tuple
+) -> Optional[Tuple[List[Dict], str]]:
+    """
+    计算指标数据，按输入序列缓存结果
+
+    以日期和收盘价序列本身作为缓存键：同一份历史数据上重复查询同一指标时
+    直接返回上次结果；新增交易日或复权价格调整都会改变缓存键
+
+    Args:
+        indicator: 指标类型（小写） - ma/macd/rsi/boll
+        period: 计算周期
+        dates: 日期序列
+        closes: 收盘价序列
+        tail: 只保留最近的 N 个数据点
+        params: 其他指标参数的 (名称, 值) 元组
+
+    Returns:
+        (指标数据记录列表, 指标描述)，不支持的指标返回 None。
+        记录在多次调用间共享，调用方不应修改
+    """
+    # 转为 float64 数组一次，各指标函数内不再重复转换
+    closes = np.array(closes, dtype=np.float64)
+
+    if indicator == "ma":
+        # 计算移动平均线
+        ma_values = calculate_ma(closes, period)
+        return _to_records(dates, {"value": ma_values}, dropna=True, tail=tail), f"MA{period} 移动平均线"
+
+    if indicator == "macd":
+        # 计算 MACD
+        macd_data = calculate_macd(closes, **dict(params))
+        return _to_records(dates, macd_data, tail=tail), "MACD 指标"
+
+    if indicator == "rsi":
+        # 计算 RSI
+        rsi_values = calculate_rsi(closes, period)
+        return _to_records(dates, {"value": rsi_values}, dropna=True, tail=tail), f"RSI({period}) 相对强弱指标"
+
+    if indicator == "boll":
+        # 计算布林带
+        boll_data = calculate_bollinger_bands(closes, period)
+        return _to_records(dates, boll_data, tail=tail), f"BOLL({period}) 布林带"
+
+    return None
 
 
 def calculate_indicator(
     code: str,
     indicator: str,
     period: int = 20,
+    tail: Optional[int] = None,
     **kwargs
 ) -> ApiResponse:
     """
@@ -255,6 +448,7 @@ def calculate_indicator(
         code: 股票代码
         indicator: 指标类型 - ma/macd/rsi/boll
         period: 计算周期
+        tail: 只返回最近的 N 个数据点（正整数），None 表示返回全部
         **kwargs: 其他参数
 
     Returns:
@@ -265,13 +459,23 @@ def calculate_indicator(
         >>> print(result.data["indicator"])
         'MA20'
     """
+    # JSON 数字可能以 3.0 的形式传入，整数值的浮点数按整数处理
+    if isinstance(tail, float) and tail.is_integer():
+        tail = int(tail)
+    if tail is not None and (isinstance(tail, bool) or not isinstance(tail, int) or tail < 1):
+        return ApiResponse(
+            success=False,
+            message=f"无效的 tail 参数: {tail}",
+            error="tail 必须是大于等于 1 的整数"
+        )
+
     try:
         # 获取历史数据
-        hist_data = get_history_kline(code, "daily", days=period + 50)
+        hist_data = get_history_kline(code, "daily", days=period + 50, columnar=True)
 
-        # 提取收盘价
-        closes = [bar["close"] for bar in hist_data["data"]]
-        dates = [bar["date"] for bar in hist_data["data"]]
+        # 按列取日期和收盘价，无需逐条提取
+        dates = hist_data["columns"]["date"]
+        closes = hist_data["columns"]["close"]
 
         result = {
             "code": code,
@@ -279,70 +483,31 @@ def calculate_indicator(
             "indicator": indicator.upper()
         }
 
-        if indicator.lower() == "ma":
-            # 计算移动平均线
-            ma_values = calculate_ma(closes, period)
-            result["data"] = [
-                {"date": dates[i], "value": ma_values[i]}
-                for i in range(len(ma_values)) if ma_values[i] is not None
-            ]
-            result["description"] = f"MA{period} 移动平均线"
-
-        elif indicator.lower() == "macd":
-            # 计算 MACD
-            macd_data = calculate_macd(closes, **kwargs)
-            result["data"] = [
-                {
-                    "date": dates[i],
-                    "dif": macd_data["dif"][i],
-                    "dea": macd_data["dea"][i],
-                    "bar": macd_data["bar"][i]
-                }
-                for i in range(len(macd_data["dif"]))
-            ]
-            result["description"] = "MACD 指标"
-
-        elif indicator.lower() == "rsi":
-            # 计算 RSI
-            rsi_values = calculate_rsi(closes, period)
-            result["data"] = [
-                {"date": dates[i], "value": rsi_values[i]}
-                for i in range(len(rsi_values)) if rsi_values[i] is not None
-            ]
-            result["description"] = f"RSI({period}) 相对强弱指标"
-
-        elif indicator.lower() == "boll":
-            # 计算布林带
-            boll_data = calculate_bollinger_bands(closes, period)
-            result["data"] = [
-                {
-                    "date": dates[i],
-                    "upper": boll_data["upper"][i],
-                    "middle": boll_data["middle"][i],
-                    "lower": boll_data["lower"][i]
-                }
-                for i in range(len(boll_data["upper"]))
-            ]
-            result["description"] = f"BOLL({period}) 布林带"
-
-        else:
+        computed = _compute_indicator(
+            indicator.lower(),
+            period,
+            tuple(dates),
+            tuple(closes),
+            tail,
+            tuple(sorted(kwargs.items()))
+        )
+        if computed is None:
             return ApiResponse(
                 success=False,
                 message=f"不支持的指标类型: {indicator}",
                 error=f"支持的指标: ma, macd, rsi, boll"
             )
 
+        records, result["description"] = computed
+        result["data"] = list(records)
+
         return ApiResponse(
             success=True,
             message=f"成功计算 {indicator.upper()} 指标",
             data=result
         )
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message=f"计算指标失败",
-            error=str(e)
-        )
+        return _failure("计算指标失败", e)
 
 
 def search_stocks(keyword: str, limit: int = 10) -> ApiResponse:
@@ -357,19 +522,13 @@ def search_stocks(keyword: str, limit: int = 10) -> ApiResponse:
         ApiResponse 格式的搜索结果
     """
     try:
-        from stork_agent.data.query import get_stock_list
-        df = get_stock_list()
+        df = get_stock_search_index()
 
-        # 搜索匹配
-        mask = df["code"].str.contains(keyword, na=False) | df["name"].str.contains(keyword, na=False)
+        # 搜索匹配（按子串匹配代码或名称，不解析正则）
+        mask = df["_search"].str.contains(keyword.lower(), regex=False, na=False)
         results = df[mask].head(limit)
 
-        stocks = []
-        for _, row in results.iterrows():
-            stocks.append({
-                "code": row["code"],
-                "name": row["name"]
-            })
+        stocks = results[["code", "name"]].to_dict("records")
 
         return ApiResponse(
             success=True,
@@ -377,11 +536,7 @@ def search_stocks(keyword: str, limit: int = 10) -> ApiResponse:
             data={"stocks": stocks, "keyword": keyword}
         )
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="搜索股票失败",
-            error=str(e)
-        )
+        return _failure("搜索股票失败", e)
 
 
 def get_market_summary() -> ApiResponse:
@@ -392,28 +547,30 @@ def get_market_summary() -> ApiResponse:
         ApiResponse 格式的市场概览数据
     """
     try:
-        from stork_agent.data.query import get_index_realtime
-
         # 获取主要指数
         indices = ["sh000001", "sz399001", "sz399006"]  # 上证指数、深证成指、创业板指
         indices_data = []
 
-        for idx in indices:
-            try:
-                data = get_index_realtime(idx)
-                indices_data.append({
-                    "code": data["code"],
-                    "name": data["name"],
-                    "price": data["price"],
-                    "change": data["change"],
-                    "change_pct": data["change_pct"]
-                })
-            except:
-                pass
-
-        # 市场统计
-        from stork_agent.data.query import get_stock_list
-        df = get_stock_list()
+        # 指数行情与股票列表并发获取，总耗时取决于最慢的一次请求
+        with ThreadPoolExecutor(max_workers=len(indices) + 1) as executor:
+            index_futures = [executor.submit(get_index_realtime, idx) for idx in indices]
+            list_future = executor.submit(get_stock_list)
+
+            for future in index_futures:
+                try:
+                    data = future.result()
+                    indices_data.append({
+                        "code": data["code"],
+                        "name": data["name"],
+                        "price": data["price"],
+                        "change": data["change"],
+                        "change_pct": data["change_pct"]
+                    })
+                except Exception:
+                    pass
+
+            # 市场统计
+            df = list_future.result()
 
         return ApiResponse(
             success=True,
@@ -424,11 +581,7 @@ def get_market_summary() -> ApiResponse:
             }
         )
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="获取市场概览失败",
-            error=str(e)
-        )
+        return _failure("获取市场概览失败", e)
 
 
 # 导出所有工具函数
@@ -437,6 +590,8 @@ __all__ = [
     "get_stock_history",
     "get_stock_realtime_batch",
     "screen_stocks",
+    "screen_codes",
+    "get_stock_briefs",
     "compare_stocks",
     "get_financials",
     "calculate_indicator",
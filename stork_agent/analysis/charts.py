@@ -6,34 +6,248 @@
 """
 
 import os
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+import time
+import atexit
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, List, Dict, Optional, Tuple
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 
 from stork_agent.config import Config
+from stork_agent.analysis.indicators import calculate_ma
 
 
 # 创建输出目录
 CHART_OUTPUT_DIR = os.path.join(Config.OUTPUT_DIR, "charts")
 os.makedirs(CHART_OUTPUT_DIR, exist_ok=True)
 
+# 默认文件名序号，避免同一时刻生成的图表互相覆盖
+_filename_seq = itertools.count()
 
-def save_chart(fig: go.Figure, filename: str) -> str:
+
+def _default_filename(prefix: str) -> str:
+    """
+    生成默认图表文件名
+
+    Args:
+        prefix: 文件名前缀（如 "kline"）
+
+    Returns:
+        形如 "kline_<纳秒时间戳>_<序号>" 的唯一文件名
+    """
+    return f"{prefix}_{time.time_ns()}_{next(_filename_seq)}"
+
+
+# 数据点超过该数量时折线改用 WebGL 渲染
+WEBGL_THRESHOLD = 2000
+
+
+def _scatter_cls(n_points: int):
+    """
+    根据数据点数量选择折线图类型
+
+    Args:
+        n_points: 数据点数量
+
+    Returns:
+        数据量大时返回 go.Scattergl（WebGL），否则返回 go.Scatter（SVG）
+    """
+    return go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+
+
+# 折线数据点超过该数量时降采样，保留的点数
+DOWNSAMPLE_THRESHOLD = 3000
+DOWNSAMPLE_POINTS = 2000
+
+
+def _lttb_indices(values: List[Optional[float]], n_out: int) -> np.ndarray:
+    """
+    LTTB（Largest-Triangle-Three-Buckets）降采样，返回保留点的下标
+
+    首尾两点始终保留，中间按等宽分桶，每桶选出与前一个保留点、
+    下一桶均值点构成三角形面积最大的点，保留曲线的形状和极值
+
+    Args:
+        values: 数值列表，None/NaN 按 0 参与选点
+        n_out: 保留的点数
+
+    Returns:
+        递增的下标数组，数据量不超过 n_out 时返回全部下标
+    """
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(values, dtype=np.float64))
+
+    # 中间 n_out - 2 个桶的边界
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def _downsample_indices(values: List[Optional[float]], downsample: bool) -> Optional[np.ndarray]:
+    """
+    计算折线降采样下标
+
+    Args:
+        values: 决定选点的数值列表
+        downsample: 是否允许降采样
+
+    Returns:
+        保留点的下标，不需要降采样时返回 None
+    """
+    if not downsample or len(values) <= DOWNSAMPLE_THRESHOLD:
+        return None
+    return _lttb_indices(values, DOWNSAMPLE_POINTS)
+
+
+def _take(items, indices: Optional[np.ndarray]):
+    """
+    按下标取子序列
+
+    Args:
+        items: 原列表或数组
+        indices: 下标数组，None 表示不取子集
+
+    Returns:
+        子序列，类型与 items 相同
+    """
+    if indices is None:
+        return items
+    if isinstance(items, np.ndarray):
+        return items[indices]
+    return [items[i] for i in indices]
+
+
+def _as_array(values: Optional[List[Optional[float]]]) -> Optional[np.ndarray]:
+    """
+    将数值列表转换为 float64 数组
+
+    Plotly 对 numpy 数组走快速路径，写入 HTML 时编码为二进制 base64，
+    不再逐个元素转换为 JSON 数字；None 转换为 NaN，绘图时显示为断点
+
+    Args:
+        values: 数值列表
+
+    Returns:
+        float64 数组，values 为 None 时返回 None
+    """
+    if values is None:
+        return None
+    return np.asarray(values, dtype=np.float64)
+
+
+# 后台写入图表文件的线程数
+CHART_WRITE_WORKERS = 4
+
+_chart_executor = ThreadPoolExecutor(max_workers=CHART_WRITE_WORKERS, thread_name_prefix="chart-writer")
+# 退出时等待未完成的写入
+atexit.register(_chart_executor.shutdown)
+
+_pending_writes: set = set()
+_pending_lock = threading.Lock()
+
+
+def _write_html(fig: go.Figure, filepath: str) -> str:
+    """
+    将图表写入 HTML 文件
+
+    plotly.js 只在图表目录中写入一份 plotly.min.js，所有图表共用，
+    打开图表时从本地加载，不依赖网络
+
+    Args:
+        fig: Plotly Figure 对象
+        filepath: 文件路径
+
+    Returns:
+        HTML 文件的绝对路径
+    """
+    fig.write_html(filepath, include_plotlyjs="directory", full_html=True)
+    return os.path.abspath(filepath)
+
+
+def save_chart_async(fig: go.Figure, filename: str) -> Future:
+    """
+    在后台线程中保存图表为 HTML 文件
+
+    提交后不应再修改 fig
+
+    Args:
+        fig: Plotly Figure 对象
+        filename: 文件名（不含扩展名）
+
+    Returns:
+        Future，结果为 HTML 文件的绝对路径
+    """
+    filepath = os.path.join(CHART_OUTPUT_DIR, f"{filename}.html")
+    future = _chart_executor.submit(_write_html, fig, filepath)
+    with _pending_lock:
+        _pending_writes.add(future)
+
+    def _done(f: Future) -> None:
+        with _pending_lock:
+            _pending_writes.discard(f)
+
+    future.add_done_callback(_done)
+    return future
+
+
+def wait_chart_writes(timeout: Optional[float] = None) -> bool:
+    """
+    等待所有后台图表写入完成
+
+    Args:
+        timeout: 最长等待秒数，None 表示一直等待
+
+    Returns:
+        是否全部完成
+    """
+    with _pending_lock:
+        pending = list(_pending_writes)
+    _, not_done = wait(pending, timeout=timeout)
+    return not not_done
+
+
+def save_chart(fig: go.Figure, filename: str, async_write: bool = False) -> str:
     """
     保存图表为 HTML 文件
 
     Args:
         fig: Plotly Figure 对象
         filename: 文件名（不含扩展名）
+        async_write: 是否在后台线程写入（立即返回路径，可用 wait_chart_writes 等待落盘）
 
     Returns:
         HTML 文件的绝对路径
     """
     filepath = os.path.join(CHART_OUTPUT_DIR, f"{filename}.html")
-    fig.write_html(filepath, include_plotlyjs="cdn", full_html=True)
-    return os.path.abspath(filepath)
+    if async_write:
+        save_chart_async(fig, filename)
+        return os.path.abspath(filepath)
+    return _write_html(fig, filepath)
 
 
 def plot_kline(
@@ -45,7 +259,9 @@ def plot_kline(
     volumes: Optional[List[float]] = None,
     title: str = "K线图",
     ma_periods: List[int] = [5, 10, 20, 60],
-    filename: Optional[str] = None
+    filename: Optional[str] = None,
+    downsample: bool = True,
+    async_write: bool = False
 ) -> str:
     """
     绘制 K线图（使用 Plotly）
@@ -60,10 +276,23 @@ def plot_kline(
         title: 图表标题
         ma_periods: MA周期列表
         filename: 文件名（可选）
+        downsample: 数据量大时是否对均线做 LTTB 降采样
+        async_write: 是否在后台线程写入文件
 
     Returns:
         HTML 文件路径
     """
+    opens = _as_array(opens)
+    highs = _as_array(highs)
+    lows = _as_array(lows)
+    closes = _as_array(closes)
+    volumes = _as_array(volumes)
+
+    # 均线按收盘价选点降采样，K线保留全部数据
+    line_indices = _downsample_indices(closes, downsample)
+    line_dates = _take(dates, line_indices)
+    scatter = _scatter_cls(len(line_dates))
+
     # 创建子图
     fig = make_subplots(
         rows=2, cols=1,
@@ -91,17 +320,11 @@ def plot_kline(
     # 计算并添加移动平均线
     colors = ["blue", "orange", "purple", "cyan"]
     for i, period in enumerate(ma_periods):
-        ma_values = []
-        for j in range(len(closes)):
-            if j < period - 1:
-                ma_values.append(None)
-            else:
-                ma = sum(closes[j - period + 1:j + 1]) / period
-                ma_values.append(ma)
+        ma_values = _take(_as_array(calculate_ma(closes, period)), line_indices)
 
         fig.add_trace(
-            go.Scatter(
-                x=dates,
+            scatter(
+                x=line_dates,
                 y=ma_values,
                 mode="lines",
                 name=f"MA{period}",
@@ -111,8 +334,8 @@ def plot_kline(
         )
 
     # 成交量
-    if volumes:
-        colors_vol = ["red" if closes[i] >= opens[i] else "green" for i in range(len(closes))]
+    if volumes is not None and len(volumes) > 0:
+        colors_vol = np.where(closes >= opens, "red", "green")
         fig.add_trace(
             go.Bar(
                 x=dates,
@@ -138,9 +361,9 @@ def plot_kline(
 
     # 保存图表
     if filename is None:
-        filename = f"kline_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filename = _default_filename("kline")
 
-    return save_chart(fig, filename)
+    return save_chart(fig, filename, async_write=async_write)
 
 
 def plot_price_trend(
@@ -148,7 +371,9 @@ def plot_price_trend(
     prices: List[float],
     title: str = "价格走势图",
     compare_data: Optional[Dict[str, List[float]]] = None,
-    filename: Optional[str] = None
+    filename: Optional[str] = None,
+    downsample: bool = True,
+    async_write: bool = False
 ) -> str:
     """
     绘制价格走势图
@@ -159,15 +384,23 @@ def plot_price_trend(
         title: 图表标题
         compare_data: 对比数据，格式为 {名称: 价格列表}
         filename: 文件名（可选）
+        downsample: 数据量大时是否做 LTTB 降采样（对比线使用相同的点）
+        async_write: 是否在后台线程写入文件
 
     Returns:
         HTML 文件路径
     """
+    prices = _as_array(prices)
+    indices = _downsample_indices(prices, downsample)
+    dates = _take(dates, indices)
+    prices = _take(prices, indices)
+    scatter = _scatter_cls(len(dates))
+
     fig = go.Figure()
 
     # 主线
     fig.add_trace(
-        go.Scatter(
+        scatter(
             x=dates,
             y=prices,
             mode="lines",
@@ -180,9 +413,9 @@ def plot_price_trend(
     if compare_data:
         for name, data in compare_data.items():
             fig.add_trace(
-                go.Scatter(
+                scatter(
                     x=dates,
-                    y=data,
+                    y=_take(_as_array(data), indices),
                     mode="lines",
                     name=name,
                     line=dict(width=1.5)
@@ -199,16 +432,17 @@ def plot_price_trend(
     )
 
     if filename is None:
-        filename = f"trend_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filename = _default_filename("trend")
 
-    return save_chart(fig, filename)
+    return save_chart(fig, filename, async_write=async_write)
 
 
 def plot_financial_comparison(
     names: List[str],
     metrics: Dict[str, List[float]],
     title: str = "财务指标对比",
-    filename: Optional[str] = None
+    filename: Optional[str] = None,
+    async_write: bool = False
 ) -> str:
     """
     绘制财务指标对比柱状图
@@ -218,6 +452,7 @@ def plot_financial_comparison(
         metrics: 指标数据，格式为 {指标名: [值列表]}
         title: 图表标题
         filename: 文件名（可选）
+        async_write: 是否在后台线程写入文件
 
     Returns:
         HTML 文件路径
@@ -261,9 +496,9 @@ def plot_financial_comparison(
     )
 
     if filename is None:
-        filename = f"comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filename = _default_filename("comparison")
 
-    return save_chart(fig, filename)
+    return save_chart(fig, filename, async_write=async_write)
 
 
 def plot_indicator(
@@ -271,7 +506,9 @@ def plot_indicator(
     values: List[float],
     title: str = "技术指标图",
     signal_positions: Optional[List[Tuple[int, str]]] = None,
-    filename: Optional[str] = None
+    filename: Optional[str] = None,
+    downsample: bool = True,
+    async_write: bool = False
 ) -> str:
     """
     绘制技术指标图
@@ -282,17 +519,24 @@ def plot_indicator(
         title: 图表标题
         signal_positions: 信号位置，格式为 [(索引, 信号类型), ...]
         filename: 文件名（可选）
+        downsample: 数据量大时是否对指标线做 LTTB 降采样（信号点不受影响）
+        async_write: 是否在后台线程写入文件
 
     Returns:
         HTML 文件路径
     """
+    values = _as_array(values)
+    indices = _downsample_indices(values, downsample)
+    line_dates = _take(dates, indices)
+    scatter = _scatter_cls(len(line_dates))
+
     fig = go.Figure()
 
     # 主线
     fig.add_trace(
-        go.Scatter(
-            x=dates,
-            y=values,
+        scatter(
+            x=line_dates,
+            y=_take(values, indices),
             mode="lines",
             name=title,
             line=dict(width=2)
@@ -315,7 +559,7 @@ def plot_indicator(
 
         if buy_x:
             fig.add_trace(
-                go.Scatter(
+                scatter(
                     x=buy_x,
                     y=buy_y,
                     mode="markers",
@@ -326,7 +570,7 @@ def plot_indicator(
 
         if sell_x:
             fig.add_trace(
-                go.Scatter(
+                scatter(
                     x=sell_x,
                     y=sell_y,
                     mode="markers",
@@ -349,9 +593,9 @@ def plot_indicator(
     fig.add_hline(y=30, line_dash="dash", line_color="gray", annotation_text="超卖")
 
     if filename is None:
-        filename = f"indicator_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filename = _default_filename("indicator")
 
-    return save_chart(fig, filename)
+    return save_chart(fig, filename, async_write=async_write)
 
 
 def plot_macd(
@@ -360,7 +604,8 @@ def plot_macd(
     dea: List[float],
     bar: List[float],
     title: str = "MACD指标",
-    filename: Optional[str] = None
+    filename: Optional[str] = None,
+    async_write: bool = False
 ) -> str:
     """
     绘制 MACD 指标图
@@ -372,10 +617,17 @@ def plot_macd(
         bar: BAR 值列表
         title: 图表标题
         filename: 文件名（可选）
+        async_write: 是否在后台线程写入文件
 
     Returns:
         HTML 文件路径
     """
+    scatter = _scatter_cls(len(dates))
+
+    dif = _as_array(dif)
+    dea = _as_array(dea)
+    bar = _as_array(bar)
+
     fig = make_subplots(
         rows=2, cols=1,
         shared_xaxes=True,
@@ -386,7 +638,7 @@ def plot_macd(
 
     # DIF 和 DEA
     fig.add_trace(
-        go.Scatter(
+        scatter(
             x=dates,
             y=dif,
             mode="lines",
@@ -397,7 +649,7 @@ def plot_macd(
     )
 
     fig.add_trace(
-        go.Scatter(
+        scatter(
             x=dates,
             y=dea,
             mode="lines",
@@ -408,7 +660,7 @@ def plot_macd(
     )
 
     # MACD 柱
-    colors = ["red" if v >= 0 else "green" for v in bar]
+    colors = np.where(bar >= 0, "red", "green")
     fig.add_trace(
         go.Bar(
             x=dates,
@@ -432,16 +684,17 @@ def plot_macd(
     fig.update_xaxes(title_text="日期", row=2, col=1)
 
     if filename is None:
-        filename = f"macd_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filename = _default_filename("macd")
 
-    return save_chart(fig, filename)
+    return save_chart(fig, filename, async_write=async_write)
 
 
 def plot_pie_chart(
     labels: List[str],
     values: List[float],
     title: str = "饼图",
-    filename: Optional[str] = None
+    filename: Optional[str] = None,
+    async_write: bool = False
 ) -> str:
     """
     绘制饼图
@@ -451,6 +704,7 @@ def plot_pie_chart(
         values: 值列表
         title: 图表标题
         filename: 文件名（可选）
+        async_write: 是否在后台线程写入文件
 
     Returns:
         HTML 文件路径
@@ -471,15 +725,27 @@ def plot_pie_chart(
     )
 
     if filename is None:
-        filename = f"pie_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filename = _default_filename("pie")
+
+    return save_chart(fig, filename, async_write=async_write)
 
-    return save_chart(fig, filename)
+
+# 图表类型 -> 绘图函数
+_CHART_FUNCTIONS: Dict[str, Callable] = {
+    "kline": plot_kline,
+    "trend": plot_price_trend,
+    "comparison": plot_financial_comparison,
+    "indicator": plot_indicator,
+    "macd": plot_macd,
+    "pie": plot_pie_chart,
+}
 
 
 def generate_chart(
     chart_type: str,
     save_to_file: bool = True,
     filename: Optional[str] = None,
+    async_write: bool = False,
     **kwargs
 ) -> Dict[str, str]:
     """
@@ -489,22 +755,15 @@ def generate_chart(
         chart_type: 图表类型 - kline/trend/comparison/indicator/macd/pie
         save_to_file: 是否保存为文件
         filename: 文件名（可选）
+        async_write: 是否在后台线程写入文件（路径立即返回，可用 wait_chart_writes 等待落盘）
         **kwargs: 图表参数
 
     Returns:
         包含文件路径和信息的字典
     """
     try:
-        chart_functions = {
-            "kline": plot_kline,
-            "trend": plot_price_trend,
-            "comparison": plot_financial_comparison,
-            "indicator": plot_indicator,
-            "macd": plot_macd,
-            "pie": plot_pie_chart,
-        }
-
-        if chart_type not in chart_functions:
+        chart_func = _CHART_FUNCTIONS.get(chart_type)
+        if chart_func is None:
             return {
                 "success": False,
                 "error": f"不支持的图表类型: {chart_type}"
@@ -512,7 +771,7 @@ def generate_chart(
 
         # 如果指定了 filename，传递给绘图函数
         if save_to_file:
-            filepath = chart_functions[chart_type](filename=filename, **kwargs)
+            filepath = chart_func(filename=filename, async_write=async_write, **kwargs)
             return {
                 "success": True,
                 "filepath": filepath,
@@ -521,7 +780,7 @@ def generate_chart(
             }
         else:
             # 不保存文件，返回 figure 对象（用于进一步处理）
-            fig = chart_functions[chart_type](**kwargs)
+            fig = chart_func(**kwargs)
             return {
                 "success": True,
                 "figure": fig,
@@ -6,7 +6,26 @@
 
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Dict, Optional, Union
+
+try:
+    from numba import njit
+except ImportError:  # 可选依赖，未安装时使用 pandas ewm
+    njit = None
+
+
+def _to_optional_list(values: np.ndarray) -> List[Optional[float]]:
+    """
+    将数组转换为列表，NaN 替换为 None
+
+    Args:
+        values: 浮点数组
+
+    Returns:
+        Python 列表，缺失值为 None
+    """
+    return [None if missing else v for v, missing in zip(values.tolist(), np.isnan(values).tolist())]
 
 
 def calculate_ma(prices: List[float], period: int) -> List[Optional[float]]:
@@ -20,46 +39,97 @@ def calculate_ma(prices: List[float], period: int) -> List[Optional[float]]:
     Returns:
         MA 值列表，前面不足周期部分为 None
     """
-    ma_values = []
-    for i in range(len(prices)):
-        if i < period - 1:
-            ma_values.append(None)
-        else:
-            ma = sum(prices[i - period + 1:i + 1]) / period
-            ma_values.append(ma)
-    return ma_values
+    values = np.asarray(prices, dtype=np.float64)
+    ma_values = np.full(values.shape, np.nan)
 
+    if len(values) >= period:
+        # 前缀和相减得到每个窗口的和，一次完成所有窗口
+        cumsum = np.cumsum(values)
+        window_sums = cumsum[period - 1:] - np.concatenate(([0.0], cumsum[:-period]))
+        ma_values[period - 1:] = window_sums / period
 
-def calculate_ema(prices: List[float], period: int) -> List[float]:
+    return _to_optional_list(ma_values)
+
+
+def _ewm_loop(values: np.ndarray, alpha: float) -> np.ndarray:
     """
-    计算指数移动平均线 (EMA)
+    指数平滑递推：out[i] = out[i-1] + alpha * (values[i] - out[i-1])
+
+    安装了 numba 时编译为本地代码执行
 
     Args:
-        prices: 价格列表
+        values: 浮点数组
+        alpha: 平滑系数
+
+    Returns:
+        平滑后的数组，首项等于 values[0]
+    """
+    out = np.empty_like(values)
+    if values.size > 0:
+        out[0] = values[0]
+    for i in range(1, values.size):
+        out[i] = out[i - 1] + alpha * (values[i] - out[i - 1])
+    return out
+
+
+if njit is not None:
+    _ewm_loop = njit(cache=True)(_ewm_loop)
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    指数平滑（等价于 pandas ewm(alpha=alpha, adjust=False)）
+
+    Args:
+        values: 浮点数组
+        alpha: 平滑系数
+
+    Returns:
+        平滑后的数组
+    """
+    if njit is not None:
+        return _ewm_loop(np.ascontiguousarray(values, dtype=np.float64), alpha)
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def _ema_array(prices: Union[List[float], np.ndarray], period: int) -> np.ndarray:
+    """
+    计算 EMA 数组
+
+    前 period-1 个值保持原价格，第 period 个值为前 period 个价格的 SMA，
+    之后按 EMA 递推公式计算
+
+    Args:
+        prices: 价格序列
         period: 周期
 
     Returns:
-        EMA 值列表
+        EMA 数组，长度与 prices 相同
     """
-    ema_values = []
-    multiplier = 2 / (period + 1)
+    values = np.asarray(prices, dtype=np.float64)
+    if len(values) < period:
+        return values.copy()
 
-    # 第一个 EMA 使用 SMA
-    if len(prices) >= period:
-        first_ema = sum(prices[:period]) / period
-        for i in range(period - 1):
-            ema_values.append(prices[i])
-    else:
-        return prices.copy()
+    # 以 SMA 作为递推起点，adjust=False 即 ema = (price - ema) * 2/(period+1) + ema
+    seeded = values[period - 1:].copy()
+    seeded[0] = values[:period].mean()
+    ema = _ewm(seeded, 2 / (period + 1))
 
-    ema_values.append(first_ema)
+    return np.concatenate((values[:period - 1], ema))
 
-    # 后续 EMA
-    for i in range(period, len(prices)):
-        ema = (prices[i] - ema_values[-1]) * multiplier + ema_values[-1]
-        ema_values.append(ema)
 
-    return ema_values
+def calculate_ema(prices: List[float], period: int) -> List[float]:
+    """
+    计算指数移动平均线 (EMA)
+
+    Args:
+        prices: 价格列表
+        period: 周期
+
+    Returns:
+        EMA 值列表
+    """
+    return _ema_array(prices, period).tolist()
 
 
 def calculate_macd(
@@ -81,22 +151,22 @@ def calculate_macd(
         包含 dif, dea, bar 的字典
     """
     # 计算 EMA
-    ema_fast = calculate_ema(prices, fast_period)
-    ema_slow = calculate_ema(prices, slow_period)
+    ema_fast = _ema_array(prices, fast_period)
+    ema_slow = _ema_array(prices, slow_period)
 
     # 计算 DIF
-    dif = [ema_fast[i] - ema_slow[i] for i in range(len(prices))]
+    dif = ema_fast - ema_slow
 
     # 计算 DEA (DIF 的 EMA)
-    dea = calculate_ema(dif, signal_period)
+    dea = _ema_array(dif, signal_period)
 
     # 计算 MACD 柱
-    bar = [(dif[i] - dea[i]) * 2 for i in range(len(prices))]
+    bar = (dif - dea) * 2
 
     return {
-        "dif": dif,
-        "dea": dea,
-        "bar": bar
+        "dif": dif.tolist(),
+        "dea": dea.tolist(),
+        "bar": bar.tolist()
     }
 
 
@@ -111,34 +181,24 @@ def calculate_rsi(prices: List[float], period: int = 14) -> List[Optional[float]
     Returns:
         RSI 值列表，前面不足周期部分为 None
     """
-    rsi_values = []
-
-    # 计算价格变化
-    deltas = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
-
-    for i in range(len(deltas)):
-        if i < period:
-            rsi_values.append(None)
-        else:
-            # 计算涨幅和跌幅
-            gains = [max(d, 0) for d in deltas[i - period + 1:i + 1]]
-            losses = [abs(min(d, 0)) for d in deltas[i - period + 1:i + 1]]
-
-            avg_gain = sum(gains) / period
-            avg_loss = sum(losses) / period
+    values = np.asarray(prices, dtype=np.float64)
+    rsi_values = np.full(len(values), np.nan)
 
-            if avg_loss == 0:
-                rsi = 100
-            else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
+    # 计算价格变化，拆分为涨幅和跌幅
+    deltas = np.diff(values)
+    gains = np.clip(deltas, 0, None)
+    losses = np.clip(-deltas, 0, None)
 
-            rsi_values.append(rsi)
+    if len(deltas) > period:
+        # 每个窗口的平均涨跌幅：第 i 个窗口为 deltas[i-period+1:i+1]
+        avg_gain = sliding_window_view(gains, period).mean(axis=1)[1:]
+        avg_loss = sliding_window_view(losses, period).mean(axis=1)[1:]
 
-    # 在前面补一个 None 以保持长度一致
-    rsi_values.insert(0, None)
+        rs = np.divide(avg_gain, avg_loss, out=np.zeros_like(avg_gain), where=avg_loss != 0)
+        # 前 period 个变化量及首个价格没有 RSI
+        rsi_values[period + 1:] = np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + rs)))
 
-    return rsi_values
+    return _to_optional_list(rsi_values)
 
 
 def calculate_bollinger_bands(
@@ -157,26 +217,20 @@ def calculate_bollinger_bands(
     Returns:
         包含 upper, middle, lower 的字典
     """
-    middle = calculate_ma(prices, period)
-    upper = []
-    lower = []
-
-    for i in range(len(prices)):
-        if i < period - 1:
-            upper.append(None)
-            lower.append(None)
-        else:
-            # 计算标准差
-            window = prices[i - period + 1:i + 1]
-            std = np.std(window)
-
-            upper.append(middle[i] + std_dev * std)
-            lower.append(middle[i] - std_dev * std)
+    values = np.asarray(prices, dtype=np.float64)
+    middle = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+
+    if len(values) >= period:
+        # 所有窗口一次性计算均值和总体标准差
+        windows = sliding_window_view(values, period)
+        middle[period - 1:] = windows.mean(axis=1)
+        std[period - 1:] = windows.std(axis=1)
 
     return {
-        "upper": upper,
-        "middle": middle,
-        "lower": lower
+        "upper": _to_optional_list(middle + std_dev * std),
+        "middle": _to_optional_list(middle),
+        "lower": _to_optional_list(middle - std_dev * std)
     }
 
 
@@ -202,42 +256,39 @@ def calculate_kdj(
     Returns:
         包含 k, d, j 的字典
     """
-    k_values = [50]  # 初始值
-    d_values = [50]  # 初始值
-    j_values = [50]  # 初始值
-
-    for i in range(n, len(closes)):
-        # 计算 RSV
-        high_n = max(highs[i - n + 1:i + 1])
-        low_n = min(lows[i - n + 1:i + 1])
-
-        if high_n == low_n:
-            rsv = 50
-        else:
-            rsv = (closes[i] - low_n) / (high_n - low_n) * 100
-
-        # 计算 K
-        k = (2 / 3) * k_values[-1] + (1 / 3) * rsv
-        k_values.append(k)
-
-        # 计算 D
-        d = (2 / 3) * d_values[-1] + (1 / 3) * k
-        d_values.append(d)
-
-        # 计算 J
-        j = 3 * k - 2 * d
-        j_values.append(j)
-
-    # 在前面补 None 以保持长度一致
-    for _ in range(n):
-        k_values.insert(0, None)
-        d_values.insert(0, None)
-        j_values.insert(0, None)
+    high_values = np.asarray(highs, dtype=np.float64)
+    low_values = np.asarray(lows, dtype=np.float64)
+    close_values = np.asarray(closes, dtype=np.float64)
+
+    k_values = np.full(len(close_values), np.nan)
+    d_values = np.full(len(close_values), np.nan)
+    j_values = np.full(len(close_values), np.nan)
+
+    if len(close_values) >= n:
+        # n 日最高价、最低价（滚动窗口）
+        high_n = pd.Series(high_values).rolling(n).max().to_numpy()[n:]
+        low_n = pd.Series(low_values).rolling(n).min().to_numpy()[n:]
+        spread = high_n - low_n
+
+        # 计算 RSV，最高价等于最低价时取 50
+        rsv = np.divide(
+            (close_values[n:] - low_n) * 100, spread,
+            out=np.full_like(spread, 50.0), where=spread != 0
+        )
+
+        # K、D 以 50 为初始值平滑：K = (1 - 1/m1) * K前值 + (1/m1) * RSV
+        k = _ewm(np.concatenate(([50.0], rsv)), 1 / m1)
+        d = _ewm(k, 1 / m2)
+
+        # 初始值位于第 n 个交易日，与价格序列对齐
+        k_values[n - 1:] = k
+        d_values[n - 1:] = d
+        j_values[n - 1:] = 3 * k - 2 * d
 
     return {
-        "k": k_values,
-        "d": d_values,
-        "j": j_values
+        "k": _to_optional_list(k_values),
+        "d": _to_optional_list(d_values),
+        "j": _to_optional_list(j_values)
     }
 
 
@@ -254,23 +305,21 @@ def atr(prices: List[float], highs: List[float], lows: List[float], period: int
     Returns:
         ATR 值列表
     """
-    tr_values = []
-
-    for i in range(len(prices)):
-        if i == 0:
-            tr = highs[i] - lows[i]
-        else:
-            hl = highs[i] - lows[i]
-            hc = abs(highs[i] - prices[i - 1])
-            lc = abs(lows[i] - prices[i - 1])
-            tr = max(hl, hc, lc)
-
-        tr_values.append(tr)
+    close_values = np.asarray(prices, dtype=np.float64)
+    high_values = np.asarray(highs, dtype=np.float64)
+    low_values = np.asarray(lows, dtype=np.float64)
+
+    # 真实波幅：首日为最高价减最低价，之后取三者最大值
+    tr_values = high_values - low_values
+    prev_close = close_values[:-1]
+    tr_values[1:] = np.maximum.reduce([
+        tr_values[1:],
+        np.abs(high_values[1:] - prev_close),
+        np.abs(low_values[1:] - prev_close),
+    ])
 
     # 计算 ATR (使用 EMA)
-    atr_values = calculate_ema(tr_values, period)
-
-    return atr_values
+    return _ema_array(tr_values, period).tolist()
 
 
 def calculate_volume_ma(volumes: List[float], period: int = 5) -> List[Optional[float]]:
@@ -298,14 +347,15 @@ def obv(prices: List[float], volumes: List[float]) -> List[float]:
     Returns:
         OBV 值列表
     """
-    obv_values = [volumes[0]]
-
-    for i in range(1, len(prices)):
-        if prices[i] > prices[i - 1]:
-            obv_values.append(obv_values[-1] + volumes[i])
-        elif prices[i] < prices[i - 1]:
-            obv_values.append(obv_values[-1] - volumes[i])
-        else:
-            obv_values.append(obv_values[-1])
-
-    return obv_values
+    price_values = np.asarray(prices, dtype=np.float64)
+    volume_values = np.asarray(volumes, dtype=np.float64)[:len(price_values)]
+    if len(volume_values) == 0:
+        return []
+
+    # 上涨加成交量、下跌减成交量、持平不变，累加得到 OBV
+    signs = np.sign(np.diff(price_values))
+    obv_values = np.empty_like(volume_values)
+    obv_values[0] = volume_values[0]
+    obv_values[1:] = volume_values[0] + np.cumsum(signs * volume_values[1:])
+
+    return obv_values.tolist()
@@ -4,6 +4,6 @@
 提供内存和磁盘双层缓存，支持不同数据类型的 TTL 策略
 """
 
-from .manager import CacheManager
+from .manager import CacheManager, cached, get_cache_manager, singleflight
 
-__all__ = ["CacheManager"]
+__all__ = ["CacheManager", "cached", "get_cache_manager", "singleflight"]
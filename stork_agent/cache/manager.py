@@ -3,18 +3,98 @@
 
 提供内存和磁盘双层缓存，支持不同数据类型的 TTL 策略
 - JSON 缓存：用于简单数据，可读性好
-- Pickle 缓存：用于复杂数据（如 DataFrame），支持 Python 对象
+- Pickle 缓存：用于复杂数据（如 DataFrame），支持 Python 对象，gzip 压缩存储
 """
 
 import os
+import gzip
 import json
 import pickle
+import tempfile
 import hashlib
-from typing import Any, Optional
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import IO, Any, Callable, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 
 from stork_agent.config import Config
+from stork_agent.utils.helpers import json_default, nan_to_none
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:  # 可选依赖，未安装时使用标准库 blake2b
+    xxhash = None
+
+# 可直接拼接为规范键串的标量类型
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _hash_key(param_bytes: bytes) -> str:
+    """
+    计算参数串的短哈希
+
+    安装了 xxhash 时使用 xxh3_64，否则使用标准库 blake2b
+
+    Args:
+        param_bytes: 规范化后的参数串（UTF-8 字节）
+
+    Returns:
+        12 位十六进制哈希
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(param_bytes)[:12]
+    return hashlib.blake2b(param_bytes, digest_size=6).hexdigest()
+
+
+def _dumps_json(value: Any) -> bytes:
+    """
+    编码 JSON 缓存内容
+
+    安装了 orjson 时使用 orjson 直接编码为字节，否则使用标准库 json；
+    两种方式与 write_json 使用相同的兜底编码，NaN 和无穷大都写为 null
+
+    Args:
+        value: 缓存值
+
+    Returns:
+        UTF-8 编码的 JSON 字节
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            value,
+            default=json_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(
+        nan_to_none(value),
+        ensure_ascii=False,
+        separators=(",", ":"),
+        allow_nan=False,
+        default=lambda item: nan_to_none(json_default(item))
+    ).encode("utf-8")
+
+
+def _loads_json(content: bytes) -> Any:
+    """
+    解码 JSON 缓存内容
+
+    Args:
+        content: JSON 字节
+
+    Returns:
+        缓存值
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
 
 
 class CacheManager:
@@ -26,6 +106,16 @@ class CacheManager:
     TTL_SCREENING = 3600        # 筛选结果：1小时
     TTL_STATIC = 604800         # 静态数据：7天
 
+    # Pickle 缓存的 gzip 压缩级别（低级别压缩已能显著缩小 DataFrame，且速度快）
+    PICKLE_COMPRESS_LEVEL = 3
+    GZIP_MAGIC = b"\x1f\x8b"
+
+    # 写缓存文件的缓冲区大小，大 DataFrame 流式写入时减少 write 调用
+    WRITE_BUFFER_SIZE = 1 << 20
+
+    # 内存层最多保留的缓存条目数
+    MEMORY_CACHE_SIZE = 256
+
     def __init__(self, cache_dir: Optional[str] = None):
         """
         初始化缓存管理器
@@ -44,6 +134,10 @@ class CacheManager:
         self.json_dir.mkdir(parents=True, exist_ok=True)
         self.pickle_dir.mkdir(parents=True, exist_ok=True)
 
+        # 内存层：文件路径 -> (文件修改时间, 缓存值)，按 LRU 淘汰
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+
     def _generate_key(self, prefix: str, params: dict) -> str:
         """
         生成缓存键
@@ -55,10 +149,14 @@ class CacheManager:
         Returns:
             缓存键
         """
-        # 将参数排序后生成哈希
-        param_str = json.dumps(params, sort_keys=True)
-        param_hash = hashlib.md5(param_str.encode()).hexdigest()[:12]
-        return f"{prefix}_{param_hash}"
+        # 将参数排序后生成哈希；扁平参数直接拼接，嵌套参数走 JSON 编码
+        if all(isinstance(v, _SCALAR_TYPES) for v in params.values()):
+            param_bytes = "|".join(f"{k}={v!r}" for k, v in sorted(params.items())).encode()
+        elif orjson is not None:
+            param_bytes = orjson.dumps(params, option=orjson.OPT_SORT_KEYS)
+        else:
+            param_bytes = json.dumps(params, sort_keys=True).encode()
+        return f"{prefix}_{_hash_key(param_bytes)}"
 
     def _get_cache_path(self, key: str, use_pickle: bool = False) -> Path:
         """
@@ -108,9 +206,8 @@ class CacheManager:
         if json_path.exists():
             if ttl is None or not self._is_expired(json_path, ttl):
                 try:
-                    with open(json_path, "r", encoding="utf-8") as f:
-                        return json.load(f)
-                except (json.JSONDecodeError, IOError):
+                    return self._load(json_path, self._read_json)
+                except (ValueError, IOError):
                     pass
 
         # 尝试 Pickle 缓存
@@ -118,13 +215,86 @@ class CacheManager:
         if pickle_path.exists():
             if ttl is None or not self._is_expired(pickle_path, ttl):
                 try:
-                    with open(pickle_path, "rb") as f:
-                        return pickle.load(f)
-                except (pickle.PickleError, IOError):
+                    return self._load(pickle_path, self._read_pickle)
+                except (pickle.PickleError, IOError, EOFError):
                     pass
 
         return None
 
+    def _load(self, filepath: Path, reader: Callable[[Path], Any]) -> Any:
+        """
+        读取缓存文件，优先使用内存层
+
+        内存层以文件修改时间校验，文件被重写（包括其他进程写入）后自动失效。
+        返回的对象在多次读取间共享，调用方不应原地修改
+
+        Args:
+            filepath: 缓存文件路径
+            reader: 从磁盘读取并解码文件的函数
+
+        Returns:
+            缓存数据
+        """
+        path_key = str(filepath)
+        mtime = filepath.stat().st_mtime
+
+        with self._memory_lock:
+            entry = self._memory.get(path_key)
+            if entry is not None and entry[0] == mtime:
+                self._memory.move_to_end(path_key)
+                return entry[1]
+
+        value = reader(filepath)
+
+        with self._memory_lock:
+            self._memory[path_key] = (mtime, value)
+            self._memory.move_to_end(path_key)
+            while len(self._memory) > self.MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+
+        return value
+
+    def _forget(self, key: str) -> None:
+        """
+        从内存层移除缓存键对应的条目
+
+        Args:
+            key: 缓存键
+        """
+        with self._memory_lock:
+            for use_pickle in (False, True):
+                self._memory.pop(str(self._get_cache_path(key, use_pickle)), None)
+
+    def _read_json(self, filepath: Path) -> Any:
+        """
+        从磁盘读取 JSON 缓存
+
+        Args:
+            filepath: 缓存文件路径
+
+        Returns:
+            缓存数据
+        """
+        with open(filepath, "rb") as f:
+            return _loads_json(f.read())
+
+    def _read_pickle(self, filepath: Path) -> Any:
+        """
+        从磁盘读取 Pickle 缓存
+
+        Args:
+            filepath: 缓存文件路径
+
+        Returns:
+            缓存数据
+        """
+        with open(filepath, "rb") as f:
+            content = f.read()
+        # 兼容未压缩的旧缓存文件
+        if content[:2] == self.GZIP_MAGIC:
+            content = gzip.decompress(content)
+        return pickle.loads(content)
+
     def set(self, key: str, value: Any, use_pickle: bool = False, ttl: Optional[int] = None) -> None:
         """
         设置缓存
@@ -136,18 +306,47 @@ class CacheManager:
             ttl: 生存时间（秒），仅用于元数据记录
         """
         filepath = self._get_cache_path(key, use_pickle)
+        self._forget(key)
 
         try:
             if use_pickle:
-                with open(filepath, "wb") as f:
-                    pickle.dump(value, f)
+                def write(f: IO[bytes]) -> None:
+                    # 边序列化边压缩写入，不在内存中保留完整的 pickle 字节
+                    with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=self.PICKLE_COMPRESS_LEVEL) as gz:
+                        pickle.dump(value, gz, protocol=pickle.HIGHEST_PROTOCOL)
             else:
-                with open(filepath, "w", encoding="utf-8") as f:
-                    json.dump(value, f, ensure_ascii=False, indent=2)
-        except (IOError, pickle.PickleError) as e:
+                content = _dumps_json(value)
+
+                def write(f: IO[bytes]) -> None:
+                    f.write(content)
+
+            self._write_atomic(filepath, write)
+        except (IOError, TypeError, ValueError, AttributeError, pickle.PickleError) as e:
             # 缓存失败不影响主流程
             print(f"Warning: Failed to write cache: {e}")
 
+    def _write_atomic(self, filepath: Path, write: Callable[[IO[bytes]], None]) -> None:
+        """
+        原子写入文件
+
+        先写入同目录下的临时文件再替换目标文件，并发读取时不会读到写了一半的缓存
+
+        Args:
+            filepath: 目标文件路径
+            write: 向已打开的二进制文件写入内容的函数
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f"{filepath.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb", buffering=self.WRITE_BUFFER_SIZE) as f:
+                write(f)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
     def delete(self, key: str) -> None:
         """
         删除缓存
@@ -157,6 +356,7 @@ class CacheManager:
         """
         json_path = self._get_cache_path(key, use_pickle=False)
         pickle_path = self._get_cache_path(key, use_pickle=True)
+        self._forget(key)
 
         for path in [json_path, pickle_path]:
             if path.exists():
@@ -176,18 +376,22 @@ class CacheManager:
             清理的文件数量
         """
         count = 0
-        cutoff = datetime.now() - timedelta(days=older_than_days)
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).timestamp()
 
         for directory in [self.json_dir, self.pickle_dir]:
-            for filepath in directory.iterdir():
-                if filepath.is_file():
-                    mtime = datetime.fromtimestamp(filepath.stat().st_mtime)
-                    if mtime < cutoff:
-                        try:
-                            filepath.unlink()
+            # scandir 一次读取目录项，文件类型判断无需逐个 stat
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    try:
+                        if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                            os.unlink(entry.path)
                             count += 1
-                        except IOError:
-                            pass
+                            with self._memory_lock:
+                                self._memory.pop(entry.path, None)
+                    except OSError:
+                        pass
 
         return count
 
@@ -236,3 +440,90 @@ def get_cache_manager() -> CacheManager:
     if _cache_manager is None:
         _cache_manager = CacheManager()
     return _cache_manager
+
+
+# 正在执行中的请求：缓存键 -> Future
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def singleflight(key: str, func: Callable[[], Any]) -> Any:
+    """
+    合并同一键的并发调用
+
+    第一个调用者执行 func，执行期间到达的相同键调用等待并共享其结果
+    （或异常），执行结束后该键即被释放，下一次调用会重新执行。
+
+    Args:
+        key: 请求键
+        func: 实际执行的无参函数
+
+    Returns:
+        func 的返回值
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+
+    if not leader:
+        return future.result()
+
+    try:
+        result = func()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def cached(prefix: str, ttl: int, use_pickle: bool = False) -> Callable:
+    """
+    函数结果缓存装饰器
+
+    以函数参数生成缓存键，缓存未过期时直接返回磁盘上的结果，
+    否则调用原函数并写入缓存。缓存未命中时同一键的并发调用会合并为一次，
+    异常不会被缓存。
+
+    Args:
+        prefix: 缓存键前缀
+        ttl: 生存时间（秒）
+        use_pickle: 是否使用 pickle 格式（DataFrame、日期等非 JSON 数据）
+
+    Returns:
+        装饰器
+
+    Example:
+        >>> @cached("realtime", CacheManager.TTL_REALTIME)
+        ... def get_realtime_quote(code: str) -> dict: ...
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not Config.CACHE_ENABLED:
+                return func(*args, **kwargs)
+
+            cache = get_cache_manager()
+            key = cache._generate_key(prefix, {"args": list(args), "kwargs": kwargs})
+            value = cache.get(key, ttl)
+            if value is not None:
+                return value
+
+            def load():
+                result = func(*args, **kwargs)
+                cache.set(key, result, use_pickle=use_pickle, ttl=ttl)
+                return result
+
+            # 缓存未命中时，并发的相同请求只回源一次
+            return singleflight(key, load)
+
+        return wrapper
+
+    return decorator
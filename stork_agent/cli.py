@@ -5,7 +5,6 @@ CLI 入口模块
 """
 
 import click
-import json
 from stork_agent.agent.tools import (
     get_stock_realtime,
     get_stock_history,
@@ -22,6 +21,7 @@ from stork_agent.utils.helpers import (
     format_percentage,
     format_market_cap,
     format_volume,
+    write_json,
 )
 
 
@@ -86,26 +86,28 @@ def history(code: str, period: str, days: int, output: str):
 
     if result.success:
         data = result.data
-        click.echo(f"\n{data['name']} ({data['code']}) - {period} K线数据")
-        click.echo(f"共 {data['count']} 条数据\n")
-
-        # 显示最近10条
-        click.echo(f"{'日期':<12}{'开盘':<10}{'最高':<10}{'最低':<10}{'收盘':<10}{'成交量':<12}")
-        click.echo("-" * 70)
-        for bar in data["data"][-10:]:
-            click.echo(
-                f"{bar['date']:<12}"
-                f"{bar['open']:<10.2f}"
-                f"{bar['high']:<10.2f}"
-                f"{bar['low']:<10.2f}"
-                f"{bar['close']:<10.2f}"
-                f"{format_volume(bar['volume']):<12}"
-            )
+        # 先拼接完整输出再一次写出，避免逐行刷新终端
+        lines = [
+            f"\n{data['name']} ({data['code']}) - {period} K线数据",
+            f"共 {data['count']} 条数据\n",
+            # 显示最近10条
+            f"{'日期':<12}{'开盘':<10}{'最高':<10}{'最低':<10}{'收盘':<10}{'成交量':<12}",
+            "-" * 70,
+        ]
+        lines.extend(
+            f"{bar['date']:<12}"
+            f"{bar['open']:<10.2f}"
+            f"{bar['high']:<10.2f}"
+            f"{bar['low']:<10.2f}"
+            f"{bar['close']:<10.2f}"
+            f"{format_volume(bar['volume']):<12}"
+            for bar in data["data"][-10:]
+        )
+        click.echo("\n".join(lines))
 
         # 保存到文件
         if output:
-            with open(output, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            write_json(output, data)
             click.echo(f"\n数据已保存到: {output}")
     else:
         click.echo(f"获取失败: {result.error}", err=True)
@@ -120,7 +122,7 @@ def history(code: str, period: str, days: int, output: str):
 @click.option("--market-cap-max", type=float, help="最大市值(亿元)")
 @click.option("--change-min", type=float, help="最小涨跌幅(%)")
 @click.option("--change-max", type=float, help="最大涨跌幅(%)")
-@click.option("--limit", default=20, help="返回数量限制")
+@click.option("--limit", default=20, help="返回数量限制（结果按代码升序，取前 N 只）")
 def screen(pe_min, pe_max, pb_min, pb_max, market_cap_min, market_cap_max,
            change_min, change_max, limit):
     """选股筛选
@@ -145,20 +147,21 @@ def screen(pe_min, pe_max, pb_min, pb_max, market_cap_min, market_cap_max,
 
     if result.success:
         data = result.data
-        click.echo(f"\n筛选结果: 共找到 {data['total']} 只股票\n")
-
-        click.echo(f"{'代码':<10}{'名称':<12}{'价格':<10}{'涨跌幅':<10}{'PE':<8}{'市值(亿)':<12}")
-        click.echo("-" * 70)
-
-        for stock in data["stocks"]:
-            click.echo(
-                f"{stock['code']:<10}"
-                f"{stock['name']:<12}"
-                f"{format_number(stock['price']):<10}"
-                f"{format_percentage(stock['change_pct']):<10}"
-                f"{format_number(stock['pe_ratio']) if stock['pe_ratio'] else 'N/A':<8}"
-                f"{format_number(stock['market_cap']) if stock['market_cap'] else 'N/A':<12}"
-            )
+        lines = [
+            f"\n筛选结果: 共找到 {data['total']} 只股票\n",
+            f"{'代码':<10}{'名称':<12}{'价格':<10}{'涨跌幅':<10}{'PE':<8}{'市值(亿)':<12}",
+            "-" * 70,
+        ]
+        lines.extend(
+            f"{stock['code']:<10}"
+            f"{stock['name']:<12}"
+            f"{format_number(stock['price']):<10}"
+            f"{format_percentage(stock['change_pct']):<10}"
+            f"{format_number(stock['pe_ratio']) if stock['pe_ratio'] else 'N/A':<8}"
+            f"{format_number(stock['market_cap']) if stock['market_cap'] else 'N/A':<12}"
+            for stock in data["stocks"]
+        )
+        click.echo("\n".join(lines))
     else:
         click.echo(f"筛选失败: {result.error}", err=True)
 
@@ -178,14 +181,15 @@ def compare(codes: str, days: int):
 
     if result.success:
         data = result.data
-        click.echo(f"\n股票对比报告 ({days}天)\n")
-
-        click.echo(f"{'代码':<10}{'名称':<12}{'价格':<10}{'涨跌幅':<10}{'期间涨跌':<12}{'PE':<8}{'ROE':<8}")
-        click.echo("-" * 80)
+        lines = [
+            f"\n股票对比报告 ({days}天)\n",
+            f"{'代码':<10}{'名称':<12}{'价格':<10}{'涨跌幅':<10}{'期间涨跌':<12}{'PE':<8}{'ROE':<8}",
+            "-" * 80,
+        ]
 
         for stock in data["stocks"]:
             period_change = stock.get("period_change_pct")
-            click.echo(
+            lines.append(
                 f"{stock['code']:<10}"
                 f"{stock['name']:<12}"
                 f"{format_number(stock['price']):<10}"
@@ -194,6 +198,7 @@ def compare(codes: str, days: int):
                 f"{format_number(stock['pe_ratio']) if stock['pe_ratio'] else 'N/A':<8}"
                 f"{format_number(stock['roe']) if stock['roe'] else 'N/A':<8}"
             )
+        click.echo("\n".join(lines))
     else:
         click.echo(f"对比失败: {result.error}", err=True)
 
@@ -246,23 +251,27 @@ def indicator(code: str, indicator: str, period: int):
 
     if result.success:
         data = result.data
-        click.echo(f"\n{data['name']} ({data['code']}) - {data['indicator']}")
-        click.echo(f"{data['description']}\n")
+        lines = [
+            f"\n{data['name']} ({data['code']}) - {data['indicator']}",
+            f"{data['description']}\n",
+        ]
 
         # 显示最近10条数据
         if isinstance(data["data"], list) and len(data["data"]) > 0:
             # 获取数据键
-            keys = list(data["data"][0].keys())
-            header = "  ".join(f"{k:<12}" for k in keys if k != "date")
-            click.echo(f"{'日期':<12}{header}")
-            click.echo("-" * 60)
+            keys = [k for k in data["data"][0].keys() if k != "date"]
+            header = "  ".join(f"{k:<12}" for k in keys)
+            lines.append(f"{'日期':<12}{header}")
+            lines.append("-" * 60)
 
             for item in data["data"][-10:]:
                 values = "  ".join(
                     f"{format_number(item[k]) if isinstance(item[k], (int, float)) else str(item[k]):<12}"
-                    for k in keys if k != "date"
+                    for k in keys
                 )
-                click.echo(f"{item['date']:<12}{values}")
+                lines.append(f"{item['date']:<12}{values}")
+
+        click.echo("\n".join(lines))
     else:
         click.echo(f"计算失败: {result.error}", err=True)
 
@@ -280,13 +289,13 @@ def search(keyword: str):
 
     if result.success:
         data = result.data
-        click.echo(f"\n搜索结果 (关键词: {keyword})\n")
-
-        click.echo(f"{'代码':<10}{'名称':<12}")
-        click.echo("-" * 25)
-
-        for stock in data["stocks"]:
-            click.echo(f"{stock['code']:<10}{stock['name']:<12}")
+        lines = [
+            f"\n搜索结果 (关键词: {keyword})\n",
+            f"{'代码':<10}{'名称':<12}",
+            "-" * 25,
+        ]
+        lines.extend(f"{stock['code']:<10}{stock['name']:<12}" for stock in data["stocks"])
+        click.echo("\n".join(lines))
     else:
         click.echo(f"搜索失败: {result.error}", err=True)
 
@@ -303,23 +312,23 @@ def summary():
 
     if result.success:
         data = result.data
-        click.echo(f"\n{'='*50}")
-        click.echo("市场概览")
-        click.echo(f"{'='*50}\n")
-
-        click.echo("主要指数:")
-        click.echo(f"{'代码':<12}{'名称':<12}{'点位':<12}{'涨跌幅':<10}")
-        click.echo("-" * 50)
-
-        for idx in data.get("indices", []):
-            click.echo(
-                f"{idx['code']:<12}"
-                f"{idx['name']:<12}"
-                f"{format_number(idx['price']):<12}"
-                f"{format_percentage(idx['change_pct']):<10}"
-            )
-
-        click.echo(f"\n市场总股票数: {data.get('total_stocks', 0)}")
+        lines = [
+            f"\n{'='*50}",
+            "市场概览",
+            f"{'='*50}\n",
+            "主要指数:",
+            f"{'代码':<12}{'名称':<12}{'点位':<12}{'涨跌幅':<10}",
+            "-" * 50,
+        ]
+        lines.extend(
+            f"{idx['code']:<12}"
+            f"{idx['name']:<12}"
+            f"{format_number(idx['price']):<12}"
+            f"{format_percentage(idx['change_pct']):<10}"
+            for idx in data.get("indices", [])
+        )
+        lines.append(f"\n市场总股票数: {data.get('total_stocks', 0)}")
+        click.echo("\n".join(lines))
     else:
         click.echo(f"获取失败: {result.error}", err=True)
 
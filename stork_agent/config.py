@@ -10,6 +10,20 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _getenv_int(name: str) -> Optional[int]:
+    """
+    读取可选的整数环境变量
+
+    Args:
+        name: 环境变量名
+
+    Returns:
+        整数值，未设置或为空时为 None
+    """
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
 class Config:
     """应用配置"""
 
@@ -36,12 +50,14 @@ class Config:
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
     # MCP 服务器配置
-    MCP_SERVER_PORT: Optional[int] = int(os.getenv("MCP_SERVER_PORT")) if os.getenv("MCP_SERVER_PORT") else None
+    MCP_SERVER_PORT: Optional[int] = _getenv_int("MCP_SERVER_PORT")
     MCP_SERVER_HOST: str = os.getenv("MCP_SERVER_HOST", "localhost")
 
     # 会话配置
     SESSION_TIMEOUT: int = int(os.getenv("SESSION_TIMEOUT", "1800"))  # 30分钟
     DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "memory").lower()  # memory, redis
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
     @classmethod
     def setup(cls):
@@ -5,16 +5,57 @@
 """
 
 import akshare as ak
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 from stork_agent.data.query import (
-    get_realtime_quote,
     get_financial_data,
     get_history_kline,
+    batch_get_realtime,
     normalize_stock_code,
 )
 
 
+# 对比时逐只请求财务和历史数据的最大并发数
+MAX_COMPARE_WORKERS = 8
+
+
+def _fetch_all(fetch: Callable[[str], Optional[Dict]], codes: List[str]) -> List[Dict]:
+    """
+    并发地为每只股票获取数据
+
+    Args:
+        fetch: 获取单只股票数据的函数，失败时返回 None
+        codes: 股票代码列表
+
+    Returns:
+        按输入顺序排列的结果列表（跳过返回 None 的股票）
+    """
+    # 数据按股票逐只请求，限制并发数避免压垮数据源
+    workers = max(1, min(MAX_COMPARE_WORKERS, len(codes)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fetch, codes))
+    return [result for result in results if result is not None]
+
+
+def _valid_values(stocks: List[Dict], key: str) -> np.ndarray:
+    """
+    取出各股票某个字段的有效值
+
+    Args:
+        stocks: 股票数据列表
+        key: 字段名
+
+    Returns:
+        float64 数组，已去掉 None、0 和 NaN
+    """
+    values = np.fromiter(
+        (stock[key] or np.nan for stock in stocks), dtype=np.float64, count=len(stocks)
+    )
+    return values[~np.isnan(values)]
+
+
 def compare_stocks(codes: List[str], days: int = 30) -> Dict:
     """
     对比多只股票的基本面和价格表现
@@ -27,62 +68,66 @@ def compare_stocks(codes: List[str], days: int = 30) -> Dict:
         对比结果字典
     """
     try:
-        stocks_data = []
+        # 实时行情只取一次全市场快照，所有代码共用
+        quotes = {quote["code"]: quote for quote in batch_get_realtime(codes)}
 
-        for code in codes:
-            try:
-                # 获取实时行情
-                quote = get_realtime_quote(code)
+        def fetch_one(code: str) -> Optional[Dict]:
+            quote = quotes.get(normalize_stock_code(code))
+            if quote is None:
+                return None
 
+            try:
                 # 获取财务数据
                 financial = get_financial_data(code)
 
                 # 获取历史数据计算涨跌幅
-                hist = get_history_kline(code, "daily", days + 10)
-                if len(hist["data"]) > days:
-                    start_price = hist["data"][-days]["close"]
-                    current_price = hist["data"][-1]["close"]
+                hist = get_history_kline(code, "daily", days + 10, columnar=True)
+                closes = hist["columns"]["close"]
+                if len(closes) > days:
+                    start_price = closes[-days]
+                    current_price = closes[-1]
                     period_change_pct = ((current_price - start_price) / start_price) * 100
                 else:
                     period_change_pct = None
-
-                # 合并数据
-                stock_metric = {
-                    "code": code,
-                    "name": quote.get("name", ""),
-                    "price": quote.get("price"),
-                    "change": quote.get("change"),
-                    "change_pct": quote.get("change_pct"),
-                    "period_change_pct": period_change_pct,
-                    "pe_ratio": quote.get("pe_ratio"),
-                    "pb_ratio": quote.get("pb_ratio"),
-                    "market_cap": quote.get("market_cap"),
-                    "turnover": quote.get("turnover"),
-                    "roe": financial.get("roe"),
-                    "revenue": financial.get("revenue"),
-                    "net_profit": financial.get("net_profit"),
-                    "debt_ratio": financial.get("debt_ratio"),
-                }
-                stocks_data.append(stock_metric)
-            except Exception as e:
+            except Exception:
                 # 跳过获取失败的股票
-                continue
+                return None
+
+            # 合并数据
+            return {
+                "code": code,
+                "name": quote.get("name", ""),
+                "price": quote.get("price"),
+                "change": quote.get("change"),
+                "change_pct": quote.get("change_pct"),
+                "period_change_pct": period_change_pct,
+                "pe_ratio": quote.get("pe_ratio"),
+                "pb_ratio": quote.get("pb_ratio"),
+                "market_cap": quote.get("market_cap"),
+                "turnover": quote.get("turnover"),
+                "roe": financial.get("roe"),
+                "revenue": financial.get("revenue"),
+                "net_profit": financial.get("net_profit"),
+                "debt_ratio": financial.get("debt_ratio"),
+            }
+
+        stocks_data = _fetch_all(fetch_one, codes)
 
         # 计算摘要信息
         summary = {}
         if stocks_data:
             # 找出各项最优
-            valid_market_caps = [s["market_cap"] for s in stocks_data if s["market_cap"]]
-            if valid_market_caps:
-                summary["max_market_cap"] = max(valid_market_caps)
+            market_caps = _valid_values(stocks_data, "market_cap")
+            if market_caps.size:
+                summary["max_market_cap"] = float(market_caps.max())
 
-            valid_roes = [s["roe"] for s in stocks_data if s["roe"]]
-            if valid_roes:
-                summary["max_roe"] = max(valid_roes)
+            roes = _valid_values(stocks_data, "roe")
+            if roes.size:
+                summary["max_roe"] = float(roes.max())
 
-            valid_pes = [s["pe_ratio"] for s in stocks_data if s["pe_ratio"]]
-            if valid_pes:
-                summary["min_pe"] = min(valid_pes)
+            pes = _valid_values(stocks_data, "pe_ratio")
+            if pes.size:
+                summary["min_pe"] = float(pes.min())
 
             summary["total"] = len(stocks_data)
 
@@ -105,24 +150,25 @@ def compare_financials(codes: List[str]) -> Dict:
         财务对比结果
     """
     try:
-        financials_data = []
-
-        for code in codes:
+        def fetch_one(code: str) -> Optional[Dict]:
             try:
                 financial = get_financial_data(code)
-                financials_data.append({
-                    "code": code,
-                    "name": financial.get("name", ""),
-                    "revenue": financial.get("revenue"),
-                    "net_profit": financial.get("net_profit"),
-                    "roe": financial.get("roe"),
-                    "roa": financial.get("roa"),
-                    "debt_ratio": financial.get("debt_ratio"),
-                    "eps": financial.get("eps"),
-                    "bps": financial.get("bps"),
-                })
-            except:
-                continue
+            except Exception:
+                return None
+
+            return {
+                "code": code,
+                "name": financial.get("name", ""),
+                "revenue": financial.get("revenue"),
+                "net_profit": financial.get("net_profit"),
+                "roe": financial.get("roe"),
+                "roa": financial.get("roa"),
+                "debt_ratio": financial.get("debt_ratio"),
+                "eps": financial.get("eps"),
+                "bps": financial.get("bps"),
+            }
+
+        financials_data = _fetch_all(fetch_one, codes)
 
         return {
             "stocks": financials_data,
@@ -144,35 +190,38 @@ def compare_price_performance(codes: List[str], days: int = 30) -> Dict:
         价格表现对比结果
     """
     try:
-        performance_data = []
-
-        for code in codes:
+        def fetch_one(code: str) -> Optional[Dict]:
             try:
-                hist = get_history_kline(code, "daily", days + 10)
-
-                if len(hist["data"]) > days:
-                    start_data = hist["data"][-days]
-                    end_data = hist["data"][-1]
-
-                    # 计算期间最高最低
-                    period_data = hist["data"][-days:]
-                    high = max(bar["high"] for bar in period_data)
-                    low = min(bar["low"] for bar in period_data)
-                    volume_avg = sum(bar["volume"] for bar in period_data) / len(period_data)
-
-                    performance_data.append({
-                        "code": code,
-                        "name": hist.get("name", ""),
-                        "start_price": start_data["close"],
-                        "end_price": end_data["close"],
-                        "high": high,
-                        "low": low,
-                        "change": end_data["close"] - start_data["close"],
-                        "change_pct": ((end_data["close"] - start_data["close"]) / start_data["close"]) * 100,
-                        "volume_avg": volume_avg,
-                    })
-            except:
-                continue
+                hist = get_history_kline(code, "daily", days + 10, arrays=True)
+                if hist["count"] <= days:
+                    return None
+
+                # 期间数据为数组切片，最高、最低、均量各做一次向量化归约
+                columns = hist["columns"]
+                closes = columns["close"][-days:]
+                highs = columns["high"][-days:]
+                lows = columns["low"][-days:]
+                volumes = columns["volume"][-days:]
+
+                start_price = float(closes[0])
+                end_price = float(closes[-1])
+
+                return {
+                    "code": code,
+                    "name": hist.get("name", ""),
+                    "start_price": start_price,
+                    "end_price": end_price,
+                    "high": float(highs.max()),
+                    "low": float(lows.min()),
+                    "change": end_price - start_price,
+                    "change_pct": ((end_price - start_price) / start_price) * 100,
+                    "volume_avg": float(volumes.mean()),
+                }
+            except Exception:
+                # 跳过获取失败的股票
+                return None
+
+        performance_data = _fetch_all(fetch_one, codes)
 
         # 按涨跌幅排序
         performance_data.sort(key=lambda x: x.get("change_pct", 0), reverse=True)
@@ -186,6 +235,60 @@ def compare_price_performance(codes: List[str], days: int = 30) -> Dict:
         raise Exception(f"价格表现对比失败: {str(e)}")
 
 
+# 对比报告表格列：(表头, 字段, 宽度, 数值格式, 空值替代)
+BASIC_REPORT_COLUMNS = [
+    ("代码", "code", 10, "", None),
+    ("名称", "name", 12, "", None),
+    ("价格", "price", 10, ".2f", None),
+    ("涨跌幅", "change_pct", 10, ".2f", None),
+    ("市值(亿)", "market_cap", 12, ".2f", 0),
+    ("换手率", "turnover", 10, ".2f", 0),
+]
+
+VALUATION_REPORT_COLUMNS = [
+    ("代码", "code", 10, "", None),
+    ("名称", "name", 12, "", None),
+    ("PE", "pe_ratio", 10, "", "N/A"),
+    ("PB", "pb_ratio", 10, "", "N/A"),
+]
+
+FINANCIAL_REPORT_COLUMNS = [
+    ("代码", "code", 10, "", None),
+    ("名称", "name", 12, "", None),
+    ("ROE(%)", "roe", 12, "", "N/A"),
+    ("营收(亿)", "revenue", 12, "", "N/A"),
+    ("净利润(亿)", "net_profit", 12, "", "N/A"),
+]
+
+
+def _report_table(title: str, columns: List[Tuple], stocks: List[Dict]) -> List[str]:
+    """
+    生成对比报告中的一张左对齐文本表格
+
+    Args:
+        title: 表格标题
+        columns: 列定义列表，每项为 (表头, 字段, 宽度, 数值格式, 空值替代)
+        stocks: 股票数据列表
+
+    Returns:
+        表格文本行列表（标题、表头、分隔线和数据行）
+    """
+    specs = [(key, f"<{width}{fmt}", default) for _, key, width, fmt, default in columns]
+    lines = [
+        title,
+        "".join(f"{header:<{width}}" for header, _, width, _, _ in columns),
+        "-" * 60,
+    ]
+    lines.extend(
+        "".join(
+            format(stock[key] if default is None else stock[key] or default, spec)
+            for key, spec, default in specs
+        )
+        for stock in stocks
+    )
+    return lines
+
+
 def generate_comparison_report(codes: List[str]) -> str:
     """
     生成股票对比报告
@@ -200,58 +303,19 @@ def generate_comparison_report(codes: List[str]) -> str:
         # 获取对比数据
         comparison = compare_stocks(codes)
 
-        report_lines = []
-        report_lines.append("=" * 60)
-        report_lines.append("股票对比报告")
-        report_lines.append("=" * 60)
-        report_lines.append("")
+        stocks = comparison["stocks"]
+        report_lines = ["=" * 60, "股票对比报告", "=" * 60, ""]
 
         # 基本信息
-        report_lines.append("【基本信息对比】")
-        report_lines.append(f"{'代码':<10}{'名称':<12}{'价格':<10}{'涨跌幅':<10}{'市值(亿)':<12}{'换手率':<10}")
-        report_lines.append("-" * 60)
-
-        for stock in comparison["stocks"]:
-            report_lines.append(
-                f"{stock['code']:<10}"
-                f"{stock['name']:<12}"
-                f"{stock['price']:<10.2f}"
-                f"{stock['change_pct']:<10.2f}"
-                f"{stock['market_cap'] or 0:<12.2f}"
-                f"{stock['turnover'] or 0:<10.2f}"
-            )
-
+        report_lines += _report_table("【基本信息对比】", BASIC_REPORT_COLUMNS, stocks)
         report_lines.append("")
 
         # 估值指标
-        report_lines.append("【估值指标对比】")
-        report_lines.append(f"{'代码':<10}{'名称':<12}{'PE':<10}{'PB':<10}")
-        report_lines.append("-" * 60)
-
-        for stock in comparison["stocks"]:
-            report_lines.append(
-                f"{stock['code']:<10}"
-                f"{stock['name']:<12}"
-                f"{stock['pe_ratio'] or 'N/A':<10}"
-                f"{stock['pb_ratio'] or 'N/A':<10}"
-            )
-
+        report_lines += _report_table("【估值指标对比】", VALUATION_REPORT_COLUMNS, stocks)
         report_lines.append("")
 
         # 财务指标
-        report_lines.append("【财务指标对比】")
-        report_lines.append(f"{'代码':<10}{'名称':<12}{'ROE(%)':<12}{'营收(亿)':<12}{'净利润(亿)':<12}")
-        report_lines.append("-" * 60)
-
-        for stock in comparison["stocks"]:
-            report_lines.append(
-                f"{stock['code']:<10}"
-                f"{stock['name']:<12}"
-                f"{stock['roe'] or 'N/A':<12}"
-                f"{stock['revenue'] or 'N/A':<12}"
-                f"{stock['net_profit'] or 'N/A':<12}"
-            )
-
+        report_lines += _report_table("【财务指标对比】", FINANCIAL_REPORT_COLUMNS, stocks)
         report_lines.append("")
         report_lines.append("=" * 60)
 
@@ -4,10 +4,59 @@
 使用 AkShare 获取 A股数据，包括实时行情、历史K线、财务数据等
 """
 
+import threading
+import time
 import akshare as ak
+import numpy as np
 import pandas as pd
-from typing import Optional, Dict, List, Union
-from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Tuple, Union
+from datetime import date, datetime, timedelta
+
+from stork_agent.cache.manager import CacheManager, cached
+
+try:
+    import pyarrow
+except ImportError:  # 可选依赖，未安装时文本列保持 pandas 默认字符串类型
+    pyarrow = None
+
+
+# 全市场行情快照的复用时间（秒）
+SPOT_SNAPSHOT_TTL = 30
+
+# 行情快照必须包含的列，获取时校验，下游直接按列名取用
+SPOT_REQUIRED_COLUMNS = [
+    "代码", "名称", "最新价", "涨跌额", "涨跌幅", "换手率", "市盈率-动态", "市净率", "总市值",
+]
+
+# 行情快照保留的列（实时行情、筛选和排行用到的列），其余列获取时即丢弃
+SPOT_COLUMNS = SPOT_REQUIRED_COLUMNS + ["今开", "最高", "最低", "成交量", "成交额", "行业"]
+
+# 行情快照中的数值列，获取时统一转换为 float，筛选和排行直接复用
+SPOT_NUMERIC_COLUMNS = [
+    "最新价", "涨跌幅", "涨跌额", "成交量", "成交额", "最高", "最低",
+    "今开", "换手率", "市盈率-动态", "市净率", "总市值",
+]
+
+# 行情快照中的文本列，安装了 pyarrow 时转换为 Arrow 字符串类型
+SPOT_TEXT_COLUMNS = ["名称"]
+
+# 行情快照中取值种类很少的文本列，转换为分类类型
+SPOT_CATEGORY_COLUMNS = ["行业"]
+
+# 全市场行情快照缓存：(获取时间, 按代码索引且数值列已转换的 DataFrame)
+_spot_cache: Optional[Tuple[float, pd.DataFrame]] = None
+
+# 合并并发的快照请求，缓存过期时只有一个线程访问数据源
+_spot_lock = threading.Lock()
+
+# 股票列表进程内缓存：(日期, DataFrame)，跨日自动失效
+_stock_list_cache: Optional[Tuple[date, pd.DataFrame]] = None
+
+# 股票名称表缓存：(构建时所用的股票列表, {代码: 名称})，股票列表更新后重建
+_stock_names_cache: Optional[Tuple[pd.DataFrame, Dict[str, str]]] = None
+
+# 股票检索表缓存：(构建时所用的股票列表, 检索表)，股票列表更新后重建
+_search_cache: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None
 
 
 def normalize_stock_code(code: str) -> str:
@@ -20,6 +69,10 @@ def normalize_stock_code(code: str) -> str:
     Returns:
         标准化的 6 位股票代码
     """
+    # 常见情况：已是 6 位数字代码，无需处理
+    if len(code) == 6 and code.isdigit():
+        return code
+
     code = code.strip().upper()
     # 移除市场前缀
     if code.startswith(("SH", "SZ")):
@@ -32,6 +85,28 @@ def get_stock_list() -> pd.DataFrame:
     """
     获取 A股股票列表
 
+    当天第一次调用时从磁盘缓存或 AkShare 加载，之后在进程内直接复用，
+    返回的 DataFrame 为共享对象，调用方不应原地修改
+
+    Returns:
+        包含股票代码、名称等信息的 DataFrame
+    """
+    global _stock_list_cache
+
+    today = date.today()
+    if _stock_list_cache is not None and _stock_list_cache[0] == today:
+        return _stock_list_cache[1]
+
+    df = _load_stock_list()
+    _stock_list_cache = (today, df)
+    return df
+
+
+@cached("stock_list", CacheManager.TTL_HISTORICAL, use_pickle=True)
+def _load_stock_list() -> pd.DataFrame:
+    """
+    加载 A股股票列表（磁盘缓存一天）
+
     Returns:
         包含股票代码、名称等信息的 DataFrame
     """
@@ -43,6 +118,176 @@ def get_stock_list() -> pd.DataFrame:
         raise Exception(f"获取股票列表失败: {str(e)}")
 
 
+def get_stock_name(code: str) -> str:
+    """
+    按标准化后的代码查询股票名称
+
+    代码到名称的字典随股票列表构建一次，查询为 O(1)
+
+    Args:
+        code: 标准化后的股票代码
+
+    Returns:
+        股票名称，未找到时为空字符串
+    """
+    global _stock_names_cache
+
+    df = get_stock_list()
+    if _stock_names_cache is None or _stock_names_cache[0] is not df:
+        _stock_names_cache = (df, dict(zip(df["code"].tolist(), df["name"].tolist())))
+    return _stock_names_cache[1].get(code, "")
+
+
+def get_stock_search_index() -> pd.DataFrame:
+    """
+    获取股票检索表
+
+    在股票列表上附加小写的 "代码|名称" 检索列 _search，
+    股票列表未更新时复用已构建的检索表
+
+    Returns:
+        包含 code、name、_search 列的 DataFrame
+    """
+    global _search_cache
+
+    stock_list = get_stock_list()
+    if _search_cache is None or _search_cache[0] is not stock_list:
+        df = stock_list[["code", "name"]].copy()
+        df["_search"] = (df["code"] + "|" + df["name"]).str.lower()
+        _search_cache = (stock_list, df)
+    return _search_cache[1]
+
+
+def get_spot_snapshot() -> pd.DataFrame:
+    """
+    获取全市场实时行情快照
+
+    一次请求返回全部 A股行情，并在 SPOT_SNAPSHOT_TTL 秒内复用，
+    批量查询时无需为每只股票单独请求。多个线程同时遇到缓存过期时
+    只有一个线程请求数据源，其余线程等待并复用其结果
+
+    Returns:
+        以股票代码为索引（按代码排序）、只含 SPOT_COLUMNS 的行情 DataFrame，SPOT_NUMERIC_COLUMNS 中的列
+        已转换为 float（无法解析的值为 NaN）；安装了 pyarrow 时
+        SPOT_TEXT_COLUMNS 中的列为 Arrow 字符串类型；SPOT_CATEGORY_COLUMNS
+        中的列为分类类型
+    """
+    global _spot_cache
+
+    cached_snapshot = _spot_cache
+    if cached_snapshot is not None and time.monotonic() - cached_snapshot[0] < SPOT_SNAPSHOT_TTL:
+        return cached_snapshot[1]
+
+    with _spot_lock:
+        # 等锁期间其他线程可能已完成获取
+        cached_snapshot = _spot_cache
+        now = time.monotonic()
+        if cached_snapshot is not None and now - cached_snapshot[0] < SPOT_SNAPSHOT_TTL:
+            return cached_snapshot[1]
+
+        df = _fetch_spot_snapshot()
+        _spot_cache = (now, df)
+        return df
+
+
+def _fetch_spot_snapshot() -> pd.DataFrame:
+    """
+    请求全市场实时行情，校验列并转换列类型
+
+    Returns:
+        以股票代码为索引并按代码排序、只含 SPOT_COLUMNS 且已转换列类型的行情 DataFrame
+
+    Raises:
+        ValueError: 数据源返回的行情缺少 SPOT_REQUIRED_COLUMNS 中的列
+    """
+    df = ak.stock_zh_a_spot_em()
+    missing = [column for column in SPOT_REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"行情快照缺少列: {', '.join(missing)}")
+
+    # 只保留下游用到的列，减少快照内存占用和后续列操作的数据量
+    df = df[[column for column in SPOT_COLUMNS if column in df.columns]]
+    # 按代码排序：数据源的行顺序每次刷新都可能变化，排序后分页游标跨刷新仍有效
+    df = df.set_index("代码", drop=False).sort_index()
+    # 快照在复用期内不变，数值转换只在获取时做一次
+    df = df.assign(**{
+        column: pd.to_numeric(df[column], errors="coerce").astype(float)
+        for column in SPOT_NUMERIC_COLUMNS
+        if column in df.columns
+    })
+    if pyarrow is not None:
+        # Arrow 字符串列的子串匹配走 pyarrow 的向量化内核
+        df = df.assign(**{
+            column: df[column].astype("string[pyarrow]")
+            for column in SPOT_TEXT_COLUMNS
+            if column in df.columns
+        })
+    df = df.assign(**{
+        column: df[column].astype("category")
+        for column in SPOT_CATEGORY_COLUMNS
+        if column in df.columns
+    })
+    return df
+
+
+# 实时行情字段 -> 行情快照列名
+QUOTE_COLUMNS = {
+    "price": "最新价",
+    "open": "今开",
+    "high": "最高",
+    "low": "最低",
+    "volume": "成交量",
+    "amount": "成交额",
+    "change": "涨跌额",
+    "change_pct": "涨跌幅",
+    "turnover": "换手率",
+}
+
+# 可能缺失的估值字段（缺失时为 None）-> (行情快照列名, 换算除数)
+QUOTE_OPTIONAL_COLUMNS = {
+    "pe_ratio": ("市盈率-动态", 1),
+    "pb_ratio": ("市净率", 1),
+    "market_cap": ("总市值", 100000000),  # 换算为亿元
+}
+
+
+def snapshot_records(
+    df: pd.DataFrame,
+    columns_map: Dict[str, str] = QUOTE_COLUMNS,
+    optional_map: Dict[str, Tuple[str, int]] = QUOTE_OPTIONAL_COLUMNS
+) -> List[Dict]:
+    """
+    将按代码索引的行情快照转换为字典列表
+
+    按列整体转换类型，不逐行构造 Series
+
+    Args:
+        df: 行情快照（或其子集），索引为标准化后的股票代码
+        columns_map: 数值字段 -> 列名，缺失的列记为 0
+        optional_map: 可为空的字段 -> (列名, 换算除数)，缺失值为 None
+
+    Returns:
+        包含 code、name 及上述字段的字典列表，顺序与 df 一致
+    """
+    n = len(df)
+    columns = {
+        "code": df.index.tolist(),
+        "name": df["名称"].tolist() if "名称" in df.columns else [""] * n,
+    }
+    for field, column in columns_map.items():
+        columns[field] = df[column].astype(float).tolist() if column in df.columns else [0.0] * n
+
+    for field, (column, divisor) in optional_map.items():
+        if column not in df.columns:
+            columns[field] = [None] * n
+            continue
+        values = df[column].astype(float) / divisor
+        columns[field] = values.astype(object).where(values.notna(), None).tolist()
+
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+@cached("realtime", CacheManager.TTL_REALTIME)
 def get_realtime_quote(code: str) -> Dict:
     """
     获取单只股票的实时行情
@@ -56,57 +301,120 @@ def get_realtime_quote(code: str) -> Dict:
     code = normalize_stock_code(code)
 
     try:
-        # 判断市场
-        if code.startswith("6"):
-            symbol = f"sh{code}"
+        # 从全市场快照中按代码索引查找，TTL 内不重复请求
+        df = get_spot_snapshot()
+
+        if code not in df.index:
+            raise ValueError(f"未找到股票代码 {code}")
+
+        return snapshot_records(df.loc[[code]])[0]
+    except Exception as e:
+        raise Exception(f"获取实时行情失败 ({code}): {str(e)}")
+
+
+# AkShare K线列名 -> 字段名
+HISTORY_RENAME = {
+    "日期": "date",
+    "开盘": "open",
+    "收盘": "close",
+    "最高": "high",
+    "最低": "low",
+    "成交量": "volume",
+    "成交额": "amount",
+    "涨跌幅": "change_pct",
+}
+
+
+def _history_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    取出重命名后的K线 DataFrame 的数值列
+
+    Args:
+        df: 包含 open/high/low/close/volume 等列的 DataFrame
+
+    Returns:
+        {字段名: float64 数组}，缺失的成交额、涨跌幅记为 0
+    """
+    arrays = {}
+    for column in ("open", "high", "low", "close", "volume"):
+        arrays[column] = df[column].to_numpy(dtype=np.float64)
+
+    # 成交额、涨跌幅可能缺失
+    for column in ("amount", "change_pct"):
+        if column in df.columns:
+            arrays[column] = df[column].astype(float).fillna(0).to_numpy(dtype=np.float64)
         else:
-            symbol = f"sz{code}"
+            arrays[column] = np.zeros(len(df))
 
-        # 获取实时行情
-        df = ak.stock_zh_a_spot_em()
+    return arrays
 
-        # 查找对应股票
-        stock_data = df[df["代码"] == code]
 
-        if stock_data.empty:
-            raise ValueError(f"未找到股票代码 {code}")
+def _history_columns(df: pd.DataFrame) -> Dict[str, List]:
+    """
+    将重命名后的K线 DataFrame 转换为按列存储的字典
 
-        row = stock_data.iloc[0]
+    Args:
+        df: 包含 date/open/high/low/close/volume 等列的 DataFrame
 
-        return {
-            "code": code,
-            "name": row.get("名称", ""),
-            "price": float(row.get("最新价", 0)),
-            "open": float(row.get("今开", 0)),
-            "high": float(row.get("最高", 0)),
-            "low": float(row.get("最低", 0)),
-            "volume": float(row.get("成交量", 0)),
-            "amount": float(row.get("成交额", 0)),
-            "change": float(row.get("涨跌额", 0)),
-            "change_pct": float(row.get("涨跌幅", 0)),
-            "turnover": float(row.get("换手率", 0)),
-            "pe_ratio": float(row.get("市盈率-动态", 0)) if pd.notna(row.get("市盈率-动态")) else None,
-            "pb_ratio": float(row.get("市净率", 0)) if pd.notna(row.get("市净率")) else None,
-            "market_cap": float(row.get("总市值", 0)) / 100000000 if pd.notna(row.get("总市值")) else None,
-        }
-    except Exception as e:
-        raise Exception(f"获取实时行情失败 ({code}): {str(e)}")
+    Returns:
+        {字段名: 值列表}，数值列均为 float，缺失的成交额、涨跌幅记为 0
+    """
+    columns = {"date": df["date"].tolist()}
+    for column, values in _history_arrays(df).items():
+        columns[column] = values.tolist()
+    return columns
+
+
+@cached("history_raw", CacheManager.TTL_REALTIME, use_pickle=True)
+def _fetch_history_frame(code: str, period: str, adjust: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    从 AkShare 获取原始K线 DataFrame（短时磁盘缓存）
+
+    区间总是截止到今天，最后一根K线可能尚未收盘，因此只缓存 TTL_REALTIME；
+    缓存键包含日期区间，跨日自动回源；按条、按列、数组等不同返回形式共用同一份原始数据。
+    返回的 DataFrame 可能为共享对象，调用方不应原地修改
+
+    Args:
+        code: 标准化后的股票代码
+        period: 周期 - daily/weekly/monthly
+        adjust: 复权方式 - qfq/hfq/''
+        start_date: 开始日期（YYYYMMDD）
+        end_date: 结束日期（YYYYMMDD）
+
+    Returns:
+        AkShare 返回的K线 DataFrame
+    """
+    return ak.stock_zh_a_hist(
+        symbol=code,
+        period=period,
+        adjust=adjust,
+        start_date=start_date,
+        end_date=end_date
+    )
 
 
 def get_history_kline(
     code: str,
     period: str = "daily",
     days: int = 100,
-    adjust: str = "qfq"
+    adjust: str = "qfq",
+    columnar: bool = False,
+    arrays: bool = False
 ) -> Dict:
     """
     获取历史K线数据
 
+    原始数据由 _fetch_history_frame 按日期区间缓存，这里每次按最新数据重新组装
+
     Args:
         code: 股票代码
         period: 周期 - daily(日线), weekly(周线), monthly(月线)
         days: 获取天数
         adjust: 复权方式 - qfq(前复权), hfq(后复权), ''(不复权)
+        columnar: 是否按列返回，为 True 时以 columns 字段返回
+            {字段名: 数值列表}，不再逐条构造 K 线字典
+        arrays: 是否按 NumPy 数组返回，为 True 时 columns 中的数值列为
+            float64 数组、date 为 datetime64[D] 数组，可直接做向量化计算
 
     Returns:
         K线数据字典
@@ -123,64 +431,42 @@ def get_history_kline(
         period_param = period_map.get(period, "daily")
 
         # 获取股票名称
-        df_list = get_stock_list()
-        stock_info = df_list[df_list["code"] == code]
-        name = stock_info.iloc[0]["name"] if not stock_info.empty else ""
-
-        # 根据复权方式选择 API
-        if adjust == "qfq":
-            df = ak.stock_zh_a_hist(
-                symbol=code,
-                period=period_param,
-                adjust="qfq",
-                start_date=(datetime.now() - timedelta(days=days*2)).strftime("%Y%m%d"),
-                end_date=datetime.now().strftime("%Y%m%d")
-            )
-        elif adjust == "hfq":
-            df = ak.stock_zh_a_hist(
-                symbol=code,
-                period=period_param,
-                adjust="hfq",
-                start_date=(datetime.now() - timedelta(days=days*2)).strftime("%Y%m%d"),
-                end_date=datetime.now().strftime("%Y%m%d")
-            )
-        else:
-            df = ak.stock_zh_a_hist(
-                symbol=code,
-                period=period_param,
-                adjust="",
-                start_date=(datetime.now() - timedelta(days=days*2)).strftime("%Y%m%d"),
-                end_date=datetime.now().strftime("%Y%m%d")
-            )
+        name = get_stock_name(code)
+
+        # 日期区间只计算一次；不支持的复权方式按不复权处理
+        end = datetime.now()
+        start = end - timedelta(days=days * 2)
+        df = _fetch_history_frame(
+            code,
+            period_param,
+            adjust if adjust in ("qfq", "hfq") else "",
+            start.strftime("%Y%m%d"),
+            end.strftime("%Y%m%d")
+        )
 
         # 重命名列
-        df = df.rename(columns={
-            "日期": "date",
-            "开盘": "open",
-            "收盘": "close",
-            "最高": "high",
-            "最低": "low",
-            "成交量": "volume",
-            "成交额": "amount",
-            "涨跌幅": "change_pct"
-        })
+        df = df.rename(columns=HISTORY_RENAME)
 
         # 取最近 days 条数据
         df = df.tail(days).reset_index(drop=True)
 
-        # 转换为列表格式
-        data = []
-        for _, row in df.iterrows():
-            data.append({
-                "date": row["date"],
-                "open": float(row["open"]),
-                "high": float(row["high"]),
-                "low": float(row["low"]),
-                "close": float(row["close"]),
-                "volume": float(row["volume"]),
-                "amount": float(row.get("amount", 0)),
-                "change_pct": float(row.get("change_pct", 0)) if pd.notna(row.get("change_pct")) else 0
-            })
+        if arrays:
+            columns = {"date": pd.to_datetime(df["date"]).to_numpy(dtype="datetime64[D]")}
+            columns.update(_history_arrays(df))
+        else:
+            columns = _history_columns(df)
+
+        if columnar or arrays:
+            return {
+                "code": code,
+                "name": name,
+                "period": period,
+                "columns": columns,
+                "count": len(df)
+            }
+
+        # 按行组装为 K 线字典列表
+        data = [dict(zip(columns, values)) for values in zip(*columns.values())]
 
         return {
             "code": code,
@@ -193,10 +479,66 @@ def get_history_kline(
         raise Exception(f"获取历史数据失败 ({code}): {str(e)}")
 
 
+def get_history_arrays(
+    code: str,
+    period: str = "daily",
+    days: int = 100
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    获取历史K线的收盘价、最高价、最低价和成交量数组（前复权）
+
+    数组可直接传给 analysis.indicators 中的指标函数，无需再转换
+
+    Args:
+        code: 股票代码
+        period: 周期 - daily(日线), weekly(周线), monthly(月线)
+        days: 获取天数
+
+    Returns:
+        (收盘价, 最高价, 最低价, 成交量)，均为 float64 数组
+    """
+    columns = get_history_kline(code, period, days, arrays=True)["columns"]
+    return columns["close"], columns["high"], columns["low"], columns["volume"]
+
+
+@cached("financial", CacheManager.TTL_HISTORICAL, use_pickle=True)
+def _fetch_financial_indicators(code: str) -> Dict:
+    """
+    从 AkShare 获取最新一期财务指标（磁盘缓存一天）
+
+    获取失败或没有数据时抛出异常，异常不会被缓存，下次调用重新请求
+
+    Args:
+        code: 标准化后的股票代码
+
+    Returns:
+        财务指标字典（不含代码和名称）
+
+    Raises:
+        ValueError: 数据源没有该股票的财务数据
+    """
+    df = ak.stock_financial_analysis_indicator(symbol=code)
+    if df.empty:
+        raise ValueError(f"没有财务数据: {code}")
+
+    latest = df.iloc[0]
+    return {
+        "report_date": latest.get("日期", str(datetime.now().date())),
+        "revenue": float(latest.get("营业收入", 0)) / 100000000 if pd.notna(latest.get("营业收入")) else None,
+        "net_profit": float(latest.get("净利润", 0)) / 100000000 if pd.notna(latest.get("净利润")) else None,
+        "eps": float(latest.get("基本每股收益", 0)) if pd.notna(latest.get("基本每股收益")) else None,
+        "bps": float(latest.get("每股净资产", 0)) if pd.notna(latest.get("每股净资产")) else None,
+        "roe": float(latest.get("净资产收益率", 0)) if pd.notna(latest.get("净资产收益率")) else None,
+        "debt_ratio": float(latest.get("资产负债率", 0)) if pd.notna(latest.get("资产负债率")) else None,
+    }
+
+
 def get_financial_data(code: str) -> Dict:
     """
     获取财务数据
 
+    只缓存成功获取的财务指标；获取失败时返回各项为 None 的默认值，不缓存
+
     Args:
         code: 股票代码
 
@@ -207,28 +549,13 @@ def get_financial_data(code: str) -> Dict:
 
     try:
         # 获取股票名称
-        df_list = get_stock_list()
-        stock_info = df_list[df_list["code"] == code]
-        name = stock_info.iloc[0]["name"] if not stock_info.empty else ""
+        name = get_stock_name(code)
 
         # 获取财务指标
         try:
-            df = ak.stock_financial_analysis_indicator(symbol=code)
-            if not df.empty:
-                latest = df.iloc[0]
-                return {
-                    "code": code,
-                    "name": name,
-                    "report_date": latest.get("日期", str(datetime.now().date())),
-                    "revenue": float(latest.get("营业收入", 0)) / 100000000 if pd.notna(latest.get("营业收入")) else None,
-                    "net_profit": float(latest.get("净利润", 0)) / 100000000 if pd.notna(latest.get("净利润")) else None,
-                    "eps": float(latest.get("基本每股收益", 0)) if pd.notna(latest.get("基本每股收益")) else None,
-                    "bps": float(latest.get("每股净资产", 0)) if pd.notna(latest.get("每股净资产")) else None,
-                    "roe": float(latest.get("净资产收益率", 0)) if pd.notna(latest.get("净资产收益率")) else None,
-                    "debt_ratio": float(latest.get("资产负债率", 0)) if pd.notna(latest.get("资产负债率")) else None,
-                }
+            return {"code": code, "name": name, **_fetch_financial_indicators(code)}
         except (KeyError, ValueError, TypeError) as e:
-            # 数据格式异常时返回默认值
+            # 数据为空或格式异常时返回默认值
             pass
         except Exception as e:
             # 记录但不中断流程，API 调用失败时使用默认值
@@ -251,6 +578,7 @@ def get_financial_data(code: str) -> Dict:
         raise Exception(f"获取财务数据失败 ({code}): {str(e)}")
 
 
+@cached("index", CacheManager.TTL_REALTIME)
 def get_index_realtime(index_code: str) -> Dict:
     """
     获取指数实时行情
@@ -271,7 +599,8 @@ def get_index_realtime(index_code: str) -> Dict:
         if index_data.empty:
             raise ValueError(f"未找到指数代码 {index_code}")
 
-        row = index_data.iloc[0]
+        # 整行一次转为普通字典，后续取值不再经过 Series 索引
+        row = index_data.iloc[0].to_dict()
 
         return {
             "code": index_code,
@@ -300,34 +629,13 @@ def batch_get_realtime(codes: List[str]) -> List[Dict]:
         实时行情数据列表
     """
     try:
-        # 获取全市场数据
-        df = ak.stock_zh_a_spot_em()
-
-        results = []
-        for code in codes:
-            code_normalized = normalize_stock_code(code)
-            stock_data = df[df["代码"] == code_normalized]
-
-            if not stock_data.empty:
-                row = stock_data.iloc[0]
-                results.append({
-                    "code": code_normalized,
-                    "name": row.get("名称", ""),
-                    "price": float(row.get("最新价", 0)),
-                    "open": float(row.get("今开", 0)),
-                    "high": float(row.get("最高", 0)),
-                    "low": float(row.get("最低", 0)),
-                    "volume": float(row.get("成交量", 0)),
-                    "amount": float(row.get("成交额", 0)),
-                    "change": float(row.get("涨跌额", 0)),
-                    "change_pct": float(row.get("涨跌幅", 0)),
-                    "turnover": float(row.get("换手率", 0)),
-                    "pe_ratio": float(row.get("市盈率-动态", 0)) if pd.notna(row.get("市盈率-动态")) else None,
-                    "pb_ratio": float(row.get("市净率", 0)) if pd.notna(row.get("市净率")) else None,
-                    "market_cap": float(row.get("总市值", 0)) / 100000000 if pd.notna(row.get("总市值")) else None,
-                })
-
-        return results
+        # 获取全市场数据（按代码索引）
+        df = get_spot_snapshot()
+
+        # 代码只规范化一次，再用一次哈希查找取出所有存在的行（保持输入顺序），整体转换为字典
+        wanted = [normalize_stock_code(code) for code in codes]
+        positions = df.index.get_indexer_for(wanted)
+        return snapshot_records(df.iloc[positions[positions >= 0]])
     except Exception as e:
         raise Exception(f"批量获取行情失败: {str(e)}")
 
@@ -349,10 +657,7 @@ def get_stock_info(code: str) -> Dict:
         info = ak.stock_individual_info_em(symbol=code)
 
         result = {"code": code}
-        for _, row in info.iterrows():
-            key = row["item"]
-            value = row["value"]
-            result[key] = value
+        result.update(zip(info["item"].tolist(), info["value"].tolist()))
 
         return result
     except Exception as e:
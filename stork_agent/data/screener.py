@@ -4,112 +4,257 @@
 实现各种股票筛选策略
 """
 
-import akshare as ak
+import re
+import numpy as np
 import pandas as pd
+from pydantic import TypeAdapter
 from typing import Dict, List, Optional
 from stork_agent.agent.schemas import ScreeningFilter, StockBrief
+from stork_agent.data.query import get_spot_snapshot, snapshot_records
 
+try:
+    from numba import njit
+except ImportError:  # 可选依赖，未安装时使用 numpy 逐条件比较
+    njit = None
 
-def screen_stocks(filters: ScreeningFilter) -> Dict:
+
+# 选股结果字段 -> 行情列名
+BRIEF_COLUMNS = {
+    "price": "最新价",
+    "change": "涨跌额",
+    "change_pct": "涨跌幅",
+}
+
+# 选股结果中可为空的字段 -> (行情列名, 换算除数)
+BRIEF_OPTIONAL_COLUMNS = {
+    "pe_ratio": ("市盈率-动态", 1),
+    "pb_ratio": ("市净率", 1),
+    "market_cap": ("总市值", 100000000),  # 换算为亿元
+    "turnover": ("换手率", 1),
+}
+
+
+# 批量校验 StockBrief 列表，整个列表一次进入 pydantic-core
+_BRIEFS_ADAPTER = TypeAdapter(List[StockBrief])
+
+# 行业筛选中多个行业之间的分隔符
+INDUSTRY_SEPARATOR = re.compile(r"[,，]")
+
+
+# 数值区间条件：(筛选字段, 行情列名, 换算系数, 是否为下限)
+NUMERIC_BOUNDS = [
+    ("pe_min", "市盈率-动态", 1, True),
+    ("pe_max", "市盈率-动态", 1, False),
+    ("pb_min", "市净率", 1, True),
+    ("pb_max", "市净率", 1, False),
+    ("market_cap_min", "总市值", 100000000, True),
+    ("market_cap_max", "总市值", 100000000, False),
+    ("change_min", "涨跌幅", 1, True),
+    ("change_max", "涨跌幅", 1, False),
+    ("turnover_min", "换手率", 1, True),
+    ("turnover_max", "换手率", 1, False),
+]
+
+
+def _range_mask(values: np.ndarray, lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+    """
+    逐行判断各列取值是否都落在 [low, high] 区间内
+
+    每行遇到第一个不满足的列即停止，安装了 numba 时编译为本地代码执行
+
+    Args:
+        values: 形状为 (列数, 行数) 的浮点数组
+        lows: 各列下限，无下限为 -inf
+        highs: 各列上限，无上限为 inf
+
+    Returns:
+        布尔数组，NaN 视为不满足条件
+    """
+    n_columns, n_rows = values.shape
+    mask = np.ones(n_rows, dtype=np.bool_)
+    for i in range(n_rows):
+        for j in range(n_columns):
+            value = values[j, i]
+            if not (value >= lows[j] and value <= highs[j]):
+                mask[i] = False
+                break
+    return mask
+
+
+if njit is not None:
+    _range_mask = njit(cache=True)(_range_mask)
+
+
+def _build_filter_mask(df: pd.DataFrame, filters: ScreeningFilter) -> np.ndarray:
+    """
+    根据筛选条件生成行掩码
+
+    只处理取值不为 None 的条件，同一列的上下限合并为一个区间，
+    所有条件在同一个布尔数组上累积，避免逐条件切片 DataFrame
+
+    Args:
+        df: 全市场行情快照（已校验必需列，数值列已转换为 float）
+        filters: 筛选条件对象
+
+    Returns:
+        与 df 行对齐的布尔数组，缺失值视为不满足条件
+    """
+    # 行情列名 -> [下限, 上限]，换算作用在边界值上，列数据不做逐元素换算
+    ranges: Dict[str, List[float]] = {}
+    for field, column, scale, is_min in NUMERIC_BOUNDS:
+        bound = getattr(filters, field)
+        if bound is None:
+            continue
+        ranges.setdefault(column, [-np.inf, np.inf])[0 if is_min else 1] = bound * scale
+
+    mask = np.ones(len(df), dtype=bool)
+    if ranges:
+        columns = [df[column].to_numpy(dtype=float) for column in ranges]
+        lows = np.array([low for low, _ in ranges.values()])
+        highs = np.array([high for _, high in ranges.values()])
+        if njit is not None:
+            mask = _range_mask(np.vstack(columns), lows, highs)
+        else:
+            # 比较结果写入复用的缓冲区，再原地合并，不为每个条件分配临时数组
+            scratch = np.empty(len(df), dtype=bool)
+            for values, low, high in zip(columns, lows, highs):
+                if low > -np.inf:
+                    np.greater_equal(values, low, out=scratch)
+                    mask &= scratch
+                if high < np.inf:
+                    np.less_equal(values, high, out=scratch)
+                    mask &= scratch
+
+    # 行业筛选
+    if filters.industry:
+        if "行业" in df.columns:
+            # 只在行业类别（约百个）上做子串匹配，再按类别编码映射到各行；
+            # 关键词按普通文本匹配，不作为正则表达式解释
+            industry = df["行业"].cat
+            terms = [term.strip() for term in INDUSTRY_SEPARATOR.split(filters.industry) if term.strip()]
+            matched = np.zeros(len(industry.categories), dtype=bool)
+            for term in terms:
+                matched |= industry.categories.str.contains(term, regex=False, na=False)
+            mask &= np.isin(industry.codes.to_numpy(), np.flatnonzero(matched))
+        else:
+            mask[:] = False
+
+    return mask
+
+
+def _brief_records(df: pd.DataFrame) -> List[Dict]:
+    """
+    将行情快照子集按列整体转换为股票简要信息字典
+
+    Args:
+        df: 已截取好的行情快照子集（当前页或排行榜）
+
+    Returns:
+        字段与 StockBrief 一致的字典列表，顺序与 df 一致
+    """
+    return snapshot_records(df, BRIEF_COLUMNS, BRIEF_OPTIONAL_COLUMNS)
+
+
+def _to_briefs(records: List[Dict]) -> List[StockBrief]:
+    """
+    将股票简要信息字典批量转换为 StockBrief 对象
+
+    Args:
+        records: _brief_records 生成的字典列表
+
+    Returns:
+        股票简要信息列表
+    """
+    return _BRIEFS_ADAPTER.validate_python(records)
+
+
+def screen_stocks(filters: ScreeningFilter, cursor: Optional[str] = None) -> Dict:
     """
     按条件筛选股票
 
+    结果按股票代码升序排列（不按涨跌幅等指标排名），limit 取代码最小的若干只；
+    需要按涨跌幅排名时使用 screen_gainers / screen_losers。
+
+    支持游标分页：传入上一页最后一只股票的代码作为 cursor，
+    直接从代码大于该股票的位置取下一页，无需重新计算前面的页；
+    快照刷新或游标股票不再满足条件时，游标仍然有效
+
     Args:
         filters: 筛选条件对象
+        cursor: 分页游标（上一页最后一只股票的代码），None 表示第一页
 
     Returns:
-        筛选结果字典
+        筛选结果字典，next_cursor 为下一页游标，没有更多结果时为 None
     """
     try:
-        # 获取全市场数据
-        df = ak.stock_zh_a_spot_em()
-
-        # 应用筛选条件
-        filtered_df = df.copy()
-
-        # PE 筛选
-        if filters.pe_min is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("市盈率-动态", 0), errors="coerce") >= filters.pe_min
-            ]
-        if filters.pe_max is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("市盈率-动态", 999), errors="coerce") <= filters.pe_max
-            ]
-
-        # PB 筛选
-        if filters.pb_min is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("市净率", 0), errors="coerce") >= filters.pb_min
-            ]
-        if filters.pb_max is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("市净率", 999), errors="coerce") <= filters.pb_max
-            ]
-
-        # 市值筛选（转换为亿元）
-        if filters.market_cap_min is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("总市值", 0), errors="coerce") / 100000000 >= filters.market_cap_min
-            ]
-        if filters.market_cap_max is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("总市值", 999999999), errors="coerce") / 100000000 <= filters.market_cap_max
-            ]
-
-        # 涨跌幅筛选
-        if filters.change_min is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("涨跌幅", -999), errors="coerce") >= filters.change_min
-            ]
-        if filters.change_max is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("涨跌幅", 999), errors="coerce") <= filters.change_max
-            ]
-
-        # 换手率筛选
-        if filters.turnover_min is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("换手率", 0), errors="coerce") >= filters.turnover_min
-            ]
-        if filters.turnover_max is not None:
-            filtered_df = filtered_df[
-                pd.to_numeric(filtered_df.get("换手率", 999), errors="coerce") <= filters.turnover_max
-            ]
-
-        # 行业筛选
-        if filters.industry:
-            filtered_df = filtered_df[
-                filtered_df.get("行业", "").str.contains(filters.industry, na=False)
-            ]
-
-        # 限制结果数量
-        result_df = filtered_df.head(filters.limit)
-
-        # 转换为结果格式
-        stocks = []
-        for _, row in result_df.iterrows():
-            stocks.append({
-                "code": row.get("代码", ""),
-                "name": row.get("名称", ""),
-                "price": float(row.get("最新价", 0)),
-                "change": float(row.get("涨跌额", 0)),
-                "change_pct": float(row.get("涨跌幅", 0)),
-                "pe_ratio": float(row.get("市盈率-动态", 0)) if pd.notna(row.get("市盈率-动态")) else None,
-                "pb_ratio": float(row.get("市净率", 0)) if pd.notna(row.get("市净率")) else None,
-                "market_cap": float(row.get("总市值", 0)) / 100000000 if pd.notna(row.get("总市值")) else None,
-                "turnover": float(row.get("换手率", 0)) if pd.notna(row.get("换手率")) else None,
-            })
+        # 获取全市场数据（按代码排序并索引的快照，刷新前后顺序一致）
+        df = get_spot_snapshot()
+
+        # 一次性合并所有生效的条件，只取满足条件的行号，不复制筛选后的整表
+        mask = _build_filter_mask(df, filters)
+        positions = np.flatnonzero(mask)
+
+        # 从代码大于游标的位置开始取，游标股票本身无需存在或满足条件
+        if cursor is not None:
+            start = df.index.searchsorted(cursor, side="right")
+            positions = positions[positions >= start]
+
+        # 限制结果数量，只切出当前页的行
+        result_df = df.iloc[positions[:filters.limit]]
+        has_more = len(positions) > filters.limit
+
+        # 只转换当前页的行，按列整体转换为结果格式
+        stocks = _brief_records(result_df)
 
         return {
             "stocks": stocks,
             "total": len(stocks),
-            "criteria": filters.model_dump()
+            "criteria": filters.model_dump(),
+            "next_cursor": stocks[-1]["code"] if has_more else None,
         }
     except Exception as e:
         raise Exception(f"筛选股票失败: {str(e)}")
 
 
+def screen_codes(filters: ScreeningFilter) -> List[str]:
+    """
+    取满足筛选条件的全部股票代码
+
+    只计算筛选掩码，不转换任何结果行；代码列表即为结果的固定顺序，
+    长度即为结果总数，按列表切片分页时各页既不重复也不遗漏
+
+    Args:
+        filters: 筛选条件对象（limit 不影响结果）
+
+    Returns:
+        按代码排序的股票代码列表
+    """
+    try:
+        df = get_spot_snapshot()
+        return df.index[_build_filter_mask(df, filters)].tolist()
+    except Exception as e:
+        raise Exception(f"筛选股票失败: {str(e)}")
+
+
+def get_stock_briefs(codes: List[str]) -> List[Dict]:
+    """
+    按代码取股票简要信息
+
+    数据取自当前行情快照，按传入顺序返回；快照中不存在的代码跳过
+
+    Args:
+        codes: 股票代码列表
+
+    Returns:
+        股票简要信息列表，字段与 screen_stocks 的结果一致
+    """
+    try:
+        df = get_spot_snapshot()
+        return _brief_records(df.loc[[code for code in codes if code in df.index]])
+    except Exception as e:
+        raise Exception(f"获取股票信息失败: {str(e)}")
+
+
 def screen_by_pe(pe_min: float = 0, pe_max: float = 50, limit: int = 50) -> List[StockBrief]:
     """
     按 PE 筛选股票
@@ -117,14 +262,14 @@ def screen_by_pe(pe_min: float = 0, pe_max: float = 50, limit: int = 50) -> List
     Args:
         pe_min: 最小市盈率
         pe_max: 最大市盈率
-        limit: 返回数量限制
+        limit: 返回数量限制（按代码升序取前 limit 只）
 
     Returns:
-        符合条件的股票列表
+        符合条件的股票列表，按代码升序
     """
     filters = ScreeningFilter(pe_min=pe_min, pe_max=pe_max, limit=limit)
     result = screen_stocks(filters)
-    return [StockBrief(**stock) for stock in result["stocks"]]
+    return _to_briefs(result["stocks"])
 
 
 def screen_by_market_cap(
@@ -138,10 +283,10 @@ def screen_by_market_cap(
     Args:
         min_cap: 最小市值（亿元）
         max_cap: 最大市值（亿元）
-        limit: 返回数量限制
+        limit: 返回数量限制（按代码升序取前 limit 只）
 
     Returns:
-        符合条件的股票列表
+        符合条件的股票列表，按代码升序
     """
     filters = ScreeningFilter(
         market_cap_min=min_cap,
@@ -149,7 +294,7 @@ def screen_by_market_cap(
         limit=limit
     )
     result = screen_stocks(filters)
-    return [StockBrief(**stock) for stock in result["stocks"]]
+    return _to_briefs(result["stocks"])
 
 
 def screen_by_industry(industry: str, limit: int = 50) -> List[StockBrief]:
@@ -158,14 +303,14 @@ def screen_by_industry(industry: str, limit: int = 50) -> List[StockBrief]:
 
     Args:
         industry: 行业名称
-        limit: 返回数量限制
+        limit: 返回数量限制（按代码升序取前 limit 只）
 
     Returns:
-        符合条件的股票列表
+        符合条件的股票列表，按代码升序
     """
     filters = ScreeningFilter(industry=industry, limit=limit)
     result = screen_stocks(filters)
-    return [StockBrief(**stock) for stock in result["stocks"]]
+    return _to_briefs(result["stocks"])
 
 
 def screen_gainers(limit: int = 20) -> List[StockBrief]:
@@ -179,23 +324,7 @@ def screen_gainers(limit: int = 20) -> List[StockBrief]:
         涨幅榜股票列表
     """
     try:
-        df = ak.stock_zh_a_spot_em()
-        df = df.sort_values("涨跌幅", ascending=False).head(limit)
-
-        stocks = []
-        for _, row in df.iterrows():
-            stocks.append(StockBrief(
-                code=row.get("代码", ""),
-                name=row.get("名称", ""),
-                price=float(row.get("最新价", 0)),
-                change=float(row.get("涨跌额", 0)),
-                change_pct=float(row.get("涨跌幅", 0)),
-                pe_ratio=float(row.get("市盈率-动态", 0)) if pd.notna(row.get("市盈率-动态")) else None,
-                pb_ratio=float(row.get("市净率", 0)) if pd.notna(row.get("市净率")) else None,
-                market_cap=float(row.get("总市值", 0)) / 100000000 if pd.notna(row.get("总市值")) else None,
-                turnover=float(row.get("换手率", 0)) if pd.notna(row.get("换手率")) else None,
-            ))
-        return stocks
+        return _to_briefs(_brief_records(get_spot_snapshot().nlargest(limit, "涨跌幅")))
     except Exception as e:
         raise Exception(f"筛选涨幅榜失败: {str(e)}")
 
@@ -211,23 +340,7 @@ def screen_losers(limit: int = 20) -> List[StockBrief]:
         跌幅榜股票列表
     """
     try:
-        df = ak.stock_zh_a_spot_em()
-        df = df.sort_values("涨跌幅", ascending=True).head(limit)
-
-        stocks = []
-        for _, row in df.iterrows():
-            stocks.append(StockBrief(
-                code=row.get("代码", ""),
-                name=row.get("名称", ""),
-                price=float(row.get("最新价", 0)),
-                change=float(row.get("涨跌额", 0)),
-                change_pct=float(row.get("涨跌幅", 0)),
-                pe_ratio=float(row.get("市盈率-动态", 0)) if pd.notna(row.get("市盈率-动态")) else None,
-                pb_ratio=float(row.get("市净率", 0)) if pd.notna(row.get("市净率")) else None,
-                market_cap=float(row.get("总市值", 0)) / 100000000 if pd.notna(row.get("总市值")) else None,
-                turnover=float(row.get("换手率", 0)) if pd.notna(row.get("换手率")) else None,
-            ))
-        return stocks
+        return _to_briefs(_brief_records(get_spot_snapshot().nsmallest(limit, "涨跌幅")))
     except Exception as e:
         raise Exception(f"筛选跌幅榜失败: {str(e)}")
 
@@ -243,22 +356,6 @@ def screen_active_stocks(limit: int = 20) -> List[StockBrief]:
         活跃股票列表
     """
     try:
-        df = ak.stock_zh_a_spot_em()
-        df = df.sort_values("换手率", ascending=False).head(limit)
-
-        stocks = []
-        for _, row in df.iterrows():
-            stocks.append(StockBrief(
-                code=row.get("代码", ""),
-                name=row.get("名称", ""),
-                price=float(row.get("最新价", 0)),
-                change=float(row.get("涨跌额", 0)),
-                change_pct=float(row.get("涨跌幅", 0)),
-                pe_ratio=float(row.get("市盈率-动态", 0)) if pd.notna(row.get("市盈率-动态")) else None,
-                pb_ratio=float(row.get("市净率", 0)) if pd.notna(row.get("市净率")) else None,
-                market_cap=float(row.get("总市值", 0)) / 100000000 if pd.notna(row.get("总市值")) else None,
-                turnover=float(row.get("换手率", 0)) if pd.notna(row.get("换手率")) else None,
-            ))
-        return stocks
+        return _to_briefs(_brief_records(get_spot_snapshot().nlargest(limit, "换手率")))
     except Exception as e:
         raise Exception(f"筛选活跃股票失败: {str(e)}")
@@ -6,6 +6,7 @@ MCP 服务器入口
 """
 
 import asyncio
+import copy
 import sys
 import os
 from typing import Any
@@ -26,6 +27,7 @@ from mcp.types import TextContent
 import sys
 sys.path.insert(0, project_dir)
 from stork_agent.mcp_server import tools
+from stork_agent.utils.helpers import debug_traceback
 
 
 # 创建 MCP 服务器实例
@@ -76,7 +78,7 @@ async def list_tools():
                             "market_cap_max": {"type": "number", "description": "最大市值（亿元）"},
                             "change_min": {"type": "number", "description": "最小涨跌幅(%)"},
                             "change_max": {"type": "number", "description": "最大涨跌幅(%)"},
-                            "industry": {"type": "string", "description": "行业筛选"},
+                            "industry": {"type": "string", "description": "行业筛选（按名称子串匹配，多个行业用逗号分隔）"},
                             "turnover_min": {"type": "number", "description": "最小换手率(%)"},
                             "turnover_max": {"type": "number", "description": "最大换手率(%)"},
                         }
@@ -182,7 +184,8 @@ async def list_tools():
                         "description": "指标类型：ma（移动平均线）、macd、rsi、boll（布林带）",
                         "enum": ["ma", "macd", "rsi", "boll"]
                     },
-                    "period": {"type": "number", "description": "计算周期，默认为 20", "default": 20}
+                    "period": {"type": "number", "description": "计算周期，默认为 20", "default": 20},
+                    "tail": {"type": "integer", "minimum": 1, "description": "只返回最近的 N 个数据点，如只需最新值可设为 1"}
                 },
                 "required": ["code", "indicator"]
             }
@@ -195,58 +198,48 @@ async def list_tools():
     ]
 
 
+# 工具名称（使用 stork_ 前缀避免命名冲突）-> (tools 模块中的函数名, {参数名: 默认值})
+# 函数按名称在调用时查找，参数只取表中列出的键
+TOOL_DISPATCH = {
+    "stork_query_stock": ("query_stock", {"code": ""}),
+    "stork_screen_stocks": ("screen_stocks", {"criteria": {}, "page": 1, "page_size": 50}),
+    "stork_next_page": ("next_page", {}),
+    "stork_prev_page": ("prev_page", {}),
+    "stork_export_current_result": ("export_current_result", {"format": "csv"}),
+    "stork_compare_stocks": ("compare_stocks", {"codes": [], "days": 30}),
+    "stork_get_stock_history": ("get_stock_history", {"code": "", "days": 30, "period": "daily"}),
+    "stork_search_stocks": ("search_stocks", {"keyword": "", "limit": 10}),
+    "stork_get_financials": ("get_financials", {"code": ""}),
+    "stork_calculate_indicator": (
+        "calculate_indicator",
+        {"code": "", "indicator": "", "period": 20, "tail": None}
+    ),
+    "stork_get_market_summary": ("get_market_summary", {}),
+}
+
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """处理工具调用"""
 
     try:
-        # 映射工具名称到函数（使用 stork_ 前缀避免命名冲突）
-        tool_functions = {
-            "stork_query_stock": lambda: tools.query_stock(
-                code=arguments.get("code", "")
-            ),
-            "stork_screen_stocks": lambda: tools.screen_stocks(
-                criteria=arguments.get("criteria", {}),
-                page=arguments.get("page", 1),
-                page_size=arguments.get("page_size", 50)
-            ),
-            "stork_next_page": lambda: tools.next_page(),
-            "stork_prev_page": lambda: tools.prev_page(),
-            "stork_export_current_result": lambda: tools.export_current_result(
-                format=arguments.get("format", "csv")
-            ),
-            "stork_compare_stocks": lambda: tools.compare_stocks(
-                codes=arguments.get("codes", []),
-                days=arguments.get("days", 30)
-            ),
-            "stork_get_stock_history": lambda: tools.get_stock_history(
-                code=arguments.get("code", ""),
-                days=arguments.get("days", 30),
-                period=arguments.get("period", "daily")
-            ),
-            "stork_search_stocks": lambda: tools.search_stocks(
-                keyword=arguments.get("keyword", ""),
-                limit=arguments.get("limit", 10)
-            ),
-            "stork_get_financials": lambda: tools.get_financials(
-                code=arguments.get("code", "")
-            ),
-            "stork_calculate_indicator": lambda: tools.calculate_indicator(
-                code=arguments.get("code", ""),
-                indicator=arguments.get("indicator", ""),
-                period=arguments.get("period", 20)
-            ),
-            "stork_get_market_summary": lambda: tools.get_market_summary(),
-        }
-
-        if name not in tool_functions:
+        if name not in TOOL_DISPATCH:
             return [TextContent(
                 type="text",
                 text=f"未知工具: {name}"
             )]
 
-        # 执行工具函数
-        result = tool_functions[name]()
+        function_name, defaults = TOOL_DISPATCH[name]
+        tool_function = getattr(tools, function_name)
+        # 默认值可能被工具函数修改（如 criteria），每次调用使用副本
+        kwargs = {
+            key: arguments[key] if key in arguments else copy.copy(default)
+            for key, default in defaults.items()
+        }
+
+        # 工具函数是阻塞的网络调用，放到线程中执行，避免阻塞事件循环，
+        # 使同一会话中的并发工具调用可以重叠等待
+        result = await asyncio.to_thread(tool_function, **kwargs)
 
         return [TextContent(
             type="text",
@@ -254,8 +247,10 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         )]
 
     except Exception as e:
-        import traceback
-        error_msg = f"工具执行出错 ({name}): {str(e)}\n\n{traceback.format_exc()}"
+        error_msg = f"工具执行出错 ({name}): {str(e)}"
+        details = debug_traceback()
+        if details:
+            error_msg += f"\n\n{details}"
         return [TextContent(
             type="text",
             text=error_msg
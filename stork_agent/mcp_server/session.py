@@ -4,10 +4,22 @@ MCP 会话状态管理
 管理查询状态，支持分页和导出功能
 """
 
+import pickle
+import threading
+from abc import ABC, abstractmethod
 import time
+import pandas as pd
+from collections import OrderedDict
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 
+from stork_agent.config import Config
+
+try:
+    import redis
+except ImportError:  # 可选依赖，仅 SESSION_BACKEND=redis 时需要
+    redis = None
+
 
 class QuerySession:
     """管理查询状态，支持分页和导出"""
@@ -28,6 +40,19 @@ class QuerySession:
         self.session_timeout: int = session_timeout
         self.last_activity: float = time.time()
         self.query_criteria: Optional[Dict] = None
+        # 数据源分页的查询：结果的股票代码列表，决定结果的顺序和总数
+        self.result_codes: Optional[List[str]] = None
+        # 已切出的页：页码 -> 该页数据，查询变更时清空
+        self._page_cache: Dict[int, List[Dict]] = {}
+        # 完整数据的列式视图，首次导出时构建，查询变更时清空
+        self._frame: Optional[pd.DataFrame] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """序列化时不保存分页缓存和列式视图，读取后按需重建"""
+        state = self.__dict__.copy()
+        state["_page_cache"] = {}
+        state["_frame"] = None
+        return state
 
     def is_expired(self) -> bool:
         """
@@ -61,25 +86,104 @@ class QuerySession:
         self.current_query = query
         self.complete_data = data
         self.query_criteria = criteria
+        self.result_codes = None
         self.total_count = len(data)
         self.page_size = page_size
         self.total_pages = (self.total_count + page_size - 1) // page_size
         self.current_page = 1
+        self._page_cache = {}
+        self._frame = None
         self.update_activity()
 
+    def set_paged_query(
+        self,
+        query: str,
+        criteria: Dict,
+        codes: List[str],
+        page_size: int = 50
+    ) -> None:
+        """
+        设置由数据源分页的查询
+
+        只保存结果的股票代码列表，不保存各行数据；各页数据由调用方
+        按 get_current_codes() 向数据源获取。代码列表在查询期间固定，
+        各页既不重复也不遗漏，总页数与各页内容一致
+
+        Args:
+            query: 查询描述
+            criteria: 查询条件
+            codes: 结果的股票代码列表（按结果顺序）
+            page_size: 每页数量
+        """
+        self.set_query(query, [], criteria, page_size)
+        self.complete_data = None
+        self.result_codes = codes
+        self.total_count = len(codes)
+        self.total_pages = (self.total_count + page_size - 1) // page_size
+
+    def get_current_codes(self) -> List[str]:
+        """
+        获取数据源分页的查询当前页的股票代码
+
+        Returns:
+            当前页的股票代码列表，不是数据源分页的查询时为空列表
+        """
+        if self.result_codes is None:
+            return []
+        start = (self.current_page - 1) * self.page_size
+        return self.result_codes[start:start + self.page_size]
+
+    def has_query(self) -> bool:
+        """
+        是否有正在进行的查询
+
+        Returns:
+            设置过查询且未清除时为 True
+        """
+        return self.current_query is not None
+
+    def is_paged(self) -> bool:
+        """
+        当前查询是否由数据源分页
+
+        Returns:
+            保存的是结果代码列表而非完整数据时为 True
+        """
+        return self.result_codes is not None
+
     def get_current_page(self) -> List[Dict]:
         """
         获取当前页数据
 
+        每页只切片一次，重复访问同一页时复用已切出的列表
+
         Returns:
             当前页数据
         """
         if self.complete_data is None:
             return []
 
-        start = (self.current_page - 1) * self.page_size
-        end = start + self.page_size
-        return self.complete_data[start:end]
+        page = self._page_cache.get(self.current_page)
+        if page is None:
+            start = (self.current_page - 1) * self.page_size
+            page = self.complete_data[start:start + self.page_size]
+            self._page_cache[self.current_page] = page
+        return page
+
+    def get_frame(self) -> Optional[pd.DataFrame]:
+        """
+        获取完整数据的列式视图
+
+        只在首次调用时由 complete_data 构建，同一查询多次导出时复用
+
+        Returns:
+            完整数据的 DataFrame，没有数据时为 None
+        """
+        if self.complete_data is None:
+            return None
+        if self._frame is None:
+            self._frame = pd.DataFrame(self.complete_data)
+        return self._frame
 
     def next_page(self) -> List[Dict]:
         """
@@ -144,10 +248,187 @@ class QuerySession:
         self.total_count = 0
         self.complete_data = None
         self.query_criteria = None
+        self.result_codes = None
+        self._page_cache = {}
+        self._frame = None
+
+
+# 会话数量上限，超出时淘汰最久未活动的会话
+MAX_SESSIONS = 1024
+
+
+class SessionBackend(ABC):
+    """会话存储后端接口"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[QuerySession]:
+        """
+        读取会话
+
+        Args:
+            session_id: 会话 ID
+
+        Returns:
+            会话对象，不存在时为 None
+        """
+
+    @abstractmethod
+    def put(self, session_id: str, session: QuerySession) -> None:
+        """
+        保存会话
+
+        Args:
+            session_id: 会话 ID
+            session: 会话对象
+        """
+
+    @abstractmethod
+    def touch(self, session_id: str, session: QuerySession) -> None:
+        """
+        刷新已保存会话的最近访问时间，不重写会话内容
 
+        Args:
+            session_id: 会话 ID
+            session: 会话对象
+        """
 
-# 全局会话管理器
-_sessions: Dict[str, QuerySession] = {}
+    @abstractmethod
+    def delete(self, session_id: str) -> Optional[QuerySession]:
+        """
+        删除会话
+
+        Args:
+            session_id: 会话 ID
+
+        Returns:
+            被删除的会话对象，不存在时为 None
+        """
+
+    @abstractmethod
+    def cleanup_expired(self) -> int:
+        """
+        清理过期会话
+
+        Returns:
+            清理的会话数量
+        """
+
+
+class InMemoryBackend(SessionBackend):
+    """进程内会话存储，适用于单进程的 stdio 服务器"""
+
+    def __init__(self):
+        # 按最近访问顺序排列，最久未访问的会话在最前
+        self._sessions: "OrderedDict[str, QuerySession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_expired(self) -> int:
+        """
+        从最久未访问的一端淘汰过期会话
+
+        遇到第一个未过期的会话即停止，不扫描全部会话，调用方需持有 _lock
+
+        Returns:
+            淘汰的会话数量
+        """
+        evicted = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if not session.is_expired():
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def get(self, session_id: str) -> Optional[QuerySession]:
+        with self._lock:
+            self._evict_expired()
+            return self._sessions.get(session_id)
+
+    def put(self, session_id: str, session: QuerySession) -> None:
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            if len(self._sessions) > MAX_SESSIONS:
+                self._sessions.popitem(last=False)
+
+    def touch(self, session_id: str, session: QuerySession) -> None:
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+
+    def delete(self, session_id: str) -> Optional[QuerySession]:
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def cleanup_expired(self) -> int:
+        with self._lock:
+            return self._evict_expired()
+
+
+class RedisBackend(SessionBackend):
+    """
+    Redis 会话存储，多个服务进程共享会话
+
+    会话以 pickle 序列化保存，过期由 Redis 键的 TTL 负责：键存在即未过期，
+    读取时刷新会话的活动时间，访问时只续期键而不重写会话
+    """
+
+    def __init__(self, client: Any, prefix: str = "stork:session:"):
+        """
+        初始化 Redis 后端
+
+        Args:
+            client: redis.Redis 客户端
+            prefix: 会话键前缀
+        """
+        self._client = client
+        self._prefix = prefix
+
+    def get(self, session_id: str) -> Optional[QuerySession]:
+        data = self._client.get(self._prefix + session_id)
+        if data is None:
+            return None
+        session = pickle.loads(data)
+        session.update_activity()
+        return session
+
+    def put(self, session_id: str, session: QuerySession) -> None:
+        self._client.setex(
+            self._prefix + session_id,
+            session.session_timeout,
+            pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+
+    def touch(self, session_id: str, session: QuerySession) -> None:
+        self._client.expire(self._prefix + session_id, session.session_timeout)
+
+    def delete(self, session_id: str) -> Optional[QuerySession]:
+        session = self.get(session_id)
+        self._client.delete(self._prefix + session_id)
+        return session
+
+    def cleanup_expired(self) -> int:
+        # 过期键由 Redis 自动删除
+        return 0
+
+
+def _create_backend() -> SessionBackend:
+    """
+    按配置创建会话存储后端
+
+    Returns:
+        SESSION_BACKEND 为 redis 时返回 RedisBackend，否则返回 InMemoryBackend
+    """
+    if Config.SESSION_BACKEND == "redis":
+        if redis is None:
+            raise ImportError("SESSION_BACKEND=redis 需要安装 redis 包")
+        return RedisBackend(redis.Redis.from_url(Config.REDIS_URL))
+    return InMemoryBackend()
+
+
+# 全局会话存储
+_backend: SessionBackend = _create_backend()
 
 
 def get_session(session_id: str = "default") -> QuerySession:
@@ -160,16 +441,27 @@ def get_session(session_id: str = "default") -> QuerySession:
     Returns:
         会话对象
     """
-    if session_id not in _sessions:
-        _sessions[session_id] = QuerySession()
+    session = _backend.get(session_id)
+    if session is None or session.is_expired():
+        session = QuerySession()
+        _backend.put(session_id, session)
     else:
-        # 检查是否过期
-        if _sessions[session_id].is_expired():
-            _sessions[session_id] = QuerySession()
-        else:
-            _sessions[session_id].update_activity()
+        session.update_activity()
+        _backend.touch(session_id, session)
+    return session
 
-    return _sessions[session_id]
+
+def save_session(session_id: str, session: QuerySession) -> None:
+    """
+    保存修改后的会话
+
+    进程内存储中会话对象本身即为存储内容；其他后端需要在修改后写回
+
+    Args:
+        session_id: 会话 ID
+        session: 会话对象
+    """
+    _backend.put(session_id, session)
 
 
 def clear_session(session_id: str = "default") -> None:
@@ -179,9 +471,9 @@ def clear_session(session_id: str = "default") -> None:
     Args:
         session_id: 会话 ID
     """
-    if session_id in _sessions:
-        _sessions[session_id].clear()
-        del _sessions[session_id]
+    session = _backend.delete(session_id)
+    if session is not None:
+        session.clear()
 
 
 def cleanup_expired_sessions() -> int:
@@ -191,12 +483,4 @@ def cleanup_expired_sessions() -> int:
     Returns:
         清理的会话数量
     """
-    expired = [
-        sid for sid, session in _sessions.items()
-        if session.is_expired()
-    ]
-
-    for sid in expired:
-        del _sessions[sid]
-
-    return len(expired)
+    return _backend.cleanup_expired()
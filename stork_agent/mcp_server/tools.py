@@ -5,13 +5,12 @@ MCP 工具映射
 """
 
 from typing import Dict, List, Optional
-import traceback
 
 from stork_agent.agent import tools as agent_tools
 from stork_agent.responder import generator, chart_decider, exporter
 from stork_agent.responder.formatter import format_chart_response
-from stork_agent.mcp_server.session import get_session
-from stork_agent.cache.manager import get_cache_manager
+from stork_agent.mcp_server.session import get_session, save_session
+from stork_agent.utils.helpers import debug_traceback
 
 
 def query_stock(code: str, session_id: str = "default") -> str:
@@ -26,14 +25,7 @@ def query_stock(code: str, session_id: str = "default") -> str:
         格式化后的文本回复
     """
     try:
-        # 检查缓存
-        cache = get_cache_manager()
-        cache_key = cache._generate_key("realtime", {"code": code})
-        cached = cache.get(cache_key, cache.TTL_REALTIME)
-        if cached:
-            return generator.generate_response("realtime", cached)
-
-        # 获取数据
+        # 获取数据（数据层已缓存实时行情）
         result = agent_tools.get_stock_realtime(code)
 
         if not result.success:
@@ -42,14 +34,66 @@ def query_stock(code: str, session_id: str = "default") -> str:
                 f"股票代码: {code}"
             )
 
-        # 缓存结果
-        cache.set(cache_key, result.data, ttl=cache.TTL_REALTIME)
-
         # 生成回复
         return generator.generate_response("realtime", result.data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
+
+
+# 筛选条件中由分页决定的字段，不参与筛选
+PAGING_FIELDS = ("limit",)
+
+
+def _screen_codes(criteria: Dict) -> List[str]:
+    """
+    取满足筛选条件的全部股票代码
+
+    Args:
+        criteria: 筛选条件字典（不含分页字段）
+
+    Returns:
+        按代码排序的股票代码列表
+    """
+    result = agent_tools.screen_codes(criteria)
+    if not result.success:
+        raise Exception(result.error or "筛选失败")
+    return result.data["codes"]
+
+
+def _stock_briefs(codes: List[str]) -> List[Dict]:
+    """
+    按代码向数据源获取股票简要信息
+
+    Args:
+        codes: 股票代码列表
+
+    Returns:
+        股票列表，按传入顺序排列
+    """
+    if not codes:
+        return []
+    result = agent_tools.get_stock_briefs(codes)
+    if not result.success:
+        raise Exception(result.error or "获取股票信息失败")
+    return result.data["stocks"]
+
+
+def _current_page_stocks(session) -> List[Dict]:
+    """
+    获取会话当前页的数据
+
+    数据源分页的查询按当前页的股票代码向数据源获取，其余查询从会话保存的完整数据中切出
+
+    Args:
+        session: 查询会话
+
+    Returns:
+        当前页数据
+    """
+    if session.is_paged():
+        return _stock_briefs(session.get_current_codes())
+    return session.get_current_page()
 
 
 def screen_stocks(
@@ -61,6 +105,9 @@ def screen_stocks(
     """
     筛选股票，支持分页
 
+    结果按股票代码升序排列。筛选时只保存结果的股票代码列表（固定结果的顺序和总数），
+    只为请求的页获取行情数据，翻页时再按代码获取其他页
+
     Args:
         criteria: 筛选条件字典
         page: 页码
@@ -71,53 +118,35 @@ def screen_stocks(
         格式化后的文本回复
     """
     try:
-        # 检查缓存
-        cache = get_cache_manager()
-        cache_key = cache._generate_key("screen", criteria)
-        cached = cache.get(cache_key, cache.TTL_SCREENING)
-
-        all_stocks = []
-        if cached:
-            all_stocks = cached.get("stocks", [])
-        else:
-            # 执行筛选
-            criteria["limit"] = 5000  # 获取更多数据用于分页
-            result = agent_tools.screen_stocks(criteria)
+        criteria = {key: value for key, value in criteria.items() if key not in PAGING_FIELDS}
+        codes = _screen_codes(criteria)
 
-            if not result.success:
-                return generator.generate_error_response(
-                    result.error or "筛选失败",
-                    str(criteria)
-                )
-
-            all_stocks = result.data.get("stocks", [])
-            # 缓存完整结果
-            cache.set(cache_key, {"stocks": all_stocks})
-
-        # 更新会话状态
+        # 更新会话状态：只记录条件和结果代码列表
         session = get_session(session_id)
-        session.set_query(
+        session.set_paged_query(
             query="screen",
-            data=all_stocks,
             criteria=criteria,
+            codes=codes,
             page_size=page_size
         )
+        session.goto_page(page)
+        save_session(session_id, session)
 
         # 获取当前页数据
-        page_stocks = session.goto_page(page)
+        page_stocks = _current_page_stocks(session)
 
         # 生成回复
         response_data = {
             "stocks": page_stocks,
-            "page": page,
+            "page": session.current_page,
             "page_size": page_size,
-            "total": len(all_stocks),
+            "total": session.total_count,
         }
 
         return generator.generate_response("screen", response_data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 def next_page(session_id: str = "default") -> str:
@@ -133,20 +162,22 @@ def next_page(session_id: str = "default") -> str:
     try:
         session = get_session(session_id)
 
-        if session.complete_data is None:
+        if not session.has_query():
             return "没有正在进行的查询。请先执行筛选或搜索操作。"
 
-        if not session.get_page_info()["has_next"]:
-            page_info = session.get_page_info()
+        page_info = session.get_page_info()
+        if not page_info["has_next"]:
             return f"已经是最后一页了（第 {page_info['current_page']}/{page_info['total_pages']} 页）"
 
         # 获取下一页
-        page_stocks = session.next_page()
-        page_info = session.get_page_info()
+        session.next_page()
+        save_session(session_id, session)
+        page_stocks = _current_page_stocks(session)
 
+        # 翻页只改变页码，页大小和总数沿用翻页前的分页信息
         response_data = {
             "stocks": page_stocks,
-            "page": page_info["current_page"],
+            "page": session.current_page,
             "page_size": page_info["page_size"],
             "total": page_info["total_count"],
         }
@@ -154,7 +185,7 @@ def next_page(session_id: str = "default") -> str:
         return generator.generate_response("screen", response_data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 def prev_page(session_id: str = "default") -> str:
@@ -170,19 +201,22 @@ def prev_page(session_id: str = "default") -> str:
     try:
         session = get_session(session_id)
 
-        if session.complete_data is None:
+        if not session.has_query():
             return "没有正在进行的查询。请先执行筛选或搜索操作。"
 
-        if not session.get_page_info()["has_prev"]:
+        page_info = session.get_page_info()
+        if not page_info["has_prev"]:
             return "已经是第一页了。"
 
         # 获取上一页
-        page_stocks = session.prev_page()
-        page_info = session.get_page_info()
+        session.prev_page()
+        save_session(session_id, session)
+        page_stocks = _current_page_stocks(session)
 
+        # 翻页只改变页码，页大小和总数沿用翻页前的分页信息
         response_data = {
             "stocks": page_stocks,
-            "page": page_info["current_page"],
+            "page": session.current_page,
             "page_size": page_info["page_size"],
             "total": page_info["total_count"],
         }
@@ -190,7 +224,7 @@ def prev_page(session_id: str = "default") -> str:
         return generator.generate_response("screen", response_data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 def export_current_result(
@@ -200,6 +234,8 @@ def export_current_result(
     """
     导出当前查询的完整数据
 
+    数据源分页的查询在导出时才按保存的代码列表获取全部结果
+
     Args:
         format: 导出格式 (csv, excel, json)
         session_id: 会话 ID
@@ -210,26 +246,35 @@ def export_current_result(
     try:
         session = get_session(session_id)
 
-        if session.complete_data is None:
+        if not session.has_query():
             return "没有可导出的数据。请先执行筛选或搜索操作。"
 
+        if session.is_paged():
+            rows = _stock_briefs(session.result_codes)
+            frame = None
+        else:
+            rows = session.complete_data
+            # 只有 Excel 导出需要 DataFrame，复用会话中已构建的列式视图
+            frame = session.get_frame() if format.lower() == "excel" else None
+
         # 根据查询类型选择导出方式
         if session.current_query == "screen":
             filepath = exporter.export_stock_list(
-                session.complete_data,
+                rows,
                 session.query_criteria,
-                format
+                format,
+                frame=frame
             )
         else:
-            filepath = exporter.export_data(session.complete_data, format)
+            filepath = exporter.export_data(rows, format, frame=frame)
 
         return generator.generate_success_response(
             f"数据已导出到: {filepath}",
-            {"filepath": filepath, "rows": len(session.complete_data)}
+            {"filepath": filepath, "rows": len(rows)}
         )
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 def compare_stocks(codes: List[str], days: int = 30) -> str:
@@ -255,7 +300,7 @@ def compare_stocks(codes: List[str], days: int = 30) -> str:
         return generator.generate_response("compare", result.data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 def get_stock_history(code: str, days: int = 30, period: str = "daily") -> str:
@@ -282,7 +327,7 @@ def get_stock_history(code: str, days: int = 30, period: str = "daily") -> str:
         return generator.generate_response("history", result.data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 def search_stocks(keyword: str, limit: int = 10, session_id: str = "default") -> str:
@@ -310,11 +355,12 @@ def search_stocks(keyword: str, limit: int = 10, session_id: str = "default") ->
         stocks = result.data.get("stocks", [])
         session = get_session(session_id)
         session.set_query("search", stocks, {"keyword": keyword}, page_size=limit)
+        save_session(session_id, session)
 
         return generator.generate_response("search", result.data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 def get_financials(code: str) -> str:
@@ -339,10 +385,15 @@ def get_financials(code: str) -> str:
         return generator.generate_response("financial", result.data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
-def calculate_indicator(code: str, indicator: str, period: int = 20) -> str:
+def calculate_indicator(
+    code: str,
+    indicator: str,
+    period: int = 20,
+    tail: Optional[int] = None
+) -> str:
     """
     计算技术指标
 
@@ -350,12 +401,13 @@ def calculate_indicator(code: str, indicator: str, period: int = 20) -> str:
         code: 股票代码
         indicator: 指标类型 (ma, macd, rsi, boll)
         period: 计算周期
+        tail: 只返回最近的 N 个数据点
 
     Returns:
         格式化后的指标数据
     """
     try:
-        result = agent_tools.calculate_indicator(code, indicator, period)
+        result = agent_tools.calculate_indicator(code, indicator, period, tail=tail)
 
         if not result.success:
             return generator.generate_error_response(
@@ -366,7 +418,7 @@ def calculate_indicator(code: str, indicator: str, period: int = 20) -> str:
         return generator.generate_response("indicator", result.data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 def get_market_summary() -> str:
@@ -387,7 +439,7 @@ def get_market_summary() -> str:
         return generator.generate_response("market", result.data)
 
     except Exception as e:
-        return generator.generate_error_response(str(e), traceback.format_exc())
+        return generator.generate_error_response(str(e), debug_traceback())
 
 
 # 导出所有工具函数
@@ -4,7 +4,92 @@
 根据查询意图和数据特征，决定是否生成图表以及生成何种类型的图表
 """
 
-from typing import Dict, Optional
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional
+
+
+# 意图关键词（均为小写）按类别分组；"chart" 类表示需要生成图表，
+# "title_" 开头的类别决定图表标题后缀
+INTENT_KEYWORDS = {
+    "chart": frozenset({
+        "kline", "candlestick", "ohlc",
+        "chart", "plot", "graph",
+        "trend", "走势",
+        "对比", "compare", "comparison",
+        "份额", "占比", "proportion", "share",
+        "macd", "rsi", "boll",
+    }),
+    "kline": frozenset({"kline", "candlestick", "ohlc", "蜡烛", "k线"}),
+    "pie": frozenset({"份额", "占比", "比例", "proportion", "share", "pie", "饼图"}),
+    "bar": frozenset({"对比", "compare", "comparison", "bar"}),
+    "indicator": frozenset({"macd", "rsi", "boll", "kdj", "指标"}),
+    "title_kline": frozenset({"kline", "candlestick"}),
+    "title_trend": frozenset({"trend", "走势"}),
+    "title_macd": frozenset({"macd"}),
+    "title_rsi": frozenset({"rsi"}),
+    "title_boll": frozenset({"boll"}),
+    "title_compare": frozenset({"对比", "compare"}),
+}
+
+# 图表标题后缀，按优先级排列：(类别, 后缀)
+CHART_TITLE_SUFFIXES = (
+    ("title_kline", "K线图"),
+    ("title_trend", "价格走势"),
+    ("title_macd", "MACD指标"),
+    ("title_rsi", "RSI指标"),
+    ("title_boll", "布林带"),
+)
+
+
+def _build_keyword_categories() -> Dict[str, FrozenSet[str]]:
+    """
+    构建关键词到类别的映射
+
+    匹配时每个位置只取最长的关键词，因此每个关键词同时带上
+    以它为前缀的更短关键词的类别
+
+    Returns:
+        关键词 -> 类别集合
+    """
+    categories: Dict[str, set] = {}
+    for category, keywords in INTENT_KEYWORDS.items():
+        for keyword in keywords:
+            categories.setdefault(keyword, set()).add(category)
+
+    return {
+        keyword: frozenset().union(*(
+            categories[prefix] for prefix in categories if keyword.startswith(prefix)
+        ))
+        for keyword in categories
+    }
+
+
+_KEYWORD_CATEGORIES = _build_keyword_categories()
+
+# 全部关键词合成一个模式，零宽前瞻使一次扫描即可找出所有（可重叠的）关键词
+_INTENT_PATTERN = re.compile("(?=(%s))" % "|".join(
+    re.escape(keyword) for keyword in sorted(_KEYWORD_CATEGORIES, key=len, reverse=True)
+))
+
+
+@lru_cache(maxsize=256)
+def _intent_categories(intent: str) -> FrozenSet[str]:
+    """
+    扫描一次意图文本，返回其中出现的关键词类别
+
+    意图取值有限且反复出现，结果按原始文本缓存
+
+    Args:
+        intent: 查询意图
+
+    Returns:
+        命中的类别集合
+    """
+    categories = frozenset()
+    for match in _INTENT_PATTERN.finditer(intent.lower()):
+        categories |= _KEYWORD_CATEGORIES[match.group(1)]
+    return categories
 
 
 def should_generate_chart(intent: str, data: Optional[Dict] = None) -> bool:
@@ -18,22 +103,9 @@ def should_generate_chart(intent: str, data: Optional[Dict] = None) -> bool:
     Returns:
         是否需要生成图表
     """
-    intent = intent.lower()
-
     # 明确需要图表的意图
-    chart_intents = {
-        "kline", "candlestick", "ohlc",
-        "chart", "plot", "graph",
-        "trend", "走势",
-        "对比", "compare", "comparison",
-        "份额", "占比", "proportion", "share",
-        "macd", "rsi", "boll",
-    }
-
-    # 检查意图关键词
-    for keyword in chart_intents:
-        if keyword in intent:
-            return True
+    if "chart" in _intent_categories(intent):
+        return True
 
     # 检查数据特征
     if data:
@@ -65,28 +137,39 @@ def get_chart_type(intent: str, data: Optional[Dict] = None) -> str:
     Returns:
         图表类型: 'kline', 'line', 'bar', 'pie', 'indicator'
     """
-    intent = intent.lower()
+    # 数据只影响是否为多只股票对比
+    multi_stock = bool(data) and "stocks" in data and len(data.get("stocks", [])) > 1
+    return _chart_type_for(intent, multi_stock)
+
+
+@lru_cache(maxsize=512)
+def _chart_type_for(intent: str, multi_stock: bool) -> str:
+    """
+    按意图和是否为多只股票对比判断图表类型，结果缓存
+
+    Args:
+        intent: 查询意图
+        multi_stock: 数据是否包含多只股票
+
+    Returns:
+        图表类型
+    """
+    categories = _intent_categories(intent)
 
     # K线图
-    kline_keywords = {"kline", "candlestick", "ohlc", "蜡烛", "k线"}
-    if any(kw in intent for kw in kline_keywords):
+    if "kline" in categories:
         return "kline"
 
     # 饼图（份额、占比）
-    pie_keywords = {"份额", "占比", "比例", "proportion", "share", "pie", "饼图"}
-    if any(kw in intent for kw in pie_keywords):
+    if "pie" in categories:
         return "pie"
 
-    # 柱状图（对比）
-    bar_keywords = {"对比", "compare", "comparison", "bar"}
-    if any(kw in intent for kw in bar_keywords):
-        # 如果有多个股票对比数据
-        if data and "stocks" in data and len(data.get("stocks", [])) > 1:
-            return "bar"
+    # 柱状图（对比），需要有多个股票对比数据
+    if "bar" in categories and multi_stock:
+        return "bar"
 
     # 技术指标
-    indicator_keywords = {"macd", "rsi", "boll", "kdj", "指标"}
-    if any(kw in intent for kw in indicator_keywords):
+    if "indicator" in categories:
         return "indicator"
 
     # 默认折线图（时间序列）
@@ -105,38 +188,43 @@ def get_chart_title(intent: str, data: Optional[Dict] = None) -> str:
         图表标题
     """
     if data:
-        name = data.get("name", "")
-        code = data.get("code", "")
-
-        if name and code:
-            base_title = f"{name} ({code})"
-        elif code:
-            base_title = f"股票 {code}"
-        elif name:
-            base_title = name
-        else:
-            base_title = "股票数据"
-
-        # 根据意图添加后缀
-        intent = intent.lower()
-        if "kline" in intent or "candlestick" in intent:
-            return f"{base_title} - K线图"
-        elif "trend" in intent or "走势" in intent:
-            return f"{base_title} - 价格走势"
-        elif "macd" in intent:
-            return f"{base_title} - MACD指标"
-        elif "rsi" in intent:
-            return f"{base_title} - RSI指标"
-        elif "boll" in intent:
-            return f"{base_title} - 布林带"
-        elif "对比" in intent or "compare" in intent:
-            return "股票指标对比"
-        else:
-            return base_title
+        return _title_for(intent, data.get("name", ""), data.get("code", ""))
 
     return "股票图表"
 
 
+@lru_cache(maxsize=512)
+def _title_for(intent: str, name: str, code: str) -> str:
+    """
+    按意图、股票名称和代码生成图表标题，结果缓存
+
+    Args:
+        intent: 查询意图
+        name: 股票名称
+        code: 股票代码
+
+    Returns:
+        图表标题
+    """
+    if name and code:
+        base_title = f"{name} ({code})"
+    elif code:
+        base_title = f"股票 {code}"
+    elif name:
+        base_title = name
+    else:
+        base_title = "股票数据"
+
+    # 根据意图添加后缀
+    categories = _intent_categories(intent)
+    for category, suffix in CHART_TITLE_SUFFIXES:
+        if category in categories:
+            return f"{base_title} - {suffix}"
+    if "title_compare" in categories:
+        return "股票指标对比"
+    return base_title
+
+
 def get_max_data_points(chart_type: str) -> int:
     """
     获取不同图表类型的最大数据点数
@@ -5,20 +5,53 @@
 """
 
 import os
-import json
+import csv
+import time
+import openpyxl
 import pandas as pd
-from typing import Dict, List, Union, Optional
-from datetime import datetime
+from typing import Dict, List, Tuple, Union, Optional
 from pathlib import Path
 
 from stork_agent.config import Config
+from stork_agent.utils.helpers import read_json, write_json
+
+try:
+    import xlsxwriter
+except ImportError:  # 可选依赖，未安装时 Excel 导出使用 openpyxl
+    xlsxwriter = None
+
+
+# 统计 CSV 行数时每次读取的字节数
+CSV_COUNT_CHUNK_SIZE = 1024 * 1024
+
+# 最近一次生成的文件名时间戳：(秒级时间, 时间戳字符串)
+_timestamp_cache = (0, "")
+
+
+def _timestamp() -> str:
+    """
+    当前时间的文件名时间戳（%Y%m%d_%H%M%S）
+
+    同一秒内的多次导出复用已格式化的字符串
+
+    Returns:
+        时间戳字符串
+    """
+    global _timestamp_cache
+    now = int(time.time())
+    second, text = _timestamp_cache
+    if now != second:
+        text = time.strftime("%Y%m%d_%H%M%S", time.localtime(now))
+        _timestamp_cache = (now, text)
+    return text
 
 
 def export_data(
     data: Union[Dict, List],
     format: str = "csv",
     filename: Optional[str] = None,
-    export_dir: Optional[str] = None
+    export_dir: Optional[str] = None,
+    frame: Optional[pd.DataFrame] = None
 ) -> str:
     """
     导出数据到文件
@@ -28,6 +61,8 @@ def export_data(
         format: 导出格式 - csv, excel, json
         filename: 文件名（不含扩展名），默认自动生成
         export_dir: 导出目录，默认为 output/exports/
+        frame: data 对应的 DataFrame（可选），提供时 Excel 导出直接使用，
+            不再由 data 重新构建
 
     Returns:
         导出文件的绝对路径
@@ -43,66 +78,152 @@ def export_data(
 
     # 生成文件名
     if filename is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"export_{timestamp}"
+        filename = f"export_{_timestamp()}"
 
     # 添加扩展名
     extensions = {"csv": ".csv", "excel": ".xlsx", "json": ".json"}
     filepath = os.path.join(export_dir, f"{filename}{extensions[format]}")
 
-    # 转换数据为 DataFrame
-    df = _data_to_dataframe(data)
-
-    # 导出
+    # 导出：CSV 和 JSON 直接写原始数据，只有 Excel 需要 DataFrame
     if format == "csv":
-        df.to_csv(filepath, index=False, encoding="utf-8-sig")
+        _write_csv_rows(filepath, _data_rows(data))
     elif format == "excel":
-        df.to_excel(filepath, index=False, engine="openpyxl")
+        if frame is None:
+            frame = _data_to_dataframe(data)
+        if xlsxwriter is not None:
+            _write_excel_rows(filepath, frame)
+        else:
+            frame.to_excel(filepath, index=False, engine="openpyxl")
     elif format == "json":
-        with open(filepath, "w", encoding="utf-8") as f:
-            if isinstance(data, dict):
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            else:
-                json.dump({"data": data}, f, ensure_ascii=False, indent=2)
+        write_json(filepath, data if isinstance(data, dict) else {"data": data})
 
     return os.path.abspath(filepath)
 
 
-def _data_to_dataframe(data: Union[Dict, List]) -> pd.DataFrame:
+def _write_excel_rows(filepath: str, frame: pd.DataFrame) -> None:
     """
-    将数据转换为 DataFrame
+    使用 xlsxwriter 的 constant_memory 模式逐行写入 Excel
+
+    constant_memory 模式每写完一行即刷到临时文件，不在内存中保留整个工作表，
+    但要求严格按行顺序写入；DataFrame.to_excel 按列生成单元格，
+    因此这里直接逐行写入
+
+    Args:
+        filepath: 文件路径
+        frame: 要导出的 DataFrame
+    """
+    workbook = xlsxwriter.Workbook(filepath, {
+        "constant_memory": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+        "default_date_format": "yyyy-mm-dd",
+    })
+    try:
+        worksheet = workbook.add_worksheet()
+        header_format = workbook.add_format({"bold": True})
+        worksheet.write_row(0, 0, [str(column) for column in frame.columns], header_format)
+        for row_index, row in enumerate(frame.itertuples(index=False, name=None), start=1):
+            # 缺失值写为空单元格，与 to_excel 一致
+            worksheet.write_row(row_index, 0, [
+                None if value is pd.NA or value is pd.NaT
+                or (isinstance(value, float) and value != value) else value
+                for value in row
+            ])
+    finally:
+        workbook.close()
+
+
+def _data_rows(data: Union[Dict, List]) -> List:
+    """
+    取出数据中的行列表
 
     Args:
         data: 数据（字典或列表）
 
     Returns:
-        DataFrame
+        行列表，每行为一个字典
     """
     if isinstance(data, list):
-        # 列表数据直接转换
-        return pd.DataFrame(data)
+        # 列表数据直接使用
+        return data
     elif isinstance(data, dict):
         # 字典数据处理
         if "stocks" in data and isinstance(data["stocks"], list):
             # 股票列表
-            return pd.DataFrame(data["stocks"])
+            return data["stocks"]
         elif "data" in data and isinstance(data["data"], list):
             # 历史数据等
-            return pd.DataFrame(data["data"])
+            return data["data"]
         elif "stocks" in data and isinstance(data["stocks"], dict):
             # 对比数据
-            return pd.DataFrame(data["stocks"]["stocks"])
+            return data["stocks"]["stocks"]
         else:
-            # 单条数据，转为单行 DataFrame
-            return pd.DataFrame([data])
+            # 单条数据，作为一行
+            return [data]
     else:
-        return pd.DataFrame()
+        return []
+
+
+def _data_to_dataframe(data: Union[Dict, List]) -> pd.DataFrame:
+    """
+    将数据转换为 DataFrame
+
+    Args:
+        data: 数据（字典或列表）
+
+    Returns:
+        DataFrame
+    """
+    rows = _data_rows(data)
+    if rows and isinstance(rows[0], dict):
+        keys = rows[0].keys()
+        if all(isinstance(row, dict) and row.keys() == keys for row in rows):
+            # 各行字段相同时按列收集后整体构建，不逐行推断列
+            return pd.DataFrame({key: [row[key] for row in rows] for key in keys})
+    return pd.DataFrame(rows)
+
+
+def _write_csv_rows(filepath: str, rows: List[Dict]) -> None:
+    """
+    将行列表逐行写入 CSV 文件，不构建 DataFrame
+
+    列为各行字段按首次出现顺序的并集，缺失值和 NaN 写为空
+
+    Args:
+        filepath: 文件路径
+        rows: 行列表，每行为一个字典
+    """
+    with open(filepath, "w", encoding="utf-8-sig", newline="") as f:
+        if not rows:
+            f.write(os.linesep)
+            return
+
+        # value != value 仅对 NaN 成立
+        keys = tuple(rows[0])
+        if all(tuple(row) == keys for row in rows):
+            # 各行字段及顺序相同（常见情况）：按值序列写出，省去逐行按列名取值
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(keys)
+            writer.writerows(
+                ["" if value != value else value for value in row.values()]
+                for row in rows
+            )
+            return
+
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+        writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator=os.linesep)
+        writer.writeheader()
+        writer.writerows(
+            {key: "" if value != value else value for key, value in row.items()}
+            for row in rows
+        )
 
 
 def export_stock_list(
     stocks: List[Dict],
     criteria: Optional[Dict] = None,
-    format: str = "csv"
+    format: str = "csv",
+    frame: Optional[pd.DataFrame] = None
 ) -> str:
     """
     导出股票列表
@@ -111,6 +232,7 @@ def export_stock_list(
         stocks: 股票列表
         criteria: 筛选条件（用于文件名）
         format: 导出格式
+        frame: stocks 对应的 DataFrame（可选）
 
     Returns:
         导出文件路径
@@ -125,7 +247,7 @@ def export_stock_list(
     else:
         filename = "stock_list"
 
-    return export_data(stocks, format=format, filename=filename)
+    return export_data(stocks, format=format, filename=filename, frame=frame)
 
 
 def export_history_data(
@@ -143,7 +265,8 @@ def export_history_data(
         导出文件路径
     """
     code = data.get("code", "unknown")
-    filename = f"history_{code}_{datetime.now().strftime('%Y%m%d')}"
+    # 只取时间戳的日期部分
+    filename = f"history_{code}_{_timestamp()[:8]}"
 
     return export_data(data, format=format, filename=filename)
 
@@ -173,10 +296,90 @@ def export_comparison_data(
     return export_data(data, format=format, filename=filename)
 
 
+def _csv_shape(filepath: str) -> Tuple[int, int]:
+    """
+    统计 CSV 文件的数据行数和列数
+
+    列数由表头解析得到；行数按块读取文件统计换行符，不解析字段。
+    数据中有引号字段（值中可能含换行）时改为逐条解析记录计数
+
+    Args:
+        filepath: CSV 文件路径
+
+    Returns:
+        (数据行数, 列数)
+    """
+    with open(filepath, "rb") as f:
+        header_line = f.readline()
+        if not header_line:
+            return 0, 0
+        header = next(csv.reader([header_line.decode("utf-8-sig")]), [])
+
+        newlines = 0
+        quoted = False
+        last = header_line[-1:]
+        for chunk in iter(lambda: f.read(CSV_COUNT_CHUNK_SIZE), b""):
+            newlines += chunk.count(b"\n")
+            quoted = quoted or b'"' in chunk
+            last = chunk[-1:]
+
+    if not quoted:
+        # 最后一行没有换行时补 1
+        return newlines + (last != b"\n"), len(header)
+
+    with open(filepath, encoding="utf-8-sig", newline="") as f:
+        rows = sum(1 for record in csv.reader(f) if record) - 1
+    return max(rows, 0), len(header)
+
+
+def _excel_shape(filepath: str) -> Tuple[int, int]:
+    """
+    统计 Excel 文件第一个工作表的数据行数和列数
+
+    以只读模式打开，优先使用文件中记录的工作表尺寸
+
+    Args:
+        filepath: Excel 文件路径
+
+    Returns:
+        (数据行数, 列数)
+    """
+    workbook = openpyxl.load_workbook(filepath, read_only=True)
+    try:
+        worksheet = workbook.active
+        if not worksheet.max_row or not worksheet.max_column:
+            worksheet.calculate_dimension(force=True)
+        return max(worksheet.max_row - 1, 0), worksheet.max_column
+    finally:
+        workbook.close()
+
+
+def _json_shape(payload: Union[Dict, List]) -> Tuple[int, int]:
+    """
+    统计 JSON 导出数据的行数和列数
+
+    按导出时的规则（_data_rows）取出行列表
+
+    Args:
+        payload: JSON 文件内容
+
+    Returns:
+        (行数, 列数)，列数为各行字段的并集大小
+    """
+    rows = _data_rows(payload)
+    if all(isinstance(row, dict) for row in rows):
+        return len(rows), len(dict.fromkeys(key for row in rows for key in row))
+    # 其他结构与 DataFrame 的解释保持一致
+    df = pd.DataFrame(rows)
+    return len(df), len(df.columns)
+
+
 def get_export_summary(filepath: str) -> Dict:
     """
     获取导出文件的摘要信息
 
+    只统计行数和列数，不把文件读回 DataFrame
+
     Args:
         filepath: 导出文件路径
 
@@ -185,23 +388,21 @@ def get_export_summary(filepath: str) -> Dict:
     """
     path = Path(filepath)
 
-    # 读取数据
+    # 统计行列数
     if path.suffix == ".csv":
-        df = pd.read_csv(filepath)
+        rows, columns = _csv_shape(filepath)
     elif path.suffix == ".xlsx":
-        df = pd.read_excel(filepath)
+        rows, columns = _excel_shape(filepath)
     elif path.suffix == ".json":
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        df = pd.DataFrame(data.get("data", data))
+        rows, columns = _json_shape(read_json(filepath))
     else:
         return {"error": "不支持的文件格式"}
 
     return {
         "filepath": os.path.abspath(filepath),
         "filename": path.name,
-        "rows": len(df),
-        "columns": len(df.columns),
+        "rows": rows,
+        "columns": columns,
         "size_mb": path.stat().st_size / (1024 * 1024),
         "format": path.suffix[1:],
     }
@@ -127,6 +127,32 @@ def format_stock_quote(data: Dict) -> str:
     return "\n".join(lines)
 
 
+# 股票列表表头及分隔行
+STOCK_LIST_HEADER = "代码 | 名称 | 价格 | 涨跌幅 | PE | 市值"
+STOCK_LIST_SEPARATOR = "--- | --- | --- | --- | --- | ---"
+
+
+def _stock_list_row(stock: Dict) -> str:
+    """
+    格式化股票列表中的一行
+
+    Args:
+        stock: 股票数据字典
+
+    Returns:
+        以 " | " 分隔的表格行
+    """
+    price = stock.get("price", 0)
+    pe = stock.get("pe_ratio")
+    return (
+        f"{stock.get('code', '')} | {stock.get('name', '')} | "
+        f"¥{'N/A' if price is None else f'{price:.2f}'} | "
+        f"{format_percentage(stock.get('change_pct', 0))} | "
+        f"{'N/A' if pe is None else f'{pe:.2f}'} | "
+        f"{format_market_cap(stock.get('market_cap'))}"
+    )
+
+
 def format_stock_list(
     stocks: List[Dict],
     page: int = 1,
@@ -148,27 +174,12 @@ def format_stock_list(
     if not stocks:
         return "没有找到符合条件的股票。"
 
-    # 表头
-    headers = ["代码", "名称", "价格", "涨跌幅", "PE", "市值"]
-    rows = []
-
-    for stock in stocks:
-        row = [
-            stock.get("code", ""),
-            stock.get("name", ""),
-            f"¥{format_number(stock.get('price', 0))}",
-            format_percentage(stock.get("change_pct", 0)),
-            format_number(stock.get("pe_ratio")),
-            format_market_cap(stock.get("market_cap")),
-        ]
-        rows.append(row)
-
-    # 构建 Markdown 表格
-    lines = []
-    lines.append(" | ".join(headers))
-    lines.append(" | ".join(["---"] * len(headers)))
-    for row in rows:
-        lines.append(" | ".join(row))
+    # 构建 Markdown 表格：每行一个 f-string，所有行一次拼接
+    lines = [
+        STOCK_LIST_HEADER,
+        STOCK_LIST_SEPARATOR,
+        "\n".join(_stock_list_row(stock) for stock in stocks),
+    ]
 
     # 分页信息
     if total is not None and total > len(stocks):
@@ -180,6 +191,29 @@ def format_stock_list(
     return "\n".join(lines)
 
 
+def _format_text(value) -> str:
+    """文本指标：缺失时为 N/A"""
+    return str(value) if value is not None else "N/A"
+
+
+def _format_price(value: Optional[float]) -> str:
+    """价格指标：带人民币符号"""
+    return f"¥{format_number(value)}"
+
+
+# 对比表的指标：(字段, 列名, 格式化函数)
+COMPARISON_METRICS = [
+    ("code", "代码", _format_text),
+    ("name", "名称", _format_text),
+    ("price", "价格", _format_price),
+    ("change_pct", "涨跌幅", format_percentage),
+    ("pe_ratio", "PE", format_number),
+    ("pb_ratio", "PB", format_number),
+    ("roe", "ROE(%)", format_number),
+    ("market_cap", "市值(亿)", format_number),
+]
+
+
 def format_comparison(data: Dict) -> str:
     """
     格式化对比结果为 Markdown 表格
@@ -195,40 +229,17 @@ def format_comparison(data: Dict) -> str:
     if not stocks:
         return "没有可对比的股票数据。"
 
-    # 定义要对比的指标
-    metrics = [
-        ("code", "代码"),
-        ("name", "名称"),
-        ("price", "价格"),
-        ("change_pct", "涨跌幅"),
-        ("pe_ratio", "PE"),
-        ("pb_ratio", "PB"),
-        ("roe", "ROE(%)"),
-        ("market_cap", "市值(亿)"),
+    # 表头
+    lines = [
+        " | ".join(label for _, label, _ in COMPARISON_METRICS),
+        " | ".join(["---"] * len(COMPARISON_METRICS)),
     ]
 
-    # 表头
-    headers = [metric[1] for metric in metrics]
-    lines = []
-    lines.append(" | ".join(headers))
-    lines.append(" | ".join(["---"] * len(headers)))
-
-    # 数据行
-    for stock in stocks:
-        row = []
-        for key, _ in metrics:
-            value = stock.get(key)
-            if key == "change_pct":
-                row.append(format_percentage(value))
-            elif key == "market_cap":
-                row.append(format_number(value))
-            elif key in ["pe_ratio", "pb_ratio", "roe"]:
-                row.append(format_number(value))
-            elif key == "price":
-                row.append(f"¥{format_number(value)}")
-            else:
-                row.append(str(value) if value is not None else "N/A")
-        lines.append(" | ".join(row))
+    # 数据行：每个指标的格式化函数预先确定，逐行只做一次拼接
+    lines.extend(
+        " | ".join(fmt(stock.get(key)) for key, _, fmt in COMPARISON_METRICS)
+        for stock in stocks
+    )
 
     return "\n".join(lines)
 
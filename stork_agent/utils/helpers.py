@@ -5,8 +5,18 @@
 """
 
 import re
-from typing import Optional, List, Dict
-from datetime import datetime
+import json
+import math
+import traceback
+from typing import Any, Optional, List, Dict
+from datetime import date, datetime
+
+from stork_agent.config import Config
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
 
 
 def format_number(value: Optional[float], decimals: int = 2) -> str:
@@ -247,3 +257,106 @@ def truncate_string(s: str, max_length: int = 20, suffix: str = "...") -> str:
     if len(s) <= max_length:
         return s
     return s[:max_length - len(suffix)] + suffix
+
+
+def json_default(value: Any) -> Any:
+    """
+    JSON 编码的兜底处理：日期转 ISO 字符串，numpy 数值和数组转 Python 数值
+
+    write_json 与缓存管理器的 JSON 缓存共用此函数
+
+    Args:
+        value: json 无法直接编码的对象
+
+    Returns:
+        可编码的等价值
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def nan_to_none(value: Any) -> Any:
+    """
+    将数据中的 NaN 和无穷大替换为 None，与 orjson 写为 null 的行为一致
+
+    标准库 json 编码前调用，write_json 与缓存管理器的 JSON 缓存共用此函数
+
+    Args:
+        value: 要写入 JSON 的数据
+
+    Returns:
+        替换后的数据，字典和列表为新对象
+    """
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if isinstance(value, dict):
+        return {key: nan_to_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [nan_to_none(item) for item in value]
+    return value
+
+
+def write_json(filepath: str, data: Any) -> None:
+    """
+    将数据写入缩进格式的 JSON 文件
+
+    安装了 orjson 时直接编码为字节写入，否则使用标准库 json；两种方式写出的内容一致：
+    日期（包括 pd.Timestamp）写为 ISO 字符串，numpy 数值写为普通数值，NaN 写为 null
+
+    Args:
+        filepath: 文件路径
+        data: 要写入的数据
+    """
+    if orjson is not None:
+        content = orjson.dumps(
+            data,
+            default=json_default,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    else:
+        content = json.dumps(
+            nan_to_none(data),
+            ensure_ascii=False,
+            indent=2,
+            allow_nan=False,
+            default=lambda value: nan_to_none(json_default(value))
+        ).encode("utf-8")
+
+    with open(filepath, "wb") as f:
+        f.write(content)
+
+
+def read_json(filepath: str) -> Any:
+    """
+    读取 JSON 文件
+
+    安装了 orjson 时直接解析文件字节，否则使用标准库 json
+
+    Args:
+        filepath: 文件路径
+
+    Returns:
+        解析后的数据
+    """
+    with open(filepath, "rb") as f:
+        content = f.read()
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def debug_traceback() -> Optional[str]:
+    """
+    当前正在处理的异常的堆栈信息，仅在 LOG_LEVEL=DEBUG 时生成
+
+    在 except 块中调用；非调试模式下不遍历堆栈
+
+    Returns:
+        堆栈文本，非调试模式下为 None
+    """
+    if Config.LOG_LEVEL.upper() != "DEBUG":
+        return None
+    return traceback.format_exc()
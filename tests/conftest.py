@@ -0,0 +1,49 @@
+"""
+测试公共夹具
+
+提供模拟的全市场行情快照，供数据查询、选股等模块的测试共用，不依赖网络
+"""
+
+import os
+import sys
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.data import query
+
+
+@pytest.fixture
+def spot_df() -> pd.DataFrame:
+    """构造全市场行情快照（数据源原始格式，行未按代码排序）"""
+    return pd.DataFrame({
+        "代码": ["600519", "000858", "300750", "601398", "000001"],
+        "名称": ["贵州茅台", "五粮液", "宁德时代", "工商银行", "平安银行"],
+        "最新价": [1680.5, 150.2, 200.0, 5.1, 11.2],
+        "今开": [1670.0, 149.0, 198.0, 5.08, 11.3],
+        "最高": [1690.0, 151.0, 202.0, 5.12, 11.35],
+        "最低": [1665.0, 148.5, 197.0, 5.06, 11.15],
+        "成交量": [25000, 80000, 120000, 900000, 600000],
+        "成交额": [4.2e9, 1.2e9, 2.4e9, 4.6e8, 6.7e8],
+        "涨跌额": [10.5, -1.2, 2.0, 0.01, -0.1],
+        "涨跌幅": [0.63, -0.79, 1.01, 0.2, -0.89],
+        "换手率": [0.12, 0.21, 0.5, 0.05, 0.4],
+        "市盈率-动态": [28.5, 18.0, None, 5.2, 4.8],
+        "市净率": [12.3, 5.1, 4.2, 0.6, 0.5],
+        "总市值": [2.1e12, 6.0e11, 8.8e11, 1.8e12, 2.2e11],
+        "行业": ["酿酒行业", "酿酒行业", "电池", "银行", "银行"],
+    })
+
+
+@pytest.fixture
+def spot(monkeypatch, spot_df):
+    """模拟全市场快照接口，返回 spot_df，并重置进程内快照缓存"""
+    monkeypatch.setattr(query, "_spot_cache", None)
+    with mock.patch.object(query.ak, "stock_zh_a_spot_em", return_value=spot_df) as patched:
+        yield patched
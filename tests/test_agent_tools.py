@@ -0,0 +1,188 @@
+"""
+Agent 工具层测试
+
+使用模拟的历史数据测试 agent/tools.py，不依赖网络
+"""
+
+import os
+import sys
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.agent import tools
+from stork_agent.data import query
+
+
+def make_history(count: int = 80, columnar: bool = False) -> dict:
+    """构造历史K线数据"""
+    dates = [f"2024-{i // 28 + 1:02d}-{i % 28 + 1:02d}" for i in range(count)]
+    closes = [100 + i * 0.5 + (i % 3) for i in range(count)]
+    result = {"code": "600519", "name": "贵州茅台", "period": "daily", "count": count}
+    if columnar:
+        result["columns"] = {"date": dates, "close": closes}
+    else:
+        result["data"] = [{"date": d, "close": c} for d, c in zip(dates, closes)]
+    return result
+
+
+@pytest.fixture
+def history():
+    """模拟 get_history_kline"""
+    def fake_history(code, period="daily", days=100, adjust="qfq", columnar=False):
+        return make_history(columnar=columnar)
+
+    with mock.patch.object(tools, "get_history_kline", side_effect=fake_history) as patched:
+        yield patched
+
+
+class TestCalculateIndicator:
+    """测试技术指标计算"""
+
+    def test_ma_skips_warmup(self, history):
+        """测试 MA 不返回周期不足部分"""
+        result = tools.calculate_indicator("600519", "ma", period=20)
+        assert result.success
+        assert len(result.data["data"]) == 80 - 19
+        assert result.data["data"][0]["date"] == "2024-01-20"
+
+    def test_boll_keeps_all_dates(self, history):
+        """测试 BOLL 返回全部日期，周期不足部分为 None"""
+        result = tools.calculate_indicator("600519", "boll", period=20)
+        points = result.data["data"]
+        assert len(points) == 80
+        assert points[0]["upper"] is None
+        assert points[-1]["upper"] > points[-1]["middle"] > points[-1]["lower"]
+
+    def test_macd_fields(self, history):
+        """测试 MACD 字段"""
+        result = tools.calculate_indicator("600519", "macd")
+        assert set(result.data["data"][-1]) == {"date", "dif", "dea", "bar"}
+
+    def test_tail_keeps_latest(self, history):
+        """tail 只保留最近的数据点"""
+        full = tools.calculate_indicator("600519", "macd").data["data"]
+        result = tools.calculate_indicator("600519", "macd", tail=3)
+        assert result.data["data"] == full[-3:]
+
+    @pytest.mark.parametrize("tail", [0, 0.5, -3, True, "3"])
+    def test_invalid_tail(self, history, tail):
+        """测试 tail 不是正整数时返回错误，不静默返回全部或最早的数据"""
+        result = tools.calculate_indicator("600519", "macd", tail=tail)
+        assert not result.success
+        assert "tail" in result.message
+        history.assert_not_called()
+
+    def test_integral_float_tail(self, history):
+        """测试整数值的浮点数 tail 按整数处理"""
+        result = tools.calculate_indicator("600519", "macd", tail=3.0)
+        assert len(result.data["data"]) == 3
+
+    def test_result_reused_for_same_history(self, history):
+        """同一份历史数据重复查询不重新计算"""
+        tools._compute_indicator.cache_clear()
+        with mock.patch.object(tools, "calculate_ma", wraps=tools.calculate_ma) as patched:
+            first = tools.calculate_indicator("600519", "ma", period=20)
+            second = tools.calculate_indicator("600519", "ma", period=20)
+
+        assert patched.call_count == 1
+        assert first.data["data"] == second.data["data"]
+        assert first.data["data"] is not second.data["data"]
+
+    def test_invalid_indicator(self, history):
+        """测试不支持的指标"""
+        result = tools.calculate_indicator("600519", "invalid")
+        assert not result.success
+        assert "不支持" in result.message
+
+
+class TestSearchStocks:
+    """测试股票搜索"""
+
+    @pytest.fixture
+    def stock_list(self, monkeypatch):
+        """模拟股票列表"""
+        monkeypatch.setattr(query, "_search_cache", None)
+        df = pd.DataFrame({
+            "code": ["600519", "000858", "000568"],
+            "name": ["贵州茅台", "五粮液", "泸州老窖"],
+        })
+        with mock.patch.object(query, "get_stock_list", return_value=df) as patched:
+            yield patched
+
+    def test_search_by_name(self, stock_list):
+        """测试按名称搜索"""
+        result = tools.search_stocks("茅台")
+        assert result.data["stocks"] == [{"code": "600519", "name": "贵州茅台"}]
+
+    def test_search_by_code(self, stock_list):
+        """测试按代码搜索"""
+        result = tools.search_stocks("0008")
+        assert [s["code"] for s in result.data["stocks"]] == ["000858"]
+
+    def test_search_literal_keyword(self, stock_list):
+        """测试关键词按字面匹配，不作为正则解析"""
+        result = tools.search_stocks("*ST")
+        assert result.success
+        assert result.data["stocks"] == []
+
+    def test_index_built_once(self, stock_list):
+        """测试股票列表未更新时检索表只构建一次"""
+        first = query.get_stock_search_index()
+        tools.search_stocks("五粮液")
+        assert query.get_stock_search_index() is first
+
+    def test_index_rebuilt_on_new_list(self, stock_list):
+        """测试股票列表更新后检索表重建"""
+        tools.search_stocks("茅台")
+        stock_list.return_value = pd.DataFrame({
+            "code": ["601318"],
+            "name": ["中国平安"],
+        })
+        result = tools.search_stocks("平安")
+        assert result.data["stocks"] == [{"code": "601318", "name": "中国平安"}]
+
+
+class TestScreenStocks:
+    """测试选股条件转换"""
+
+    def test_filter_reused_for_same_criteria(self):
+        """相同条件复用同一个 ScreeningFilter"""
+        with mock.patch.object(tools, "screen_stocks_data", return_value={"total": 0}) as patched:
+            tools.screen_stocks({"pe_max": 20, "limit": 10})
+            tools.screen_stocks({"limit": 10, "pe_max": 20})
+
+        first, second = (call.args[0] for call in patched.call_args_list)
+        assert first is second
+        assert first.pe_max == 20
+
+    def test_invalid_criteria(self):
+        """非法条件返回失败响应"""
+        result = tools.screen_stocks({"pe_max": "abc"})
+        assert result.success is False
+
+
+class TestApiResponse:
+    """测试通用响应结构"""
+
+    def test_data_kept_by_reference(self):
+        """响应数据不被复制"""
+        data = {"data": [{"date": "2024-01-02", "value": 1.0}]}
+        response = tools.ApiResponse(success=True, message="ok", data=data)
+        assert response.data is data
+
+    def test_failure_truncates_error(self):
+        """失败响应截断超长错误信息"""
+        with mock.patch.object(tools, "get_realtime_quote", side_effect=ValueError("x" * 2000)):
+            response = tools.get_stock_realtime("600519")
+
+        assert response.success is False
+        assert response.message == "获取实时行情失败"
+        assert len(response.error) == tools.MAX_ERROR_LENGTH
+        assert response.model_dump()["data"] is None
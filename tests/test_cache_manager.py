@@ -0,0 +1,258 @@
+"""
+缓存管理器测试
+
+测试 CacheManager 的读写、过期与 cached 装饰器
+"""
+
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.cache import manager
+from stork_agent.cache.manager import CacheManager, cached, singleflight
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """使用临时目录的全局缓存管理器"""
+    cache = CacheManager(cache_dir=str(tmp_path))
+    monkeypatch.setattr(manager, "_cache_manager", cache)
+    return cache
+
+
+class TestCacheManager:
+    """测试缓存读写"""
+
+    def test_json_roundtrip(self, cache):
+        """测试 JSON 缓存读写"""
+        key = cache._generate_key("stock", {"code": "600519"})
+        cache.set(key, {"code": "600519", "price": 1680.5})
+        assert cache.get(key, ttl=60) == {"code": "600519", "price": 1680.5}
+
+    def test_json_file_readable(self, cache):
+        """测试 JSON 缓存文件可被标准库读取"""
+        key = cache._generate_key("stock", {"code": "600519"})
+        cache.set(key, {"name": "贵州茅台", "price": 1680.5})
+        with open(cache._get_cache_path(key), encoding="utf-8") as f:
+            assert json.load(f) == {"name": "贵州茅台", "price": 1680.5}
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_json_numpy_and_dates(self, cache, monkeypatch, use_orjson):
+        """测试 JSON 缓存编码 numpy 数值、日期与 NaN，orjson 与标准库结果一致"""
+        if not use_orjson:
+            monkeypatch.setattr(manager, "orjson", None)
+        elif manager.orjson is None:
+            pytest.skip("未安装 orjson")
+        key = cache._generate_key("stock", {"code": "600519"})
+        cache.set(key, {
+            "date": date(2024, 1, 2),
+            "price": np.float64(1680.5),
+            "volumes": np.array([1, 2]),
+            "pe": float("nan"),
+            "pb": np.float64("nan"),
+        })
+        assert cache.get(key, ttl=60) == {
+            "date": "2024-01-02", "price": 1680.5, "volumes": [1, 2], "pe": None, "pb": None,
+        }
+
+    def test_pickle_compressed(self, cache):
+        """测试 Pickle 缓存压缩存储，且兼容未压缩的旧文件"""
+        key = cache._generate_key("history", {"code": "600519"})
+        cache.set(key, {"closes": [1680.5] * 1000}, use_pickle=True)
+        path = cache._get_cache_path(key, use_pickle=True)
+        assert path.read_bytes()[:2] == CacheManager.GZIP_MAGIC
+
+        path.write_bytes(pickle.dumps({"closes": [1.0]}))
+        assert cache.get(key, ttl=60) == {"closes": [1.0]}
+
+    def test_failed_write_keeps_old_value(self, cache):
+        """测试写入失败时保留原缓存且不残留临时文件"""
+        key = cache._generate_key("stock", {"code": "600519"})
+        cache.set(key, {"price": 1680.5})
+        cache.set(key, {"price": object()})
+
+        assert cache.get(key, ttl=60) == {"price": 1680.5}
+        assert [p.name for p in cache.json_dir.iterdir()] == [f"{key}.json"]
+
+    def test_failed_pickle_keeps_old_value(self, cache):
+        """测试流式 pickle 中途失败时保留原缓存且不残留临时文件"""
+        key = cache._generate_key("history", {"code": "600519"})
+        cache.set(key, {"closes": [1680.5]}, use_pickle=True)
+        cache.set(key, {"closes": [1700.0] * 100000, "func": lambda: None}, use_pickle=True)
+
+        assert cache.get(key, ttl=60) == {"closes": [1680.5]}
+        assert [p.name for p in cache.pickle_dir.iterdir()] == [f"{key}.pkl"]
+
+    def test_memory_layer(self, cache, monkeypatch):
+        """测试重复读取走内存层，文件重写后失效"""
+        key = cache._generate_key("history", {"code": "600519"})
+        cache.set(key, {"close": 1680.5}, use_pickle=True)
+        first = cache.get(key, ttl=60)
+
+        monkeypatch.setattr(cache, "_read_pickle", lambda path: pytest.fail("不应读取磁盘"))
+        assert cache.get(key, ttl=60) is first
+
+        monkeypatch.undo()
+        cache.set(key, {"close": 1700.0}, use_pickle=True)
+        assert cache.get(key, ttl=60) == {"close": 1700.0}
+
+    def test_memory_layer_bounded(self, cache, monkeypatch):
+        """测试内存层按 LRU 淘汰"""
+        monkeypatch.setattr(CacheManager, "MEMORY_CACHE_SIZE", 2)
+        keys = [cache._generate_key("stock", {"code": code}) for code in ("600519", "000858", "300750")]
+        for key in keys:
+            cache.set(key, {"key": key})
+            cache.get(key, ttl=60)
+
+        assert len(cache._memory) == 2
+        assert str(cache._get_cache_path(keys[0])) not in cache._memory
+
+    def test_pickle_roundtrip(self, cache):
+        """测试 Pickle 缓存读写"""
+        key = cache._generate_key("history", {"code": "600519"})
+        cache.set(key, {"dates": (1, 2, 3)}, use_pickle=True)
+        assert cache.get(key, ttl=60) == {"dates": (1, 2, 3)}
+
+    def test_expired(self, cache):
+        """测试过期缓存返回 None"""
+        key = cache._generate_key("stock", {"code": "600519"})
+        cache.set(key, {"code": "600519"})
+        path = cache._get_cache_path(key)
+        old = time.time() - 120
+        os.utime(path, (old, old))
+        assert cache.get(key, ttl=60) is None
+
+    def test_clear_removes_old_files(self, cache):
+        """测试 clear 只删除过期文件，并同步清理内存层"""
+        old_key = cache._generate_key("stock", {"code": "600519"})
+        new_key = cache._generate_key("stock", {"code": "000858"})
+        cache.set(old_key, {"price": 1680.5})
+        cache.set(new_key, {"price": 150.2}, use_pickle=True)
+        cache.get(old_key, ttl=30 * 86400)
+        old_path = cache._get_cache_path(old_key)
+        old = time.time() - 10 * 86400
+        os.utime(old_path, (old, old))
+
+        assert cache.clear(older_than_days=7) == 1
+        assert not old_path.exists()
+        assert str(old_path) not in cache._memory
+        assert cache.get(new_key, ttl=60) == {"price": 150.2}
+
+    def test_key_ignores_param_order(self, cache):
+        """测试缓存键与参数顺序无关"""
+        assert cache._generate_key("screen", {"a": 1, "b": 2}) == cache._generate_key("screen", {"b": 2, "a": 1})
+
+    def test_key_distinguishes_params(self, cache):
+        """测试不同参数（含类型差异与嵌套参数）生成不同缓存键"""
+        assert cache._generate_key("stock", {"code": "1"}) != cache._generate_key("stock", {"code": 1})
+        assert cache._generate_key("stock", {"a": 1, "b": 2}) != cache._generate_key("stock", {"a": 2, "b": 1})
+        nested = cache._generate_key("func", {"args": [1], "kwargs": {"x": 1, "y": 2}})
+        assert nested == cache._generate_key("func", {"kwargs": {"y": 2, "x": 1}, "args": [1]})
+        assert nested.startswith("func_") and len(nested) == len("func_") + 12
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_nested_key_encoders(self, cache, monkeypatch, use_orjson):
+        """测试嵌套参数在 orjson 与标准库编码下都与键顺序无关"""
+        if not use_orjson:
+            monkeypatch.setattr(manager, "orjson", None)
+        elif manager.orjson is None:
+            pytest.skip("未安装 orjson")
+        first = cache._generate_key("func", {"args": ["贵州茅台"], "kwargs": {"x": 1, "y": None}})
+        second = cache._generate_key("func", {"kwargs": {"y": None, "x": 1}, "args": ["贵州茅台"]})
+        assert first == second
+        assert first != cache._generate_key("func", {"args": ["五粮液"], "kwargs": {"x": 1, "y": None}})
+
+
+class TestCachedDecorator:
+    """测试 cached 装饰器"""
+
+    def test_cache_hit(self, cache):
+        """测试重复调用命中缓存"""
+        calls = []
+
+        @cached("test", ttl=60)
+        def fetch(code):
+            calls.append(code)
+            return {"code": code}
+
+        assert fetch("600519") == {"code": "600519"}
+        assert fetch("600519") == {"code": "600519"}
+        assert fetch("000858") == {"code": "000858"}
+        assert calls == ["600519", "000858"]
+
+    def test_exception_not_cached(self, cache):
+        """测试异常不会被缓存"""
+        calls = []
+
+        @cached("test", ttl=60)
+        def fetch(code):
+            calls.append(code)
+            raise ValueError("network error")
+
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                fetch("600519")
+        assert len(calls) == 2
+
+    def test_cache_disabled(self, cache, monkeypatch):
+        """测试关闭缓存时每次都调用原函数"""
+        monkeypatch.setattr(manager.Config, "CACHE_ENABLED", False)
+        calls = []
+
+        @cached("test", ttl=60)
+        def fetch(code):
+            calls.append(code)
+            return {"code": code}
+
+        fetch("600519")
+        fetch("600519")
+        assert len(calls) == 2
+
+
+class TestSingleflight:
+    """测试并发请求合并"""
+
+    def test_concurrent_calls_share_result(self):
+        """测试执行期间的相同请求共享一次调用"""
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"code": "600519"}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            leader = executor.submit(singleflight, "history:600519", fetch)
+            started.wait(5)
+            followers = [executor.submit(singleflight, "history:600519", fetch) for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+
+    def test_exception_shared_and_released(self):
+        """测试异常传递给调用者且不会残留"""
+        def fetch():
+            raise ValueError("network error")
+
+        with pytest.raises(ValueError):
+            singleflight("history:600519", fetch)
+        assert singleflight("history:600519", lambda: 1) == 1
@@ -0,0 +1,83 @@
+"""
+图表决策器测试
+
+测试 responder/chart_decider.py 的意图关键词匹配
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.responder import chart_decider
+
+
+COMPARE_DATA = {"stocks": [{"code": "600519"}, {"code": "000858"}]}
+
+
+class TestIntentCategories:
+    """测试意图关键词类别扫描"""
+
+    @pytest.mark.parametrize("intent", [
+        "kline", "K线图", "comparison", "compare", "shares", "市场份额占比",
+        "macd and rsi", "走势", "history", "", "barchart", "pie饼图", "BOLL",
+    ])
+    def test_matches_substring_scan(self, intent):
+        """测试一次扫描的结果与逐个关键词子串判断一致"""
+        lowered = intent.lower()
+        expected = {
+            category
+            for category, keywords in chart_decider.INTENT_KEYWORDS.items()
+            if any(keyword in lowered for keyword in keywords)
+        }
+        assert chart_decider._intent_categories(intent) == expected
+
+    def test_all_keywords(self):
+        """测试每个关键词单独出现时都能命中所属类别"""
+        for category, keywords in chart_decider.INTENT_KEYWORDS.items():
+            for keyword in keywords:
+                assert category in chart_decider._intent_categories(keyword)
+
+
+class TestChartDecisions:
+    """测试图表生成与类型判断"""
+
+    def test_should_generate_chart(self):
+        """测试按意图和数据特征判断是否生成图表"""
+        assert chart_decider.should_generate_chart("kline")
+        assert chart_decider.should_generate_chart("对比", None)
+        assert not chart_decider.should_generate_chart("quote")
+        assert chart_decider.should_generate_chart("quote", COMPARE_DATA)
+
+    @pytest.mark.parametrize("intent, data, expected", [
+        ("K线", None, "kline"),
+        ("candlestick macd", None, "kline"),
+        ("行业占比", None, "pie"),
+        ("compare", COMPARE_DATA, "bar"),
+        ("compare", None, "line"),
+        ("compare rsi", None, "indicator"),
+        ("history", None, "line"),
+    ])
+    def test_chart_type(self, intent, data, expected):
+        """测试图表类型按优先级判断"""
+        assert chart_decider.get_chart_type(intent, data) == expected
+
+    @pytest.mark.parametrize("intent, expected", [
+        ("kline", "贵州茅台 (600519) - K线图"),
+        ("Candlestick trend", "贵州茅台 (600519) - K线图"),
+        ("走势", "贵州茅台 (600519) - 价格走势"),
+        ("MACD", "贵州茅台 (600519) - MACD指标"),
+        ("rsi", "贵州茅台 (600519) - RSI指标"),
+        ("boll", "贵州茅台 (600519) - 布林带"),
+        ("对比", "股票指标对比"),
+        ("history", "贵州茅台 (600519)"),
+    ])
+    def test_chart_title(self, intent, expected):
+        """测试标题后缀按优先级选择"""
+        data = {"name": "贵州茅台", "code": "600519"}
+        assert chart_decider.get_chart_title(intent, data) == expected
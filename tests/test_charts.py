@@ -246,6 +246,49 @@ def test_pie_chart():
         return False
 
 
+def test_scatter_cls_threshold():
+    """测试大数据量折线使用 WebGL"""
+    assert charts._scatter_cls(charts.WEBGL_THRESHOLD) is charts.go.Scatter
+    assert charts._scatter_cls(charts.WEBGL_THRESHOLD + 1) is charts.go.Scattergl
+
+
+def test_lttb_downsample():
+    """测试 LTTB 降采样保留首尾和尖峰"""
+    values = [float(i % 7) for i in range(5000)]
+    values[2500] = 100.0
+    indices = charts._lttb_indices(values, 500)
+
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == 4999
+    assert list(indices) == sorted(set(indices))
+    assert 2500 in indices
+    assert list(charts._lttb_indices(values[:100], 500)) == list(range(100))
+
+
+def test_default_filename_unique():
+    """测试同一时刻连续生成的默认文件名不重复"""
+    names = [charts._default_filename("kline") for _ in range(1000)]
+    assert len(set(names)) == len(names)
+    assert all(name.startswith("kline_") for name in names)
+
+
+def test_async_chart_write(tmp_path, monkeypatch):
+    """测试后台写入图表文件"""
+    monkeypatch.setattr(charts, "CHART_OUTPUT_DIR", str(tmp_path))
+    results = [
+        charts.generate_chart(
+            "pie", labels=["白酒", "银行"], values=[60.0, 40.0],
+            filename=f"async_pie_{i}", async_write=True
+        )
+        for i in range(4)
+    ]
+
+    assert charts.wait_chart_writes(timeout=30)
+    for result in results:
+        assert result["success"]
+        assert os.path.exists(result["filepath"])
+
+
 def run_all_chart_tests():
     """运行所有图表测试"""
     print("\n" + "=" * 60)
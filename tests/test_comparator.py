@@ -0,0 +1,142 @@
+"""
+公司对比模块测试
+
+使用模拟的行情、财务和历史数据测试 data/comparator.py，不依赖网络
+"""
+
+import os
+import sys
+import threading
+from unittest import mock
+
+import numpy as np
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.data import comparator
+
+
+QUOTES = [
+    {"code": "600519", "name": "贵州茅台", "price": 1680.5, "change": 10.5, "change_pct": 0.63,
+     "pe_ratio": 28.5, "pb_ratio": 12.3, "market_cap": 21000.0, "turnover": 0.12},
+    {"code": "000858", "name": "五粮液", "price": 150.2, "change": -1.2, "change_pct": -0.79,
+     "pe_ratio": 18.0, "pb_ratio": 5.1, "market_cap": 6000.0, "turnover": 0.21},
+]
+
+
+def fake_history(code, period="daily", days=100, adjust="qfq", columnar=False, arrays=False):
+    """构造按列返回的历史数据，收盘价从 100 起每天加 1"""
+    closes = [100.0 + i for i in range(days)]
+    columns = {
+        "close": closes,
+        "high": [c + 2 for c in closes],
+        "low": [c - 3 for c in closes],
+        "volume": [1000.0 * (i % 3) for i in range(days)],
+    }
+    if arrays:
+        columns = {key: np.array(values) for key, values in columns.items()}
+    return {"code": code, "name": "贵州茅台", "columns": columns, "count": days}
+
+
+def fake_financial(code):
+    """构造财务数据"""
+    if code == "000001":
+        raise Exception("获取财务数据失败")
+    return {"roe": 30.0 if code == "600519" else 25.0, "revenue": 1.0, "net_profit": 1.0, "debt_ratio": 20.0}
+
+
+@pytest.fixture
+def sources():
+    """模拟数据源"""
+    with mock.patch.object(comparator, "batch_get_realtime", return_value=QUOTES) as batch, \
+            mock.patch.object(comparator, "get_financial_data", side_effect=fake_financial), \
+            mock.patch.object(comparator, "get_history_kline", side_effect=fake_history):
+        yield batch
+
+
+class TestCompareStocks:
+    """测试多股对比"""
+
+    def test_compare(self, sources):
+        """测试对比结果保持输入顺序，行情只请求一次"""
+        result = comparator.compare_stocks(["600519", "sz000858"], days=10)
+
+        assert [s["code"] for s in result["stocks"]] == ["600519", "sz000858"]
+        assert result["stocks"][1]["name"] == "五粮液"
+        assert result["stocks"][0]["period_change_pct"] == pytest.approx((119 - 110) / 110 * 100)
+        assert result["summary"] == {"max_market_cap": 21000.0, "max_roe": 30.0, "min_pe": 18.0, "total": 2}
+        sources.assert_called_once()
+
+    def test_summary_skips_missing(self, sources):
+        """测试摘要跳过缺失、为 0 或 NaN 的指标"""
+        quotes = [dict(QUOTES[0], pe_ratio=None, market_cap=float("nan")), dict(QUOTES[1], pe_ratio=0)]
+        sources.return_value = quotes
+        result = comparator.compare_stocks(["600519", "000858"], days=10)
+
+        assert result["summary"] == {"max_market_cap": 6000.0, "max_roe": 30.0, "total": 2}
+
+    def test_skip_failed(self, sources):
+        """测试跳过无行情或数据获取失败的股票"""
+        result = comparator.compare_stocks(["600519", "000001", "999999"], days=10)
+
+        assert [s["code"] for s in result["stocks"]] == ["600519"]
+
+
+class TestComparePricePerformance:
+    """测试价格表现对比"""
+
+    def test_performance(self, sources):
+        """测试期间涨跌幅、最高最低和均量"""
+        result = comparator.compare_price_performance(["600519"], days=10)
+        stock = result["stocks"][0]
+
+        assert stock["start_price"] == 110.0 and stock["end_price"] == 119.0
+        assert stock["high"] == 121.0 and stock["low"] == 107.0
+        assert stock["change_pct"] == pytest.approx(9 / 110 * 100)
+        assert stock["volume_avg"] == pytest.approx(1000.0 * sum(i % 3 for i in range(10, 20)) / 10)
+
+    def test_concurrent_fetch(self, sources):
+        """测试多只股票并发获取且结果按涨跌幅排序"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def slow_history(code, period="daily", days=100, adjust="qfq", columnar=False, arrays=False):
+            barrier.wait()
+            hist = fake_history(code, period, days, adjust, columnar, arrays)
+            if code == "000858":
+                hist["columns"]["close"] = 200.0 - np.arange(days)
+            return hist
+
+        with mock.patch.object(comparator, "get_history_kline", side_effect=slow_history):
+            result = comparator.compare_price_performance(["000858", "600519"], days=10)
+
+        assert [s["code"] for s in result["stocks"]] == ["600519", "000858"]
+
+
+class TestCompareFinancials:
+    """测试财务对比"""
+
+    def test_financials(self, sources):
+        """测试保持输入顺序并跳过获取失败的股票"""
+        result = comparator.compare_financials(["000858", "000001", "600519"])
+
+        assert [s["code"] for s in result["stocks"]] == ["000858", "600519"]
+        assert result["stocks"][1]["roe"] == 30.0
+        assert result["total"] == 2
+
+
+class TestGenerateComparisonReport:
+    """测试对比报告"""
+
+    def test_report_tables(self, sources):
+        """测试三张表格的表头与列对齐"""
+        report = comparator.generate_comparison_report(["600519", "000858"])
+        lines = report.split("\n")
+
+        assert lines[4] == "【基本信息对比】"
+        assert lines[7] == f"{'600519':<10}{'贵州茅台':<12}{1680.5:<10.2f}{0.63:<10.2f}{21000.0:<12.2f}{0.12:<10.2f}"
+        assert f"{'000858':<10}{'五粮液':<12}{25.0:<12}{1.0:<12}{1.0:<12}" in lines
+        assert report.count("-" * 60) == 3
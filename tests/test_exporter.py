@@ -0,0 +1,192 @@
+"""
+数据导出器测试
+
+测试 responder/exporter.py 的 CSV、JSON、Excel 导出
+"""
+
+import json
+import os
+import sys
+
+from datetime import datetime
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.responder import exporter
+
+
+ROWS = [
+    {"code": "600519", "name": "贵州茅台", "price": 1680.5, "pe_ratio": 28.5},
+    {"code": "000858", "name": "五粮液, 浓香", "price": float("nan"), "pe_ratio": None},
+]
+
+
+class TestExportData:
+    """测试通用导出"""
+
+    def test_csv(self, tmp_path):
+        """测试 CSV 导出与 pandas 读取结果一致"""
+        filepath = exporter.export_data(ROWS, "csv", "rows", str(tmp_path))
+
+        with open(filepath, "rb") as f:
+            assert f.read(3) == b"\xef\xbb\xbf"
+        df = pd.read_csv(filepath, dtype={"code": str})
+        assert df["code"].tolist() == ["600519", "000858"]
+        assert df["name"].tolist() == ["贵州茅台", "五粮液, 浓香"]
+        assert df["price"].isna().tolist() == [False, True]
+        assert df["pe_ratio"].isna().tolist() == [False, True]
+
+    def test_csv_column_union(self, tmp_path):
+        """测试各行字段不同时按首次出现顺序合并列"""
+        rows = [{"a": 1}, {"b": 2, "a": 3}]
+        filepath = exporter.export_data(rows, "csv", "union", str(tmp_path))
+
+        with open(filepath, encoding="utf-8-sig") as f:
+            assert f.read().splitlines() == ["a,b", "1,", "3,2"]
+
+    def test_csv_key_order(self, tmp_path):
+        """测试各行字段顺序不同时按列名对齐"""
+        rows = [{"a": 1, "b": 2}, {"b": 4, "a": 3}]
+        filepath = exporter.export_data(rows, "csv", "order", str(tmp_path))
+
+        with open(filepath, encoding="utf-8-sig") as f:
+            assert f.read().splitlines() == ["a,b", "1,2", "3,4"]
+
+    def test_csv_nested_stocks(self, tmp_path):
+        """测试字典数据导出其中的股票列表"""
+        filepath = exporter.export_data({"stocks": ROWS}, "csv", "nested", str(tmp_path))
+        assert len(pd.read_csv(filepath)) == 2
+
+    def test_json(self, tmp_path):
+        """测试 JSON 导出列表时包装在 data 字段中"""
+        filepath = exporter.export_data(ROWS[:1], "json", "rows", str(tmp_path))
+
+        with open(filepath, encoding="utf-8") as f:
+            assert json.load(f) == {"data": ROWS[:1]}
+
+    def test_json_orjson_nan(self, tmp_path):
+        """测试安装 orjson 时缺失值写为 null，中文不转义"""
+        pytest.importorskip("orjson")
+        filepath = exporter.export_data(ROWS, "json", "rows", str(tmp_path))
+
+        with open(filepath, encoding="utf-8") as f:
+            content = f.read()
+        assert "贵州茅台" in content
+        assert json.loads(content)["data"][1]["price"] is None
+
+    def test_excel(self, tmp_path):
+        """测试 Excel 导出"""
+        filepath = exporter.export_data(ROWS, "excel", "rows", str(tmp_path))
+
+        df = pd.read_excel(filepath, dtype={"code": str})
+        assert df["code"].tolist() == ["600519", "000858"]
+
+    def test_excel_xlsxwriter(self, tmp_path):
+        """测试 xlsxwriter 逐行写入的内容与 openpyxl 导出一致"""
+        pytest.importorskip("xlsxwriter")
+        filepath = os.path.join(str(tmp_path), "rows.xlsx")
+        frame = exporter._data_to_dataframe(ROWS)
+        exporter._write_excel_rows(filepath, frame)
+
+        expected = os.path.join(str(tmp_path), "expected.xlsx")
+        frame.to_excel(expected, index=False, engine="openpyxl")
+        pd.testing.assert_frame_equal(
+            pd.read_excel(filepath, dtype={"code": str}),
+            pd.read_excel(expected, dtype={"code": str}),
+        )
+
+    def test_dataframe_rows(self):
+        """测试字段相同和不同的行转换为 DataFrame 的结果与 pandas 一致"""
+        uneven = [{"a": 1}, {"b": 2, "a": 3}]
+        for rows in (ROWS, uneven, {"stocks": ROWS}, {"code": "600519"}):
+            expected = pd.DataFrame(exporter._data_rows(rows))
+            pd.testing.assert_frame_equal(exporter._data_to_dataframe(rows), expected)
+
+    def test_unsupported_format(self, tmp_path):
+        """测试不支持的格式"""
+        with pytest.raises(ValueError):
+            exporter.export_data(ROWS, "xml", "rows", str(tmp_path))
+
+
+class TestTimestamp:
+    """测试文件名时间戳"""
+
+    def test_format(self):
+        """测试与 datetime.strftime 的结果一致"""
+        with mock.patch.object(exporter.time, "time", return_value=1700000000.5):
+            assert exporter._timestamp() == datetime.fromtimestamp(1700000000).strftime("%Y%m%d_%H%M%S")
+
+    def test_reused_within_second(self):
+        """测试同一秒内复用已格式化的字符串"""
+        with mock.patch.object(exporter.time, "time", return_value=1700000100.1):
+            first = exporter._timestamp()
+        with mock.patch.object(exporter.time, "time", return_value=1700000100.9), \
+                mock.patch.object(exporter.time, "strftime") as strftime:
+            assert exporter._timestamp() is first
+        strftime.assert_not_called()
+
+    def test_default_filename(self, tmp_path):
+        """测试未指定文件名时使用时间戳"""
+        with mock.patch.object(exporter.time, "time", return_value=1700000000.0):
+            filepath = exporter.export_data(ROWS, "json", export_dir=str(tmp_path))
+            assert os.path.basename(filepath) == f"export_{exporter._timestamp()}.json"
+
+
+class TestExportSummary:
+    """测试导出文件摘要"""
+
+    @pytest.mark.parametrize("rows", [
+        ROWS,
+        [{"code": "600519", "price": 1.5}, {"code": "000858", "price": 2.5}],
+        [{"a": 1}, {"b": 2, "a": 3}],
+        [{"name": "多行\n名称", "price": 1.0}],
+    ])
+    def test_csv(self, tmp_path, rows):
+        """测试 CSV 行列数与 pandas 读取结果一致"""
+        filepath = exporter.export_data(rows, "csv", "rows", str(tmp_path))
+        df = pd.read_csv(filepath)
+
+        summary = exporter.get_export_summary(filepath)
+        assert (summary["rows"], summary["columns"]) == df.shape
+
+    def test_csv_without_trailing_newline(self, tmp_path):
+        """测试最后一行没有换行"""
+        filepath = tmp_path / "rows.csv"
+        filepath.write_text("a,b\n1,2\n3,4", encoding="utf-8")
+
+        summary = exporter.get_export_summary(str(filepath))
+        assert (summary["rows"], summary["columns"]) == (2, 2)
+
+    def test_csv_empty(self, tmp_path):
+        """测试没有数据的 CSV"""
+        filepath = exporter.export_data([], "csv", "empty", str(tmp_path))
+
+        summary = exporter.get_export_summary(filepath)
+        assert (summary["rows"], summary["columns"]) == (0, 0)
+
+    def test_excel(self, tmp_path):
+        """测试 Excel 行列数与 pandas 读取结果一致"""
+        filepath = exporter.export_data(ROWS, "excel", "rows", str(tmp_path))
+
+        summary = exporter.get_export_summary(filepath)
+        assert (summary["rows"], summary["columns"]) == pd.read_excel(filepath).shape
+
+    @pytest.mark.parametrize("data, shape", [
+        (ROWS, (2, 4)),
+        ([{"a": 1}, {"b": 2, "a": 3}], (2, 2)),
+        ({"stocks": ROWS, "total": 2}, (2, 4)),
+        ({"code": "600519", "price": 1.5}, (1, 2)),
+    ])
+    def test_json(self, tmp_path, data, shape):
+        """测试 JSON 行列数按导出时的行列表统计"""
+        filepath = exporter.export_data(data, "json", "rows", str(tmp_path))
+
+        summary = exporter.get_export_summary(filepath)
+        assert (summary["rows"], summary["columns"]) == shape
@@ -0,0 +1,62 @@
+"""
+数据格式化工具测试
+
+测试 responder/formatter.py 的 Markdown 表格输出
+"""
+
+import os
+import sys
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.responder import formatter
+
+
+STOCKS = [
+    {"code": "600519", "name": "贵州茅台", "price": 1680.5, "change_pct": 0.63,
+     "pe_ratio": 28.5, "pb_ratio": None, "roe": 30.1, "market_cap": 21000.0},
+    {"code": "000858", "name": "五粮液", "price": None, "change_pct": -0.79,
+     "pe_ratio": None, "market_cap": None},
+    {"code": "000001", "name": "平安银行", "price": 0, "change_pct": 0.0,
+     "pe_ratio": 0.0, "market_cap": 5.5},
+]
+
+
+class TestFormatStockList:
+    """测试股票列表表格"""
+
+    def test_rows(self):
+        """测试各列格式与缺失值"""
+        assert formatter.format_stock_list(STOCKS).splitlines() == [
+            "代码 | 名称 | 价格 | 涨跌幅 | PE | 市值",
+            "--- | --- | --- | --- | --- | ---",
+            "600519 | 贵州茅台 | ¥1680.50 | +0.63% | 28.50 | 2.10万亿",
+            "000858 | 五粮液 | ¥N/A | -0.79% | N/A | N/A",
+            "000001 | 平安银行 | ¥0.00 | 0.00% | 0.00 | 5.50亿",
+        ]
+
+    def test_pagination_footer(self):
+        """测试分页信息"""
+        lines = formatter.format_stock_list(STOCKS[:1], page=1, page_size=5, total=10).splitlines()
+        assert lines[-2:] == ["**共 10 只股票，当前第 1/2 页**", "输入 `下一页` 查看更多结果"]
+
+    def test_empty(self):
+        """测试空列表"""
+        assert formatter.format_stock_list([]) == "没有找到符合条件的股票。"
+
+
+class TestFormatComparison:
+    """测试对比表格"""
+
+    def test_rows(self):
+        """测试各指标格式与缺失值"""
+        lines = formatter.format_comparison({"stocks": STOCKS[:2]}).splitlines()
+        assert lines == [
+            "代码 | 名称 | 价格 | 涨跌幅 | PE | PB | ROE(%) | 市值(亿)",
+            "--- | --- | --- | --- | --- | --- | --- | ---",
+            "600519 | 贵州茅台 | ¥1680.50 | +0.63% | 28.50 | N/A | 30.10 | 21000.00",
+            "000858 | 五粮液 | ¥N/A | -0.79% | N/A | N/A | N/A | N/A",
+        ]
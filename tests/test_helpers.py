@@ -0,0 +1,81 @@
+"""
+辅助函数测试
+
+测试 utils/helpers.py 的 JSON 读写
+"""
+
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.utils import helpers
+
+
+DATA = {
+    "data": [{
+        "date": pd.Timestamp("2024-01-02"),
+        "day": date(2024, 1, 3),
+        "price": 1680.5,
+        "pe_ratio": float("nan"),
+        "volume": np.int64(3),
+        "closes": np.array([1.5, np.nan]),
+        "name": "贵州茅台",
+    }],
+}
+
+EXPECTED = {
+    "data": [{
+        "date": "2024-01-02T00:00:00",
+        "day": "2024-01-03",
+        "price": 1680.5,
+        "pe_ratio": None,
+        "volume": 3,
+        "closes": [1.5, None],
+        "name": "贵州茅台",
+    }],
+}
+
+
+class TestWriteJson:
+    """测试 JSON 写入"""
+
+    @pytest.fixture(params=["orjson", "json"])
+    def encoder(self, request, monkeypatch):
+        """分别使用 orjson 和标准库 json 写入"""
+        if request.param == "orjson":
+            pytest.importorskip("orjson")
+        else:
+            monkeypatch.setattr(helpers, "orjson", None)
+        return request.param
+
+    def test_values(self, tmp_path, encoder):
+        """测试日期、numpy 数值和 NaN 的写入结果"""
+        filepath = str(tmp_path / "data.json")
+        helpers.write_json(filepath, DATA)
+
+        with open(filepath, encoding="utf-8") as f:
+            content = f.read()
+        assert "NaN" not in content
+        assert "贵州茅台" in content
+        assert helpers.read_json(filepath) == EXPECTED
+
+    def test_same_bytes(self, tmp_path, monkeypatch):
+        """测试 orjson 与标准库 json 写出的文件完全一致"""
+        pytest.importorskip("orjson")
+        fast = str(tmp_path / "fast.json")
+        helpers.write_json(fast, DATA)
+        monkeypatch.setattr(helpers, "orjson", None)
+        slow = str(tmp_path / "slow.json")
+        helpers.write_json(slow, DATA)
+
+        with open(fast, "rb") as f1, open(slow, "rb") as f2:
+            assert f1.read() == f2.read()
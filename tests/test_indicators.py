@@ -0,0 +1,208 @@
+"""
+技术指标计算测试
+
+与逐窗口计算的参考实现对比，验证向量化结果
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.analysis import indicators
+
+
+def make_prices(count: int = 120) -> list:
+    """构造带波动的价格序列"""
+    rng = np.random.default_rng(42)
+    return (100 + np.cumsum(rng.normal(0, 1, count))).tolist()
+
+
+def assert_series_equal(actual: list, expected: list):
+    """逐项比较，None 必须对齐"""
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        if e is None:
+            assert a is None
+        else:
+            assert a == pytest.approx(e)
+
+
+class TestCalculateMa:
+    """测试移动平均线"""
+
+    def test_matches_window_mean(self):
+        """测试与逐窗口求均值一致"""
+        prices = make_prices()
+        expected = [
+            None if i < 19 else sum(prices[i - 19:i + 1]) / 20
+            for i in range(len(prices))
+        ]
+        assert_series_equal(indicators.calculate_ma(prices, 20), expected)
+
+    def test_short_series(self):
+        """测试数据不足一个周期"""
+        assert indicators.calculate_ma([1.0, 2.0], 5) == [None, None]
+        assert indicators.calculate_ma([], 5) == []
+
+
+def reference_ema(prices: list, period: int) -> list:
+    """逐条递推的 EMA 参考实现（SMA 起点）"""
+    if len(prices) < period:
+        return list(prices)
+    multiplier = 2 / (period + 1)
+    values = list(prices[:period - 1]) + [sum(prices[:period]) / period]
+    for price in prices[period:]:
+        values.append((price - values[-1]) * multiplier + values[-1])
+    return values
+
+
+class TestCalculateEma:
+    """测试指数移动平均线与 MACD"""
+
+    def test_matches_recurrence(self):
+        """测试与逐条递推一致"""
+        prices = make_prices()
+        assert_series_equal(indicators.calculate_ema(prices, 12), reference_ema(prices, 12))
+
+    def test_short_series(self):
+        """测试数据不足一个周期时返回原价格"""
+        assert indicators.calculate_ema([1.0, 2.0], 5) == [1.0, 2.0]
+
+    def test_macd(self):
+        """测试 MACD 各分量"""
+        prices = make_prices()
+        dif = [f - s for f, s in zip(reference_ema(prices, 12), reference_ema(prices, 26))]
+        dea = reference_ema(dif, 9)
+
+        result = indicators.calculate_macd(prices)
+        assert_series_equal(result["dif"], dif)
+        assert_series_equal(result["dea"], dea)
+        assert_series_equal(result["bar"], [(d - e) * 2 for d, e in zip(dif, dea)])
+
+
+def reference_rsi(prices: list, period: int) -> list:
+    """逐窗口计算的 RSI 参考实现"""
+    deltas = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
+    values = [None]
+    for i in range(len(deltas)):
+        if i < period:
+            values.append(None)
+            continue
+        window = deltas[i - period + 1:i + 1]
+        avg_gain = sum(max(d, 0) for d in window) / period
+        avg_loss = sum(abs(min(d, 0)) for d in window) / period
+        values.append(100 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss))
+    return values
+
+
+class TestCalculateRsi:
+    """测试 RSI"""
+
+    def test_matches_window_average(self):
+        """测试与逐窗口计算一致"""
+        prices = make_prices()
+        assert_series_equal(indicators.calculate_rsi(prices, 14), reference_rsi(prices, 14))
+
+    def test_only_gains(self):
+        """测试只涨不跌时 RSI 为 100"""
+        result = indicators.calculate_rsi([float(i) for i in range(20)], 5)
+        assert result[:6] == [None] * 6
+        assert result[6:] == [100.0] * 14
+
+
+class TestCalculateBollingerBands:
+    """测试布林带"""
+
+    def test_matches_window_std(self):
+        """测试与逐窗口计算标准差一致"""
+        prices = make_prices()
+        result = indicators.calculate_bollinger_bands(prices, 20, 2.0)
+
+        middle = [None if i < 19 else float(np.mean(prices[i - 19:i + 1])) for i in range(len(prices))]
+        std = [None if i < 19 else float(np.std(prices[i - 19:i + 1])) for i in range(len(prices))]
+        assert_series_equal(result["middle"], middle)
+        assert_series_equal(result["upper"], [m if m is None else m + 2 * s for m, s in zip(middle, std)])
+        assert_series_equal(result["lower"], [m if m is None else m - 2 * s for m, s in zip(middle, std)])
+
+    def test_short_series(self):
+        """测试数据不足一个周期"""
+        result = indicators.calculate_bollinger_bands([1.0, 2.0], 5)
+        assert result == {"upper": [None, None], "middle": [None, None], "lower": [None, None]}
+
+
+class TestCalculateKdj:
+    """测试 KDJ"""
+
+    def test_matches_recurrence(self):
+        """测试与逐日递推一致，且与价格序列等长"""
+        closes = make_prices()
+        highs = [c + 1 for c in closes]
+        lows = [c - 1 for c in closes]
+        result = indicators.calculate_kdj(highs, lows, closes)
+
+        k, d = [50.0], [50.0]
+        for i in range(9, len(closes)):
+            high_n, low_n = max(highs[i - 8:i + 1]), min(lows[i - 8:i + 1])
+            rsv = (closes[i] - low_n) / (high_n - low_n) * 100
+            k.append(2 / 3 * k[-1] + rsv / 3)
+            d.append(2 / 3 * d[-1] + k[-1] / 3)
+
+        assert len(result["k"]) == len(closes)
+        assert_series_equal(result["k"], [None] * 8 + k)
+        assert_series_equal(result["d"], [None] * 8 + d)
+        assert_series_equal(result["j"], [None] * 8 + [3 * a - 2 * b for a, b in zip(k, d)])
+
+    def test_flat_prices(self):
+        """测试价格不变时 RSV 取 50"""
+        result = indicators.calculate_kdj([10.0] * 12, [10.0] * 12, [10.0] * 12)
+        assert result["k"][8:] == [50.0] * 4
+
+
+class TestAtr:
+    """测试 ATR"""
+
+    def test_matches_true_range_ema(self):
+        """测试与逐日计算真实波幅后取 EMA 一致"""
+        closes = make_prices()
+        highs = [c + 1.5 for c in closes]
+        lows = [c - 0.5 for c in closes]
+
+        tr = [highs[0] - lows[0]] + [
+            max(highs[i] - lows[i], abs(highs[i] - closes[i - 1]), abs(lows[i] - closes[i - 1]))
+            for i in range(1, len(closes))
+        ]
+        assert_series_equal(indicators.atr(closes, highs, lows, 14), reference_ema(tr, 14))
+
+
+class TestObv:
+    """测试 OBV"""
+
+    def test_accumulates_by_direction(self):
+        """测试按涨跌方向累加成交量"""
+        prices = [10.0, 11.0, 10.5, 10.5, 12.0]
+        volumes = [100.0, 200.0, 50.0, 80.0, 30.0]
+        assert indicators.obv(prices, volumes) == [100.0, 300.0, 250.0, 250.0, 280.0]
+
+    def test_empty(self):
+        """测试空序列"""
+        assert indicators.obv([], []) == []
+
+
+class TestEwm:
+    """测试指数平滑递推"""
+
+    def test_loop_matches_pandas(self):
+        """测试逐项递推（numba 路径）与 pandas ewm 一致"""
+        values = np.asarray(make_prices())
+        expected = pd.Series(values).ewm(alpha=0.2, adjust=False).mean().to_numpy()
+        loop = getattr(indicators._ewm_loop, "py_func", indicators._ewm_loop)
+        np.testing.assert_allclose(loop(values, 0.2), expected)
+        np.testing.assert_allclose(indicators._ewm(values, 0.2), expected)
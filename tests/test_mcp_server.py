@@ -0,0 +1,91 @@
+"""
+MCP 服务器测试
+
+测试 call_tool 的分发逻辑，不依赖网络
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from unittest import mock
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.config import Config
+from stork_agent.mcp_server import server
+
+
+class TestCallTool:
+    """测试工具调用分发"""
+
+    def test_runs_off_event_loop(self):
+        """测试工具函数在工作线程中执行"""
+        threads = []
+
+        def search_stocks(keyword, limit):
+            threads.append(threading.current_thread())
+            return f"搜索: {keyword}"
+
+        with mock.patch.object(server.tools, "search_stocks", side_effect=search_stocks):
+            result = asyncio.run(server.call_tool("stork_search_stocks", {"keyword": "茅台"}))
+
+        assert result[0].text == "搜索: 茅台"
+        assert threads[0] is not threading.main_thread()
+
+    def test_concurrent_calls_overlap(self):
+        """测试并发工具调用互不阻塞"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def search_stocks(keyword, limit):
+            barrier.wait()
+            return keyword
+
+        async def run_both():
+            return await asyncio.gather(
+                server.call_tool("stork_search_stocks", {"keyword": "茅台"}),
+                server.call_tool("stork_search_stocks", {"keyword": "银行"}),
+            )
+
+        with mock.patch.object(server.tools, "search_stocks", side_effect=search_stocks):
+            first, second = asyncio.run(run_both())
+
+        assert first[0].text == "茅台"
+        assert second[0].text == "银行"
+
+    def test_default_arguments(self):
+        """测试缺省参数使用默认值，且默认值不会在调用间共享"""
+        seen = []
+
+        def screen_stocks(criteria, page, page_size):
+            seen.append((dict(criteria), page, page_size))
+            criteria["limit"] = 5000
+            return "ok"
+
+        with mock.patch.object(server.tools, "screen_stocks", side_effect=screen_stocks):
+            asyncio.run(server.call_tool("stork_screen_stocks", {}))
+            asyncio.run(server.call_tool("stork_screen_stocks", {"page": 2}))
+
+        assert seen == [({}, 1, 50), ({}, 2, 50)]
+
+    def test_error_traceback_only_in_debug(self, monkeypatch):
+        """测试工具出错时只在 DEBUG 日志级别下附带堆栈"""
+        failing = mock.patch.object(server.tools, "search_stocks", side_effect=RuntimeError("boom"))
+
+        with failing:
+            result = asyncio.run(server.call_tool("stork_search_stocks", {"keyword": "茅台"}))
+        assert "boom" in result[0].text
+        assert "Traceback" not in result[0].text
+
+        monkeypatch.setattr(Config, "LOG_LEVEL", "DEBUG")
+        with failing:
+            result = asyncio.run(server.call_tool("stork_search_stocks", {"keyword": "茅台"}))
+        assert "Traceback" in result[0].text
+
+    def test_unknown_tool(self):
+        """测试未知工具"""
+        result = asyncio.run(server.call_tool("stork_unknown", {}))
+        assert "未知工具" in result[0].text
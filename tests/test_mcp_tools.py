@@ -72,6 +72,87 @@ class TestPagination:
         assert "没有" in result or "请先执行" in result
 
 
+def make_spot_df(n: int = 120) -> "pd.DataFrame":
+    """构造 n 只股票的全市场行情快照，市盈率均为 10"""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "代码": [f"{i:06d}" for i in range(n)],
+        "名称": [f"股票{i}" for i in range(n)],
+        "最新价": [10.0] * n,
+        "涨跌额": [0.0] * n,
+        "涨跌幅": [0.0] * n,
+        "换手率": [1.0] * n,
+        "市盈率-动态": [10.0] * n,
+        "市净率": [1.0] * n,
+        "总市值": [1e10] * n,
+        "行业": ["银行"] * n,
+    })
+
+
+def page_codes(text: str) -> list:
+    """取出回复表格中的股票代码"""
+    return [line.split(" | ")[0] for line in text.splitlines() if line[:6].isdigit()]
+
+
+class TestSourcePagination:
+    """测试筛选结果按页向数据源获取（模拟行情快照，不依赖网络）"""
+
+    @pytest.fixture(autouse=True)
+    def source(self, monkeypatch):
+        """模拟 120 只股票的行情快照，使用空的会话存储"""
+        from unittest import mock
+        from stork_agent.data import query
+        from stork_agent.mcp_server import session as session_module
+
+        monkeypatch.setattr(query, "_spot_cache", None)
+        monkeypatch.setattr(session_module, "_backend", session_module.InMemoryBackend())
+        self.briefs = mock.Mock(wraps=tools.agent_tools.get_stock_briefs)
+        monkeypatch.setattr(tools.agent_tools, "get_stock_briefs", self.briefs)
+        with mock.patch.object(query.ak, "stock_zh_a_spot_em", return_value=make_spot_df()) as patched:
+            self.spot = patched
+            yield
+
+    def refresh(self, monkeypatch, df):
+        """让下一次读取快照时返回新的数据"""
+        from stork_agent.data import query
+
+        monkeypatch.setattr(query, "_spot_cache", None)
+        self.spot.return_value = df
+
+    def test_fetch_requested_page_only(self):
+        """测试只获取请求的页的数据"""
+        result = tools.screen_stocks({"pe_max": 20, "limit": 5000}, page=2, page_size=50)
+
+        assert page_codes(result) == [f"{i:06d}" for i in range(50, 100)]
+        self.briefs.assert_called_once()
+        assert len(self.briefs.call_args.args[0]) == 50
+
+    def test_pages_stable_across_refresh(self, monkeypatch):
+        """测试快照刷新后行顺序和满足条件的股票变化时，各页既不重复也不遗漏"""
+        codes = page_codes(tools.screen_stocks({"pe_max": 20}, page=1, page_size=50))
+
+        df = make_spot_df().iloc[::-1].reset_index(drop=True)
+        df.loc[df["代码"] == "000000", "市盈率-动态"] = 50.0
+        df = df[df["代码"] != "000060"]
+        self.refresh(monkeypatch, df)
+
+        codes += page_codes(tools.next_page())
+        codes += page_codes(tools.next_page())
+
+        assert codes == [f"{i:06d}" for i in range(120) if i != 60]
+        assert "已经是最后一页" in tools.next_page()
+
+    def test_export_fetches_all(self, tmp_path, monkeypatch):
+        """测试导出时按代码列表获取全部结果"""
+        monkeypatch.setattr(tools.exporter.Config, "OUTPUT_DIR", str(tmp_path))
+        tools.screen_stocks({"pe_max": 20}, page=1, page_size=50)
+        self.refresh(monkeypatch, make_spot_df(150))
+
+        result = tools.export_current_result(format="csv")
+        assert "rows: 120" in result
+
+
 class TestCompareStocks:
     """测试股票对比功能"""
 
@@ -0,0 +1,336 @@
+"""
+数据查询模块测试
+
+使用模拟的 AkShare 数据测试 data/query.py，不依赖网络
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.cache import manager
+from stork_agent.data import query
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """关闭磁盘缓存并重置进程内缓存"""
+    monkeypatch.setattr(manager.Config, "CACHE_ENABLED", False)
+    monkeypatch.setattr(query, "_spot_cache", None)
+    monkeypatch.setattr(query, "_stock_list_cache", None)
+    monkeypatch.setattr(query, "_stock_names_cache", None)
+
+
+class TestNormalizeStockCode:
+    """测试股票代码规范化"""
+
+    @pytest.mark.parametrize("code, expected", [
+        ("600519", "600519"),
+        (" sh600519 ", "600519"),
+        ("SZ000001", "000001"),
+        ("858", "000858"),
+    ])
+    def test_normalize(self, code, expected):
+        """测试各种输入格式"""
+        assert query.normalize_stock_code(code) == expected
+
+
+class TestBatchGetRealtime:
+    """测试批量实时行情"""
+
+    def test_batch_lookup(self, spot):
+        """测试批量查询按输入顺序返回，跳过不存在的代码"""
+        results = query.batch_get_realtime(["sz300750", "600519", "999999"])
+
+        assert [r["code"] for r in results] == ["300750", "600519"]
+        assert results[0]["pe_ratio"] is None
+        assert results[1]["market_cap"] == pytest.approx(21000)
+
+    def test_record_fields(self, spot):
+        """测试整列转换后的字段与类型"""
+        results = query.batch_get_realtime(["300750", "600519", "300750"])
+
+        assert [r["code"] for r in results] == ["300750", "600519", "300750"]
+        assert results[1] == {
+            "code": "600519", "name": "贵州茅台", "price": 1680.5, "open": 1670.0,
+            "high": 1690.0, "low": 1665.0, "volume": 25000.0, "amount": 4.2e9,
+            "change": 10.5, "change_pct": 0.63, "turnover": 0.12,
+            "pe_ratio": 28.5, "pb_ratio": 12.3, "market_cap": pytest.approx(21000),
+        }
+        assert query.batch_get_realtime([]) == []
+
+    def test_snapshot_reused(self, spot):
+        """测试短时间内多次批量查询只请求一次全市场数据"""
+        query.batch_get_realtime(["600519"])
+        query.batch_get_realtime(["000858"])
+
+        assert spot.call_count == 1
+
+    def test_concurrent_fetch_coalesced(self, spot, spot_df):
+        """测试并发的缓存未命中只请求一次全市场数据"""
+        def slow_spot():
+            time.sleep(0.05)
+            return spot_df
+
+        spot.side_effect = slow_spot
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            snapshots = list(pool.map(lambda _: query.get_spot_snapshot(), range(4)))
+
+        assert spot.call_count == 1
+        assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+    def test_snapshot_columns_projected(self, spot, spot_df):
+        """测试快照只保留下游用到的列"""
+        spot_df["序号"] = range(len(spot_df))
+        spot_df["60日涨跌幅"] = 1.0
+        snapshot = query.get_spot_snapshot()
+
+        assert "序号" not in snapshot.columns
+        assert "60日涨跌幅" not in snapshot.columns
+        assert set(snapshot.columns) == set(spot_df.columns) - {"序号", "60日涨跌幅"}
+
+    def test_snapshot_missing_column(self, spot, spot_df):
+        """测试数据源缺少必需列时直接报错"""
+        spot.return_value = spot_df.drop(columns=["市净率"])
+        with pytest.raises(ValueError, match="市净率"):
+            query.get_spot_snapshot()
+
+    def test_snapshot_numeric_columns(self, spot, spot_df):
+        """测试快照数值列在获取时转换为 float，无法解析的值为 NaN"""
+        spot_df["换手率"] = ["0.12", "-", "0.5", "0.05", "0.4"]
+        snapshot = query.get_spot_snapshot()
+
+        assert snapshot["换手率"].dtype == np.float64
+        assert snapshot["换手率"].isna().to_dict() == {
+            "000001": False, "000858": True, "300750": False, "600519": False, "601398": False,
+        }
+        assert snapshot["成交量"].dtype == np.float64
+
+
+class TestGetRealtimeQuote:
+    """测试单只股票实时行情"""
+
+    def test_quote_from_snapshot(self, spot):
+        """测试单只查询与批量查询共用行情快照"""
+        quote = query.get_realtime_quote("sh600519")
+        query.get_realtime_quote("000858")
+        query.batch_get_realtime(["300750"])
+
+        assert spot.call_count == 1
+        assert quote["name"] == "贵州茅台"
+        assert quote["price"] == pytest.approx(1680.5)
+
+    def test_unknown_code(self, spot):
+        """测试不存在的代码抛出异常"""
+        with pytest.raises(Exception, match="未找到股票代码"):
+            query.get_realtime_quote("999999")
+
+
+class TestGetIndexRealtime:
+    """测试指数实时行情"""
+
+    def test_index_quote(self):
+        """测试按代码查找指数并转换字段"""
+        df = pd.DataFrame({
+            "代码": ["sh000001", "sz399001"],
+            "名称": ["上证指数", "深证成指"],
+            "最新价": [3050.12, 9800.5],
+            "涨跌幅": [0.35, -0.12],
+        })
+        with mock.patch.object(query.ak, "stock_zh_index_spot_em", return_value=df):
+            result = query.get_index_realtime("sz399001")
+            with pytest.raises(Exception, match="未找到指数代码"):
+                query.get_index_realtime("sh000300")
+
+        assert result["name"] == "深证成指"
+        assert result["price"] == 9800.5 and result["change_pct"] == -0.12
+        assert result["volume"] == 0.0
+
+
+class TestGetStockList:
+    """测试股票列表"""
+
+    def test_loaded_once_per_day(self):
+        """测试同一天内只加载一次"""
+        stock_list = pd.DataFrame({"code": ["600519"], "name": ["贵州茅台"]})
+        with mock.patch.object(query.ak, "stock_info_a_code_name", return_value=stock_list) as patched:
+            first = query.get_stock_list()
+            second = query.get_stock_list()
+
+        assert first is second
+        assert patched.call_count == 1
+
+    def test_reloaded_next_day(self, monkeypatch):
+        """测试跨日后重新加载"""
+        stock_list = pd.DataFrame({"code": ["600519"], "name": ["贵州茅台"]})
+        monkeypatch.setattr(query, "_stock_list_cache", (date(2000, 1, 1), stock_list.iloc[:0]))
+        with mock.patch.object(query.ak, "stock_info_a_code_name", return_value=stock_list) as patched:
+            assert len(query.get_stock_list()) == 1
+
+        assert patched.call_count == 1
+
+
+def make_hist_df() -> pd.DataFrame:
+    """构造 AkShare 历史K线数据"""
+    return pd.DataFrame({
+        "日期": ["2024-01-02", "2024-01-03", "2024-01-04"],
+        "开盘": [1680.0, 1690.0, 1700.0],
+        "收盘": [1688.0, 1695.0, 1702.0],
+        "最高": [1692.0, 1699.0, 1710.0],
+        "最低": [1675.0, 1685.0, 1696.0],
+        "成交量": [25000, 26000, 27000],
+        "成交额": [4.2e9, 4.4e9, 4.6e9],
+        "涨跌幅": [0.5, None, 0.41],
+    })
+
+
+class TestGetStockName:
+    """测试股票名称查询"""
+
+    def test_lookup(self, monkeypatch):
+        """测试按代码查名称，股票列表更新后重建名称表"""
+        stock_list = pd.DataFrame({"code": ["600519", "000858"], "name": ["贵州茅台", "五粮液"]})
+        monkeypatch.setattr(query, "_stock_list_cache", (date.today(), stock_list))
+
+        assert query.get_stock_name("000858") == "五粮液"
+        assert query.get_stock_name("999999") == ""
+
+        renamed = pd.DataFrame({"code": ["000858"], "name": ["五粮液A"]})
+        monkeypatch.setattr(query, "_stock_list_cache", (date.today(), renamed))
+        assert query.get_stock_name("000858") == "五粮液A"
+
+
+class TestGetHistoryKline:
+    """测试历史K线"""
+
+    @pytest.fixture(autouse=True)
+    def hist(self, monkeypatch):
+        """模拟股票列表和K线接口"""
+        stock_list = pd.DataFrame({"code": ["600519"], "name": ["贵州茅台"]})
+        monkeypatch.setattr(query, "_stock_list_cache", (date.today(), stock_list))
+        with mock.patch.object(query.ak, "stock_zh_a_hist", return_value=make_hist_df()) as patched:
+            yield patched
+
+    def test_bars(self):
+        """测试按条返回，只保留最近 days 条"""
+        result = query.get_history_kline("600519", days=2)
+
+        assert result["name"] == "贵州茅台"
+        assert result["count"] == 2
+        assert result["data"][0] == {
+            "date": "2024-01-03", "open": 1690.0, "high": 1699.0, "low": 1685.0,
+            "close": 1695.0, "volume": 26000.0, "amount": 4.4e9, "change_pct": 0,
+        }
+
+    def test_request_params(self, hist):
+        """测试复权方式与日期区间参数"""
+        query.get_history_kline("600519", days=30, adjust="hfq")
+        query.get_history_kline("600519", days=30, adjust="none")
+
+        first, second = hist.call_args_list
+        assert first.kwargs["adjust"] == "hfq"
+        assert second.kwargs["adjust"] == ""
+        start = datetime.strptime(first.kwargs["start_date"], "%Y%m%d")
+        end = datetime.strptime(first.kwargs["end_date"], "%Y%m%d")
+        assert (end - start).days == 60
+
+    def test_columnar(self):
+        """测试按列返回与按条返回一致"""
+        bars = query.get_history_kline("600519")["data"]
+        columns = query.get_history_kline("600519", columnar=True)["columns"]
+
+        assert columns["close"] == [bar["close"] for bar in bars]
+        assert columns["date"] == [bar["date"] for bar in bars]
+        assert "data" not in query.get_history_kline("600519", columnar=True)
+
+    def test_history_arrays(self):
+        """测试返回指标计算所需的数组"""
+        close, high, low, volume = query.get_history_arrays("600519", days=2)
+
+        assert close.tolist() == [1695.0, 1702.0]
+        assert high.dtype == low.dtype == volume.dtype == np.float64
+
+    def test_raw_frame_shared(self, hist, tmp_path, monkeypatch):
+        """测试开启缓存时不同返回形式共用一次原始数据请求"""
+        monkeypatch.setattr(manager.Config, "CACHE_ENABLED", True)
+        monkeypatch.setattr(manager, "_cache_manager", manager.CacheManager(cache_dir=str(tmp_path)))
+
+        bars = query.get_history_kline("600519", days=2)
+        columns = query.get_history_kline("600519", days=2, columnar=True)["columns"]
+
+        assert hist.call_count == 1
+        assert columns["close"] == [bar["close"] for bar in bars["data"]]
+
+    def test_today_refetched(self, hist, tmp_path, monkeypatch):
+        """测试区间包含今天时只短时缓存，过期后重新请求"""
+        monkeypatch.setattr(manager.Config, "CACHE_ENABLED", True)
+        cache = manager.CacheManager(cache_dir=str(tmp_path))
+        monkeypatch.setattr(manager, "_cache_manager", cache)
+
+        query.get_history_kline("600519", days=2)
+        stale = time.time() - manager.CacheManager.TTL_REALTIME - 1
+        for path in tmp_path.rglob("*.pkl*"):
+            os.utime(path, (stale, stale))
+        query.get_history_kline("600519", days=2)
+
+        assert hist.call_count == 2
+
+    def test_arrays(self):
+        """测试按 NumPy 数组返回"""
+        result = query.get_history_kline("600519", arrays=True)
+        columns = result["columns"]
+
+        assert columns["date"].dtype == np.dtype("datetime64[D]")
+        assert columns["close"].dtype == np.float64
+        assert columns["close"].tolist() == query.get_history_kline("600519", columnar=True)["columns"]["close"]
+        assert columns["change_pct"][1] == 0
+
+
+class TestGetFinancialData:
+    """测试财务数据"""
+
+    def test_failure_not_cached(self, tmp_path, monkeypatch):
+        """测试接口失败时返回默认值且不缓存，下次调用重新请求，成功结果被缓存"""
+        monkeypatch.setattr(manager.Config, "CACHE_ENABLED", True)
+        monkeypatch.setattr(manager, "_cache_manager", manager.CacheManager(cache_dir=str(tmp_path)))
+        stock_list = pd.DataFrame({"code": ["600519"], "name": ["贵州茅台"]})
+        monkeypatch.setattr(query, "_stock_list_cache", (date.today(), stock_list))
+        indicators = pd.DataFrame({"日期": ["2024-09-30"], "净资产收益率": [24.6]})
+
+        with mock.patch.object(
+            query.ak, "stock_financial_analysis_indicator",
+            side_effect=[ConnectionError("timeout"), indicators]
+        ) as patched:
+            with pytest.warns(UserWarning):
+                failed = query.get_financial_data("600519")
+            first = query.get_financial_data("600519")
+            second = query.get_financial_data("600519")
+
+        assert failed["roe"] is None
+        assert first["roe"] == second["roe"] == 24.6
+        assert first["name"] == "贵州茅台"
+        assert patched.call_count == 2
+
+
+class TestGetStockInfo:
+    """测试股票基本信息"""
+
+    def test_items_to_dict(self):
+        """测试 item/value 两列转换为字典"""
+        info = pd.DataFrame({"item": ["股票简称", "总股本"], "value": ["贵州茅台", 1.256e9]})
+        with mock.patch.object(query.ak, "stock_individual_info_em", return_value=info):
+            result = query.get_stock_info("sh600519")
+
+        assert result == {"code": "600519", "股票简称": "贵州茅台", "总股本": 1.256e9}
@@ -0,0 +1,163 @@
+"""
+选股筛选模块测试
+
+使用模拟的全市场快照测试 data/screener.py，不依赖网络
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.agent.schemas import ScreeningFilter
+from stork_agent.data import query, screener
+
+
+# 所有测试使用 conftest 中的模拟全市场快照
+pytestmark = pytest.mark.usefixtures("spot")
+
+
+class TestScreenStocks:
+    """测试条件筛选"""
+
+    def test_pe_filter(self):
+        """测试市盈率筛选，缺失值不参与"""
+        result = screener.screen_stocks(ScreeningFilter(pe_max=20))
+        assert [s["code"] for s in result["stocks"]] == ["000001", "000858", "601398"]
+        assert result["next_cursor"] is None
+
+    def test_combined_filters(self):
+        """测试多个条件同时生效"""
+        result = screener.screen_stocks(
+            ScreeningFilter(pe_max=20, change_min=0, market_cap_min=1000, industry="银行")
+        )
+        assert [s["code"] for s in result["stocks"]] == ["601398"]
+
+    def test_industry_filter(self):
+        """测试行业筛选"""
+        result = screener.screen_stocks(ScreeningFilter(industry="银行"))
+        assert [s["code"] for s in result["stocks"]] == ["000001", "601398"]
+
+    def test_industry_substring(self, spot_df):
+        """测试行业按子串匹配，缺失行业的股票不会命中"""
+        spot_df.loc[4, "行业"] = None
+
+        result = screener.screen_stocks(ScreeningFilter(industry="行"))
+        assert [s["code"] for s in result["stocks"]] == ["000858", "600519", "601398"]
+
+    def test_industry_literal(self, spot_df):
+        """测试行业关键词按普通文本匹配，支持逗号分隔多个行业"""
+        spot_df.loc[2, "行业"] = "电池(锂)"
+
+        result = screener.screen_stocks(ScreeningFilter(industry="电池(锂)"))
+        assert [s["code"] for s in result["stocks"]] == ["300750"]
+
+        result = screener.screen_stocks(ScreeningFilter(industry="电池，酿酒, "))
+        assert [s["code"] for s in result["stocks"]] == ["000858", "300750", "600519"]
+
+    def test_market_cap_in_yi(self):
+        """测试市值以亿元为单位"""
+        result = screener.screen_stocks(ScreeningFilter(market_cap_min=10000))
+        assert [s["code"] for s in result["stocks"]] == ["600519", "601398"]
+        assert result["stocks"][0]["market_cap"] == pytest.approx(21000)
+
+    def test_market_cap_range(self):
+        """测试市值上下限同时生效，边界值包含在内"""
+        result = screener.screen_stocks(ScreeningFilter(market_cap_min=6000, market_cap_max=18000))
+        assert [s["code"] for s in result["stocks"]] == ["000858", "300750", "601398"]
+
+    def test_cursor_pagination(self):
+        """测试游标分页依次取完全部结果"""
+        codes = []
+        cursor = None
+        while True:
+            result = screener.screen_stocks(ScreeningFilter(limit=2), cursor)
+            codes.extend(s["code"] for s in result["stocks"])
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+
+        assert codes == ["000001", "000858", "300750", "600519", "601398"]
+
+    def test_cursor_without_match(self):
+        """测试游标股票不存在或不再满足条件时从其后的代码继续"""
+        result = screener.screen_stocks(ScreeningFilter(limit=2), cursor="999999")
+        assert result["stocks"] == [] and result["next_cursor"] is None
+
+        result = screener.screen_stocks(ScreeningFilter(pe_max=20), cursor="600519")
+        assert [s["code"] for s in result["stocks"]] == ["601398"]
+
+    def test_cursor_across_refresh(self, spot, spot_df, monkeypatch):
+        """测试快照刷新后行顺序变化时，翻页既不重复也不遗漏"""
+        first = screener.screen_stocks(ScreeningFilter(limit=2))
+
+        monkeypatch.setattr(query, "_spot_cache", None)
+        spot.return_value = spot_df.iloc[::-1].reset_index(drop=True)
+        second = screener.screen_stocks(ScreeningFilter(limit=2), cursor=first["next_cursor"])
+
+        assert [s["code"] for s in first["stocks"] + second["stocks"]] == ["000001", "000858", "300750", "600519"]
+
+    def test_screen_codes(self):
+        """测试取全部满足条件的代码，按代码排序，不受 limit 影响"""
+        assert screener.screen_codes(ScreeningFilter(limit=1)) == ["000001", "000858", "300750", "600519", "601398"]
+        assert screener.screen_codes(ScreeningFilter(pe_max=20, limit=1)) == ["000001", "000858", "601398"]
+
+    def test_get_stock_briefs(self):
+        """测试按代码取简要信息，保持传入顺序，跳过不存在的代码"""
+        briefs = screener.get_stock_briefs(["601398", "999999", "000858"])
+        expected = screener.screen_stocks(ScreeningFilter(pe_max=20))["stocks"]
+
+        assert briefs == [expected[2], expected[1]]
+        assert screener.get_stock_briefs([]) == []
+
+    def test_filtered_cursor_pagination(self):
+        """测试带条件时游标分页"""
+        first = screener.screen_stocks(ScreeningFilter(pe_max=20, limit=2))
+        second = screener.screen_stocks(ScreeningFilter(pe_max=20, limit=2), cursor=first["next_cursor"])
+
+        assert [s["code"] for s in first["stocks"]] == ["000001", "000858"]
+        assert [s["code"] for s in second["stocks"]] == ["601398"]
+        assert second["next_cursor"] is None
+
+
+class TestRangeMask:
+    """测试数值区间掩码"""
+
+    def test_kernel_matches_numpy(self, monkeypatch):
+        """测试逐行区间判断（numba 路径）与 numpy 逐条件比较结果一致"""
+        df = query.get_spot_snapshot()
+        filters = ScreeningFilter(pe_max=30, pb_min=0.55, market_cap_min=1000, turnover_max=0.45)
+
+        kernel = getattr(screener._range_mask, "py_func", screener._range_mask)
+        monkeypatch.setattr(screener, "njit", None)
+        expected = screener._build_filter_mask(df, filters)
+        monkeypatch.setattr(screener, "njit", lambda **kwargs: None)
+        monkeypatch.setattr(screener, "_range_mask", kernel)
+        actual = screener._build_filter_mask(df, filters)
+
+        # 快照按代码排序：000001, 000858, 300750, 600519, 601398
+        assert actual.tolist() == expected.tolist() == [False, True, False, True, True]
+
+
+class TestRankings:
+    """测试涨幅榜、跌幅榜和活跃股"""
+
+    def test_rankings(self):
+        """测试排序方向"""
+        assert [s.code for s in screener.screen_gainers(limit=2)] == ["300750", "600519"]
+        assert [s.code for s in screener.screen_losers(limit=2)] == ["000001", "000858"]
+        assert [s.code for s in screener.screen_active_stocks(limit=2)] == ["300750", "000001"]
+
+    def test_snapshot_shared(self, spot):
+        """测试各榜单与条件筛选共用一次全市场快照"""
+        screener.screen_gainers()
+        screener.screen_losers()
+        screener.screen_active_stocks()
+        screener.screen_stocks(ScreeningFilter(pe_max=20))
+
+        assert spot.call_count == 1
@@ -0,0 +1,227 @@
+"""
+MCP 会话状态测试
+
+测试 mcp_server/session.py 的分页与会话管理
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目路径（tests/ 是项目根目录的子目录，所以需要2次 dirname）
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from stork_agent.mcp_server import session as session_module
+from stork_agent.mcp_server.session import QuerySession
+
+
+def make_rows(n: int) -> list:
+    """构造 n 条股票数据"""
+    return [{"code": f"{i:06d}", "name": f"股票{i}", "price": float(i)} for i in range(n)]
+
+
+class TestQuerySession:
+    """测试查询会话分页"""
+
+    def test_pages(self):
+        """测试翻页返回对应切片"""
+        session = QuerySession()
+        session.set_query("screen", make_rows(120), page_size=50)
+
+        assert session.total_pages == 3
+        assert [r["code"] for r in session.get_current_page()][:2] == ["000000", "000001"]
+        assert session.next_page()[0]["code"] == "000050"
+        assert len(session.next_page()) == 20
+        assert session.next_page()[0]["code"] == "000100"
+        assert session.goto_page(1)[0]["code"] == "000000"
+
+    def test_page_reused(self):
+        """测试重复访问同一页复用已切出的数据"""
+        session = QuerySession()
+        session.set_query("screen", make_rows(120), page_size=50)
+
+        first = session.get_current_page()
+        session.next_page()
+        assert session.prev_page() is first
+
+    def test_new_query_resets_pages(self):
+        """测试设置新查询后不再返回旧查询的页"""
+        session = QuerySession()
+        session.set_query("screen", make_rows(10), page_size=5)
+        session.get_current_page()
+
+        session.set_query("search", make_rows(3), page_size=5)
+        assert len(session.get_current_page()) == 3
+
+    def test_clear(self):
+        """测试清除后没有数据"""
+        session = QuerySession()
+        session.set_query("screen", make_rows(10), page_size=5)
+        session.get_current_page()
+        session.clear()
+
+        assert session.get_current_page() == []
+
+    def test_paged_query(self):
+        """测试数据源分页的查询只记录总数和页码"""
+        session = QuerySession()
+        codes = [row["code"] for row in make_rows(120)]
+        session.set_paged_query("screen", {"pe_max": 20}, codes, page_size=50)
+
+        assert session.has_query() and session.is_paged()
+        assert session.total_pages == 3 and session.total_count == 120
+        assert session.get_current_page() == []
+        assert session.get_current_codes() == codes[:50]
+        session.next_page()
+        session.next_page()
+        assert session.get_current_codes() == codes[100:]
+
+        session.set_query("search", make_rows(3))
+        assert not session.is_paged()
+        session.clear()
+        assert not session.has_query()
+
+    def test_frame_reused(self):
+        """测试列式视图只构建一次，设置新查询后重建"""
+        session = QuerySession()
+        assert session.get_frame() is None
+
+        session.set_query("screen", make_rows(10), page_size=5)
+        frame = session.get_frame()
+        assert frame["code"].tolist()[:2] == ["000000", "000001"]
+        assert session.get_frame() is frame
+
+        session.set_query("search", make_rows(3), page_size=5)
+        assert len(session.get_frame()) == 3
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """使用空的进程内会话存储"""
+    backend = session_module.InMemoryBackend()
+    monkeypatch.setattr(session_module, "_backend", backend)
+    return backend._sessions
+
+
+class FakeRedis:
+    """只实现 get/setex/expire/delete 的内存 Redis 客户端"""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.writes = 0
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+        self.ttls[key] = ttl
+        self.writes += 1
+
+    def expire(self, key, ttl):
+        if key in self.store:
+            self.ttls[key] = ttl
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+class TestSessionBackend:
+    """测试会话存储后端接口"""
+
+    def test_abstract(self):
+        """测试接口不能直接实例化"""
+        with pytest.raises(TypeError):
+            session_module.SessionBackend()
+
+
+class TestSessionRegistry:
+    """测试全局会话管理"""
+
+    def test_reuse_session(self, sessions):
+        """测试同一 ID 返回同一会话"""
+        first = session_module.get_session("a")
+        assert session_module.get_session("a") is first
+        assert session_module.get_session("b") is not first
+
+    def test_expired_replaced(self, sessions):
+        """测试过期会话在访问时被替换"""
+        first = session_module.get_session("a")
+        first.last_activity -= first.session_timeout + 1
+        assert session_module.get_session("a") is not first
+
+    def test_cleanup_expired(self, sessions):
+        """测试清理只移除过期会话"""
+        for sid in ("a", "b", "c"):
+            session_module.get_session(sid)
+        for sid in ("a", "b"):
+            sessions[sid].last_activity -= sessions[sid].session_timeout + 1
+
+        assert session_module.cleanup_expired_sessions() == 2
+        assert list(sessions) == ["c"]
+
+    def test_max_sessions(self, sessions, monkeypatch):
+        """测试超过上限时淘汰最久未访问的会话"""
+        monkeypatch.setattr(session_module, "MAX_SESSIONS", 2)
+        session_module.get_session("a")
+        session_module.get_session("b")
+        session_module.get_session("a")
+        session_module.get_session("c")
+
+        assert list(sessions) == ["a", "c"]
+
+    def test_clear_session(self, sessions):
+        """测试清除会话后重新创建"""
+        first = session_module.get_session("a")
+        first.set_query("screen", make_rows(3))
+        session_module.clear_session("a")
+
+        assert first.complete_data is None
+        assert session_module.get_session("a") is not first
+
+
+class TestRedisBackend:
+    """测试 Redis 会话存储"""
+
+    def test_round_trip(self, monkeypatch):
+        """测试会话修改后写回，其他进程读取到相同状态"""
+        client = FakeRedis()
+        monkeypatch.setattr(session_module, "_backend", session_module.RedisBackend(client))
+
+        session = session_module.get_session("a")
+        session.set_query("screen", make_rows(120), page_size=50)
+        session.get_current_page()
+        session.next_page()
+        session_module.save_session("a", session)
+
+        restored = session_module.get_session("a")
+        assert restored is not session
+        assert restored.current_page == 2
+        assert restored.get_current_page()[0]["code"] == "000050"
+        assert client.ttls["stork:session:a"] == session.session_timeout
+
+    def test_read_only_refreshes_ttl(self, monkeypatch):
+        """测试读取已有会话只续期键，不重写会话"""
+        client = FakeRedis()
+        monkeypatch.setattr(session_module, "_backend", session_module.RedisBackend(client))
+
+        session_module.get_session("a")
+        client.ttls["stork:session:a"] = 1
+        restored = session_module.get_session("a")
+
+        assert client.writes == 1
+        assert client.ttls["stork:session:a"] == restored.session_timeout
+        assert not restored.is_expired()
+
+    def test_clear(self, monkeypatch):
+        """测试清除会话删除 Redis 键"""
+        client = FakeRedis()
+        monkeypatch.setattr(session_module, "_backend", session_module.RedisBackend(client))
+
+        session_module.get_session("a")
+        session_module.clear_session("a")
+        assert client.store == {}